@@ -9,15 +9,24 @@
 - 幂等：同一网页书单在同一频道重复发布时，编辑既有消息而非新发，天然支持后续更新。
 """
 
+import asyncio
+import hashlib
 import hmac
+import json
 import logging
-from typing import Optional, Tuple
+from typing import Dict, NamedTuple, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import discord
 from aiohttp import web
 
 import config
+from app.booklist.jobs import BooklistJobQueue
+from app.bot.cache_profile import cache_memory_report
+from app.bot.metrics import metrics_route
+from app.bot.request_scheduler import PRIORITY_NORMAL, request_priority
+from app.cluster import ClusterError
+from app.utils.cache import TTLCache
 from app.utils.text import truncate as _truncate
 
 logger = logging.getLogger(__name__)
@@ -120,9 +129,105 @@ def _build_view(booklist_id) -> discord.ui.View:
     return view
 
 
+def _content_hash(embed: discord.Embed, view: discord.ui.View) -> str:
+    """已渲染内容的哈希（不含 embed 时间戳），用于判断重发的书单是否有变化。"""
+    data = embed.to_dict()
+    data.pop("timestamp", None)
+    content = json.dumps({"embed": data, "components": view.to_components()}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+# 撤除时每条发布消息的结果
+UNPUBLISH_DELETED = "deleted"
+UNPUBLISH_MISSING = "missing"
+UNPUBLISH_FORBIDDEN = "forbidden"
+UNPUBLISH_FAILED = "failed"
+
+
+class _PublishTarget(NamedTuple):
+    guild_id: int
+    thread_id: int
+    discord_user_id: int
+    booklist_id: int
+
+
+def _validate_publish(payload: dict) -> Union[_PublishTarget, Tuple[int, dict]]:
+    """发布参数校验：成功返回目标，失败返回 (HTTP 状态码, 错误体)。不访问 Discord。"""
+    thread_url = payload.get("thread_url")
+    discord_user_id_raw = payload.get("discord_user_id")
+    booklist_id_raw = payload.get("booklist_id")
+    items = payload.get("items")
+
+    if not thread_url or discord_user_id_raw is None or booklist_id_raw is None:
+        return 400, {"ok": False, "error": "missing required field: thread_url / discord_user_id / booklist_id"}
+    if not isinstance(items, list):
+        return 400, {"ok": False, "error": "items must be a list"}
+
+    try:
+        discord_user_id = int(discord_user_id_raw)
+        booklist_id = int(booklist_id_raw)
+    except (TypeError, ValueError):
+        return 400, {"ok": False, "error": "discord_user_id / booklist_id must be integers"}
+
+    parsed = _parse_thread_url(thread_url)
+    if not parsed:
+        return 400, {"ok": False, "error": "invalid thread_url"}
+    guild_id, thread_id = parsed
+    return _PublishTarget(guild_id, thread_id, discord_user_id, booklist_id)
+
+
+class _PublishRejected(Exception):
+    """发布请求无法执行（帖子校验失败等），携带应返回的 HTTP 状态码与错误体。"""
+
+    def __init__(self, status: int, error: str):
+        super().__init__(error)
+        self.status = status
+        self.body = {"ok": False, "error": error}
+
+
+class _UnpublishTarget(NamedTuple):
+    booklist_id: int
+    thread_id: Optional[int]
+
+
+def _validate_unpublish(payload: dict) -> Union[_UnpublishTarget, Tuple[int, dict]]:
+    booklist_id_raw = payload.get("booklist_id")
+    if booklist_id_raw is None:
+        return 400, {"ok": False, "error": "missing required field: booklist_id"}
+    try:
+        booklist_id = int(booklist_id_raw)
+    except (TypeError, ValueError):
+        return 400, {"ok": False, "error": "booklist_id must be an integer"}
+
+    thread_id = None
+    thread_url = payload.get("thread_url")
+    if thread_url:
+        parsed = _parse_thread_url(thread_url)
+        if not parsed:
+            return 400, {"ok": False, "error": "invalid thread_url"}
+        _, thread_id = parsed
+    return _UnpublishTarget(booklist_id, thread_id)
+
+
+def _wants_async(request: web.Request) -> bool:
+    """?async=1 或请求头 Prefer: respond-async 时走异步任务模式。"""
+    if request.query.get("async", "").strip().lower() in ("1", "true", "yes"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def _batch_result(index: int, status: int, body: dict) -> dict:
+    return {"index": index, "status": status, **body}
+
+
 class BooklistPublishAPI:
     def __init__(self, bot):
         self.bot = bot
+        # 已通过校验的 (帖子, 发布者) → guild_id：帖主、所属服务器与父论坛都不会变，
+        # 同一书单反复更新时免去元数据查询；发送/编辑遇到 Forbidden/NotFound 时作废
+        self._verified = TTLCache(
+            maxsize=config.THREAD_METADATA_CACHE_MAX_ENTRIES, ttl=config.BOOKLIST_API_THREAD_CHECK_TTL,
+        )
 
     def _check_auth(self, request: web.Request) -> bool:
         provided = request.headers.get("X-API-Key", "")
@@ -132,7 +237,30 @@ class BooklistPublishAPI:
 
     async def health(self, request: web.Request) -> web.Response:
         ready = self.bot.is_ready()
-        return web.json_response({"ok": True, "ready": ready})
+        welcome = self.bot.get_cog("WelcomeCommands")
+        return web.json_response({
+            "ok": True,
+            "ready": ready,
+            "shards": {str(shard_id): status for shard_id, status in self.bot.shard_status().items()},
+            "caches": {
+                "reaction": self.bot.reaction_cache.stats(),
+                "thread_metadata": self.bot.thread_metadata.stats(),
+                "render": self.bot.render_cache.stats(),
+                "booklist_threads": self._verified.stats(),
+            },
+            "prefetch": self.bot.page_prefetcher.stats(),
+            "featured_index": self.bot.featured_index.stats(),
+            "guild_settings": self.bot.guild_settings.stats(),
+            "appreciator": {
+                "roles": self.bot.role_cache.stats(),
+                "stats": self.bot.appreciator_stats.stats(),
+            },
+            "welcome": welcome.dispatcher.stats() if welcome is not None else None,
+            "rest_scheduler": self.bot.request_scheduler.stats(),
+            "jobs": self.bot.booklist_jobs.stats() if self.bot.booklist_jobs is not None else None,
+            "memory": cache_memory_report(self.bot),
+            "cluster": self.bot.cluster.stats() if self.bot.cluster is not None else None,
+        })
 
     async def handle_publish(self, request: web.Request) -> web.Response:
         if not self._check_auth(request):
@@ -143,72 +271,163 @@ class BooklistPublishAPI:
         except Exception:
             return web.json_response({"ok": False, "error": "invalid json"}, status=400)
 
-        # ── 参数校验 ─────────────────────────────────────────
-        thread_url = payload.get("thread_url")
-        discord_user_id_raw = payload.get("discord_user_id")
-        booklist_id_raw = payload.get("booklist_id")
-        items = payload.get("items")
+        if _wants_async(request):
+            target = _validate_publish(payload)
+            if not isinstance(target, _PublishTarget):
+                return web.json_response(target[1], status=target[0])
+            return self._accept_job("publish", payload)
+
+        with request_priority(PRIORITY_NORMAL):
+            status, body = await self.publish(payload)
+        return web.json_response(body, status=status)
+
+    def _accept_job(self, kind: str, payload: dict) -> web.Response:
+        job_id = self.bot.booklist_jobs.submit(kind, payload)
+        status_url = f"/booklist/jobs/{job_id}"
+        return web.json_response(
+            {"ok": True, "job_id": job_id, "status": "pending", "status_url": status_url},
+            status=202, headers={"Location": status_url},
+        )
 
-        if not thread_url or discord_user_id_raw is None or booklist_id_raw is None:
-            return web.json_response(
-                {"ok": False, "error": "missing required field: thread_url / discord_user_id / booklist_id"},
-                status=400,
-            )
-        if not isinstance(items, list):
-            return web.json_response({"ok": False, "error": "items must be a list"}, status=400)
+    async def handle_job(self, request: web.Request) -> web.Response:
+        if not self._check_auth(request):
+            return web.json_response({"ok": False, "error": "unauthorized"}, status=401)
 
-        try:
-            discord_user_id = int(discord_user_id_raw)
-            booklist_id = int(booklist_id_raw)
-        except (TypeError, ValueError):
-            return web.json_response({"ok": False, "error": "discord_user_id / booklist_id must be integers"}, status=400)
+        job = self.bot.booklist_jobs.get(request.match_info["job_id"]) if self.bot.booklist_jobs is not None else None
+        if job is None:
+            return web.json_response({"ok": False, "error": "job not found"}, status=404)
 
-        parsed = _parse_thread_url(thread_url)
-        if not parsed:
-            return web.json_response({"ok": False, "error": "invalid thread_url"}, status=400)
-        guild_id, thread_id = parsed
+        result = None
+        if job["result_status"] is not None:
+            result = {"status": job["result_status"], "body": job["result"]}
+        return web.json_response({
+            "ok": True,
+            "job_id": job["job_id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "next_attempt_at": job["next_attempt_at"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "result": result,
+        })
 
-        # ── 频道与权限校验 ──────────────────────────────────
-        if not self.bot.is_ready():
-            return web.json_response({"ok": False, "error": "bot not ready"}, status=503)
+    async def publish_from_cluster(self, payload: dict) -> dict:
+        """集群 IPC 转发来的发布请求（已在 0 号进程完成认证）。"""
+        with request_priority(PRIORITY_NORMAL):
+            status, body = await self.publish(payload)
+        return {"status": status, "body": body}
 
-        channel = self.bot.get_channel(thread_id)
-        if channel is None:
-            try:
-                channel = await self.bot.fetch_channel(thread_id)
-            except discord.NotFound:
-                return web.json_response({"ok": False, "error": "thread not found"}, status=404)
-            except discord.Forbidden:
-                return web.json_response({"ok": False, "error": "bot has no access to thread"}, status=403)
-            except Exception as e:
-                logger.warning(f"fetch_channel 失败: {e}")
-                return web.json_response({"ok": False, "error": "fetch thread failed"}, status=502)
+    async def _forward_publish(self, cluster_id: int, payload: dict) -> Tuple[int, dict]:
+        try:
+            result = await self.bot.cluster.request(cluster_id, "booklist_publish", payload, timeout=30.0)
+        except (ClusterError, asyncio.TimeoutError) as e:
+            logger.warning(f"转发书单发布到集群进程 {cluster_id} 失败: {e}")
+            return 503, {"ok": False, "error": "cluster unavailable"}
+        return result["status"], result["body"]
+
+    async def publish(self, payload: dict) -> Tuple[int, dict]:
+        """校验并发布/更新书单 embed，返回 (HTTP 状态码, 响应 JSON)。"""
+        target = _validate_publish(payload)
+        if not isinstance(target, _PublishTarget):
+            return target
+
+        # 集群模式下由负责该服务器分片的进程发布（其 gateway 缓存里才有这个帖子）
+        owner = self.bot.cluster_for_guild(target.guild_id)
+        if owner is not None and owner != self.bot.cluster.cluster_id:
+            return await self._forward_publish(owner, payload)
+
+        try:
+            channel = await self._check_thread(target)
+        except _PublishRejected as e:
+            return e.status, e.body
+        return await self._publish_to_channel(target, payload, channel)
+
+    async def _resolve_thread(self, thread_id: int) -> dict:
+        """取得目标帖元数据并确认是论坛帖；失败时抛出 _PublishRejected。"""
+        # gateway 缓存未命中时以 fetch_channel 确认（数据库记录可能已过时）；通过后由 _verified 缓存，重复发布不再请求
+        try:
+            thread_meta = await self.bot.thread_metadata.resolve(thread_id)
+        except discord.NotFound:
+            raise _PublishRejected(404, "thread not found")
+        except discord.Forbidden:
+            raise _PublishRejected(403, "bot has no access to thread")
+        except Exception as e:
+            logger.warning(f"fetch_channel 失败: {e}")
+            raise _PublishRejected(502, "fetch thread failed")
 
-        if not isinstance(channel, discord.Thread) or not channel.parent or channel.parent.type != discord.ChannelType.forum:
-            return web.json_response({"ok": False, "error": "target is not a forum thread"}, status=403)
+        if thread_meta is None or not thread_meta["parent_is_forum"]:
+            raise _PublishRejected(403, "target is not a forum thread")
+        return thread_meta
 
-        if channel.guild and channel.guild.id != guild_id:
-            return web.json_response({"ok": False, "error": "guild mismatch"}, status=400)
+    async def _check_thread(self, target: _PublishTarget, resolved: Optional[dict] = None):
+        """校验发布者可向目标帖发布，返回可发送的频道；失败时抛出 _PublishRejected。
 
-        if channel.owner_id != discord_user_id:
-            return web.json_response({"ok": False, "error": "publisher is not the thread owner"}, status=403)
+        resolved 为 thread_id → 帖子元数据（或解析失败的 _PublishRejected）的暂存，批量发布时同一帖只解析一次。
+        """
+        if not self.bot.is_guild_ready(target.guild_id):
+            raise _PublishRejected(503, "bot not ready")
+
+        key = (target.thread_id, target.discord_user_id)
+        if self._verified.get(key) != target.guild_id:
+            if resolved is None:
+                resolved = {}
+            if target.thread_id not in resolved:
+                try:
+                    resolved[target.thread_id] = await self._resolve_thread(target.thread_id)
+                except _PublishRejected as e:
+                    resolved[target.thread_id] = e
+            thread_meta = resolved[target.thread_id]
+            if isinstance(thread_meta, _PublishRejected):
+                raise _PublishRejected(thread_meta.status, thread_meta.body["error"])
+            if thread_meta["guild_id"] != target.guild_id:
+                raise _PublishRejected(400, "guild mismatch")
+            if thread_meta["owner_id"] != target.discord_user_id:
+                raise _PublishRejected(403, "publisher is not the thread owner")
+            self._verified.set(key, target.guild_id)
+
+        # 归档帖不在 gateway 缓存中，用 PartialMessageable 收发消息即可，不必再取频道对象
+        return (
+            self.bot.get_channel(target.thread_id)
+            or self.bot.get_partial_messageable(target.thread_id, guild_id=target.guild_id)
+        )
+
+    async def _publish_to_channel(self, target: _PublishTarget, payload: dict, channel) -> Tuple[int, dict]:
+        booklist_id = target.booklist_id
+        discord_user_id = target.discord_user_id
+        guild_id = target.guild_id
+        thread_id = target.thread_id
+        key = (thread_id, discord_user_id)
 
         # ── 发布或更新 ──────────────────────────────────────
         embed = _build_embed(payload, discord_user_id)
         view = _build_view(booklist_id)
+        content_hash = _content_hash(embed, view)
         existing = self.bot.db.get_webpage_published_booklist(booklist_id, thread_id)
 
+        # 网页后端常重发相同内容：与上次发布的内容一致时不调用 Discord（force=true 强制重新编辑）
+        if existing and existing["content_hash"] == content_hash and not payload.get("force"):
+            logger.debug(f"网页书单内容未变化，跳过编辑 | booklist={booklist_id} | thread={thread_id}")
+            return 200, {
+                "ok": True,
+                "updated": False,
+                "unchanged": True,
+                "message_id": str(existing["message_id"]),
+                "message_url": f"https://discord.com/channels/{guild_id}/{thread_id}/{existing['message_id']}",
+            }
+
         updated = False
         message = None
         if existing:
+            # 按记录的消息 ID 直接编辑（一次 PATCH），不先 fetch_message
             try:
-                message = await channel.fetch_message(existing["message_id"])
-                await message.edit(embed=embed, view=view)
+                message = await channel.get_partial_message(existing["message_id"]).edit(embed=embed, view=view)
                 updated = True
             except discord.NotFound:
                 message = None  # 旧消息已被删除，改为新发
             except discord.Forbidden:
-                return web.json_response({"ok": False, "error": "no permission to edit message"}, status=403)
+                self._verified.invalidate(key)
+                return 403, {"ok": False, "error": "no permission to edit message"}
             except Exception as e:
                 logger.warning(f"编辑书单消息失败，将尝试新发: {e}")
                 message = None
@@ -217,11 +436,15 @@ class BooklistPublishAPI:
             try:
                 message = await channel.send(embed=embed, view=view)
                 updated = False
+            except discord.NotFound:
+                self._verified.invalidate(key)
+                return 404, {"ok": False, "error": "thread not found"}
             except discord.Forbidden:
-                return web.json_response({"ok": False, "error": "no permission to send in thread"}, status=403)
+                self._verified.invalidate(key)
+                return 403, {"ok": False, "error": "no permission to send in thread"}
             except Exception as e:
                 logger.error(f"发送书单消息失败: {e}")
-                return web.json_response({"ok": False, "error": "send failed"}, status=502)
+                return 502, {"ok": False, "error": "send failed"}
 
         self.bot.db.upsert_webpage_published_booklist(
             webpage_booklist_id=booklist_id,
@@ -229,36 +452,130 @@ class BooklistPublishAPI:
             channel_id=thread_id,
             message_id=message.id,
             publisher_user_id=discord_user_id,
+            content_hash=content_hash,
         )
 
         logger.info(
             f"📖 网页书单发布{'（更新）' if updated else '（新发）'} | booklist={booklist_id} | "
             f"thread={thread_id} | publisher={discord_user_id} | message={message.id}"
         )
-        return web.json_response({
+        return 200, {
             "ok": True,
             "updated": updated,
             "message_id": str(message.id),
-            "message_url": message.jump_url,
-        })
+            "message_url": f"https://discord.com/channels/{guild_id}/{thread_id}/{message.id}",
+        }
+
+    async def handle_publish_batch(self, request: web.Request) -> web.Response:
+        if not self._check_auth(request):
+            return web.json_response({"ok": False, "error": "unauthorized"}, status=401)
+
+        try:
+            payload = await request.json()
+        except Exception:
+            return web.json_response({"ok": False, "error": "invalid json"}, status=400)
+
+        booklists = payload.get("booklists") if isinstance(payload, dict) else None
+        if not isinstance(booklists, list) or not booklists:
+            return web.json_response({"ok": False, "error": "booklists must be a non-empty list"}, status=400)
+        if len(booklists) > config.BOOKLIST_API_BATCH_MAX:
+            return web.json_response(
+                {"ok": False, "error": f"too many booklists (max {config.BOOKLIST_API_BATCH_MAX})"}, status=400,
+            )
+
+        with request_priority(PRIORITY_NORMAL):
+            results = await self.publish_batch(booklists)
+        published = sum(1 for result in results if result["status"] == 200)
+        logger.info(f"📚 网页书单批量发布 | 请求={len(booklists)} | 成功={published}")
+        return web.json_response({"ok": True, "published": published, "results": results})
+
+    async def publish_batch_from_cluster(self, payload: dict) -> dict:
+        """集群 IPC 转发来的批量发布（已在 0 号进程完成认证与拆分）。"""
+        with request_priority(PRIORITY_NORMAL):
+            return {"results": await self.publish_batch(payload["booklists"])}
+
+    async def publish_batch(self, booklists: list) -> list:
+        """批量发布：先逐项校验，再按负责进程与目标帖分组。
+
+        同一帖只解析一次元数据，帖内逐条发送以免同一限流桶并发争抢；
+        不同帖并发处理，整体并发受 BOOKLIST_API_BATCH_CONCURRENCY 限制。
+        返回与请求同序的 [{index, status, ...响应体}]。
+        """
+        results: list = [None] * len(booklists)
+        targets: Dict[int, _PublishTarget] = {}
+        for index, payload in enumerate(booklists):
+            target = _validate_publish(payload) if isinstance(payload, dict) else (400, {"ok": False, "error": "invalid item"})
+            if not isinstance(target, _PublishTarget):
+                results[index] = _batch_result(index, *target)
+            else:
+                targets[index] = target
+
+        # 不归本进程的帖子整组转发给负责的进程
+        remote: Dict[int, list] = {}
+        local: Dict[int, list] = {}
+        for index, target in targets.items():
+            owner = self.bot.cluster_for_guild(target.guild_id)
+            if owner is not None and owner != self.bot.cluster.cluster_id:
+                remote.setdefault(owner, []).append(index)
+            else:
+                local.setdefault(target.thread_id, []).append(index)
+
+        semaphore = asyncio.Semaphore(max(1, config.BOOKLIST_API_BATCH_CONCURRENCY))
+
+        async def run_thread(indexes: list):
+            async with semaphore:
+                resolved: Dict[int, object] = {}
+                for index in indexes:
+                    target = targets[index]
+                    # 单项出错只影响该项，不让整批请求失败、丢掉其他项已完成的结果
+                    try:
+                        channel = await self._check_thread(target, resolved)
+                        status, body = await self._publish_to_channel(target, booklists[index], channel)
+                    except _PublishRejected as e:
+                        status, body = e.status, e.body
+                    except Exception as e:
+                        logger.error(f"❌ 批量发布书单出错 | index={index} | booklist={target.booklist_id}: {e}")
+                        status, body = 500, {"ok": False, "error": "internal error"}
+                    results[index] = _batch_result(index, status, body)
+
+        async def run_remote(cluster_id: int, indexes: list):
+            try:
+                reply = await self.bot.cluster.request(
+                    cluster_id, "booklist_publish_batch",
+                    {"booklists": [booklists[index] for index in indexes]}, timeout=120.0,
+                )
+                for index, result in zip(indexes, reply["results"]):
+                    results[index] = {**result, "index": index}
+            except (ClusterError, asyncio.TimeoutError) as e:
+                logger.warning(f"转发书单批量发布到集群进程 {cluster_id} 失败: {e}")
+                for index in indexes:
+                    results[index] = _batch_result(index, 503, {"ok": False, "error": "cluster unavailable"})
+
+        await asyncio.gather(
+            *(run_thread(indexes) for indexes in local.values()),
+            *(run_remote(cluster_id, indexes) for cluster_id, indexes in remote.items()),
+        )
+        return results
+
+    async def _delete_published_message(self, channel_id: int, message_id: int,
+                                        guild_id: Optional[int] = None) -> str:
+        """删除一条已发布的书单 embed（bot 自己发的消息，可删），返回结果：
+        deleted 已删除 / missing 消息或频道已不在 / forbidden 无权限 / failed 其他失败。
 
-    async def _delete_published_message(self, channel_id: int, message_id: int) -> bool:
-        """删除一条已发布的书单 embed（bot 自己发的消息，可删）。返回是否已消失/删除成功。"""
+        按记录的频道与消息 ID 直接 DELETE（一次请求），不先取频道与消息。
+        """
+        channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id, guild_id=guild_id)
         try:
-            channel = self.bot.get_channel(channel_id)
-            if channel is None:
-                channel = await self.bot.fetch_channel(channel_id)
-            message = await channel.fetch_message(message_id)
-            await message.delete()
-            return True
+            await channel.get_partial_message(message_id).delete()
+            return UNPUBLISH_DELETED
         except discord.NotFound:
-            return True  # 消息或频道已不在，视为已删除
+            return UNPUBLISH_MISSING
+        except discord.Forbidden:
+            logger.warning(f"无权删除网页书单消息 channel={channel_id} message={message_id}")
+            return UNPUBLISH_FORBIDDEN
         except Exception as e:
             logger.warning(f"删除网页书单消息失败 channel={channel_id} message={message_id}: {e}")
-            return False
-        finally:
-            # on_raw_message_delete 也会停用；此处显式停用，幂等
-            self.bot.db.deactivate_webpage_published_booklist(message_id)
+            return UNPUBLISH_FAILED
 
     async def handle_unpublish(self, request: web.Request) -> web.Response:
         """删除网页书单在 Discord 的发布消息。
@@ -275,41 +592,71 @@ class BooklistPublishAPI:
         except Exception:
             return web.json_response({"ok": False, "error": "invalid json"}, status=400)
 
-        booklist_id_raw = payload.get("booklist_id")
-        if booklist_id_raw is None:
-            return web.json_response({"ok": False, "error": "missing required field: booklist_id"}, status=400)
-        try:
-            booklist_id = int(booklist_id_raw)
-        except (TypeError, ValueError):
-            return web.json_response({"ok": False, "error": "booklist_id must be an integer"}, status=400)
+        if _wants_async(request):
+            target = _validate_unpublish(payload)
+            if not isinstance(target, _UnpublishTarget):
+                return web.json_response(target[1], status=target[0])
+            return self._accept_job("unpublish", payload)
+
+        with request_priority(PRIORITY_NORMAL):
+            status, body = await self.unpublish(payload)
+        return web.json_response(body, status=status)
+
+    async def unpublish(self, payload: dict) -> Tuple[int, dict]:
+        """删除发布消息，返回 (HTTP 状态码, 响应 JSON)。"""
+        target = _validate_unpublish(payload)
+        if not isinstance(target, _UnpublishTarget):
+            return target
+        booklist_id = target.booklist_id
 
         if not self.bot.is_ready():
-            return web.json_response({"ok": False, "error": "bot not ready"}, status=503)
+            return 503, {"ok": False, "error": "bot not ready"}
 
-        thread_url = payload.get("thread_url")
         targets = []
-        if thread_url:
-            parsed = _parse_thread_url(thread_url)
-            if not parsed:
-                return web.json_response({"ok": False, "error": "invalid thread_url"}, status=400)
-            _, thread_id = parsed
-            rec = self.bot.db.get_webpage_published_booklist(booklist_id, thread_id)
+        if target.thread_id is not None:
+            rec = self.bot.db.get_webpage_published_booklist(booklist_id, target.thread_id)
             if rec:
-                targets.append({"message_id": rec["message_id"], "channel_id": rec["channel_id"]})
+                targets.append(rec)
         else:
             targets = self.bot.db.get_active_webpage_published_by_booklist(booklist_id)
 
-        deleted = 0
-        for t in targets:
-            if await self._delete_published_message(t["channel_id"], t["message_id"]):
-                deleted += 1
+        # 各帖的删除并发进行（同一帖的删除共用限流桶，由 REST 调度器排队）
+        semaphore = asyncio.Semaphore(max(1, config.BOOKLIST_API_UNPUBLISH_CONCURRENCY))
+
+        async def delete(t: dict) -> str:
+            async with semaphore:
+                return await self._delete_published_message(t["channel_id"], t["message_id"], t["guild_id"])
 
-        logger.info(f"🗑️ 网页书单撤除 | booklist={booklist_id} | 目标={len(targets)} | 已删={deleted}")
-        return web.json_response({"ok": True, "requested": len(targets), "deleted": deleted})
+        outcomes = await asyncio.gather(*(delete(t) for t in targets))
+
+        # 已删除或已不在的消息一次停用；无权限/失败的保留记录，重发撤除请求时会再次尝试
+        gone = [t["message_id"] for t, outcome in zip(targets, outcomes) if outcome in (UNPUBLISH_DELETED, UNPUBLISH_MISSING)]
+        self.bot.db.deactivate_webpage_published_booklists(gone)
+
+        logger.info(f"🗑️ 网页书单撤除 | booklist={booklist_id} | 目标={len(targets)} | 已删={len(gone)}")
+        return 200, {
+            "ok": True,
+            "requested": len(targets),
+            "deleted": len(gone),
+            "results": [
+                {"channel_id": str(t["channel_id"]), "message_id": str(t["message_id"]), "outcome": outcome}
+                for t, outcome in zip(targets, outcomes)
+            ],
+        }
+
+
+def register_cluster_handlers(bot):
+    """集群中每个进程都接收 0 号进程转发来的书单发布请求。"""
+    api = BooklistPublishAPI(bot)
+    bot.cluster.register("booklist_publish", api.publish_from_cluster)
+    bot.cluster.register("booklist_publish_batch", api.publish_batch_from_cluster)
 
 
 async def start_booklist_api(bot) -> Optional[web.AppRunner]:
     """在 bot 事件循环内启动书单发布 HTTP 站点。返回 runner（用于关闭），未启动则返回 None。"""
+    if config.CLUSTER_ID not in (None, 0):
+        # 集群中只有 0 号进程监听端口，其他进程经 IPC 接收转发
+        return None
     if not config.BOOKLIST_API_ENABLED:
         logger.info("📕 书单发布接口未启用（BOOKLIST_API_ENABLED=false），跳过启动。")
         return None
@@ -318,12 +665,28 @@ async def start_booklist_api(bot) -> Optional[web.AppRunner]:
         return None
 
     api = BooklistPublishAPI(bot)
+    # async 模式的发布/撤除任务：落库后由后台 worker 执行，重启后恢复未完成的任务
+    bot.booklist_jobs = BooklistJobQueue(
+        bot.db,
+        {"publish": api.publish, "unpublish": api.unpublish},
+        workers=config.BOOKLIST_API_JOB_WORKERS,
+        max_attempts=config.BOOKLIST_API_JOB_MAX_ATTEMPTS,
+        retry_base=config.BOOKLIST_API_JOB_RETRY_BASE,
+        retry_max=config.BOOKLIST_API_JOB_RETRY_MAX,
+        metrics=bot.metrics,
+        wait_ready=bot.wait_until_ready,
+    )
+    bot.booklist_jobs.start(retention_days=config.BOOKLIST_API_JOB_RETENTION_DAYS)
     app = web.Application()
     app.add_routes([
         web.post("/booklist/publish", api.handle_publish),
+        web.post("/booklist/publish/batch", api.handle_publish_batch),
         web.post("/booklist/unpublish", api.handle_unpublish),
+        web.get("/booklist/jobs/{job_id}", api.handle_job),
         web.get("/healthz", api.health),
     ])
+    if config.METRICS_ENABLED:
+        app.add_routes([metrics_route(bot)])
 
     runner = web.AppRunner(app)
     await runner.setup()
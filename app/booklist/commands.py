@@ -7,6 +7,7 @@ from discord.ext import commands
 import config
 from app.booklist.modals import AddToBooklistModal, PublicBooklistModal
 from app.booklist.views import GuildBooklistAdminView, ManageBooklistView, PublicBooklistPagerView
+from app.bot.request_scheduler import PRIORITY_BULK, PRIORITY_NORMAL, request_priority
 from app.utils.discord_channels import is_thread_channel as _is_thread_channel
 from app.utils.permissions import has_admin_permission
 
@@ -28,7 +29,7 @@ class BooklistCommands(commands.Cog):
         返回 True 表示已拦截（调用方应直接 return）。
         """
         guild_id = interaction.guild_id
-        if not guild_id or not self.db.is_booklist_webpage_takeover(guild_id):
+        if not guild_id or not self.bot.guild_settings.webpage_takeover(guild_id):
             return False
 
         await interaction.response.send_message(
@@ -38,39 +39,47 @@ class BooklistCommands(commands.Cog):
         )
         return True
 
-    async def cog_load(self):
-        """重启后校验公开书单索引；旧版带翻页按钮的消息继续恢复交互。"""
+    @commands.Cog.listener()
+    async def on_guilds_ready(self, shard_id: int):
+        """分片就绪后校验其服务器的公开书单索引；旧版带翻页按钮的消息继续恢复交互。
+
+        按分片进行，分片模式下不必等全部分片连上，也不阻塞 setup_hook。
+        """
         indexes = self.db.get_active_public_booklist_indexes()
-        for item in indexes:
-            message_id = item['message_id']
-            channel_id = item['channel_id']
-            publisher_user_id = item['publisher_user_id']
-            list_id = item['list_id']
-
-            channel = self.bot.get_channel(channel_id)
-            if channel is None:
+        # 逐条校验是后台工作，REST 请求让路给交互回应
+        with request_priority(PRIORITY_BULK):
+            for item in indexes:
+                if self.bot.shard_id_for(item['guild_id']) != shard_id:
+                    continue
+                message_id = item['message_id']
+                channel_id = item['channel_id']
+                publisher_user_id = item['publisher_user_id']
+                list_id = item['list_id']
+
+                channel = self.bot.get_channel(channel_id)
+                if channel is None:
+                    try:
+                        channel = await self.bot.fetch_channel(channel_id)
+                    except Exception:
+                        self.db.deactivate_public_booklist_index(message_id)
+                        continue
+
                 try:
-                    channel = await self.bot.fetch_channel(channel_id)
+                    message = await channel.fetch_message(message_id)
                 except Exception:
                     self.db.deactivate_public_booklist_index(message_id)
                     continue
 
-            try:
-                message = await channel.fetch_message(message_id)
-            except Exception:
-                self.db.deactivate_public_booklist_index(message_id)
-                continue
-
-            # 仅为旧版翻页消息恢复按钮；新版为静态多消息，不需要 View
-            if message.components:
-                view = PublicBooklistPagerView(
-                    self,
-                    publisher_user_id=publisher_user_id,
-                    list_id=list_id,
-                    intro="（书单介绍未保存快照，内容以当前书单为准）",
-                    current_page=1
-                )
-                self.bot.add_view(view, message_id=message_id)
+                # 仅为旧版翻页消息恢复按钮；新版为静态多消息，不需要 View
+                if message.components:
+                    view = PublicBooklistPagerView(
+                        self,
+                        publisher_user_id=publisher_user_id,
+                        list_id=list_id,
+                        intro="（书单介绍未保存快照，内容以当前书单为准）",
+                        current_page=1
+                    )
+                    self.bot.add_view(view, message_id=message_id)
 
     @booklist_group.command(name="添加至书单", description="将当前帖子添加到你的书单（仅自己可见）")
     async def add_to_booklist(self, interaction: discord.Interaction):
@@ -129,7 +138,7 @@ class BooklistCommands(commands.Cog):
             await interaction.response.send_message("❌ 只有帖主（楼主）可以为本帖设置守门。", ephemeral=True)
             return
 
-        whitelist_forum_id = self.db.get_booklist_thread_whitelist(interaction.guild_id)
+        whitelist_forum_id = self.bot.guild_settings.booklist_whitelist(interaction.guild_id)
         if whitelist_forum_id and channel.parent_id != whitelist_forum_id:
             await interaction.response.send_message("❌ 本帖不在书单帖白名单论坛内，无法设置守门。", ephemeral=True)
             return
@@ -152,7 +161,8 @@ class BooklistCommands(commands.Cog):
             bound_owner_id = self.db.get_booklist_thread_owner(message.guild.id, message.channel.id)
             if bound_owner_id and message.author.id != bound_owner_id:
                 try:
-                    await message.delete()
+                    with request_priority(PRIORITY_NORMAL):
+                        await message.delete()
                     logger.info(
                         f"🧹 已删除书单帖非楼主留言 | 用户: {message.author.name}({message.author.id}) | "
                         f"帖子: {message.channel.id} | 群组: {message.guild.id}"
@@ -184,10 +194,10 @@ class BooklistCommands(commands.Cog):
                 self.db.deactivate_public_booklist_index(message_id)
             except Exception as e:
                 logger.debug(f"清理公开书单索引失败(批量): {e}")
-            try:
-                self.db.deactivate_webpage_published_booklist(message_id)
-            except Exception as e:
-                logger.debug(f"清理网页书单发布记录失败(批量): {e}")
+        try:
+            self.db.deactivate_webpage_published_booklists(list(payload.message_ids))
+        except Exception as e:
+            logger.debug(f"清理网页书单发布记录失败(批量): {e}")
 
     @booklist_group.command(name="全服书单列表", description="查看全服书单概览并设置书单帖白名单（管理组）")
     async def guild_booklist_overview(self, interaction: discord.Interaction):
@@ -0,0 +1,194 @@
+"""书单发布接口的异步任务队列。
+
+async 模式下发布/撤除请求只做参数校验并落库，立即以 202 返回 job_id；后台固定数量的 worker
+逐个执行，Discord 侧失败（502）或 bot/集群进程暂不可用（503）时按指数退避重试。
+同一书单的任务按提交顺序串行：前一个任务（含退避重试）结束后才执行下一个，
+避免先提交的发布在之后的撤除完成后才重试成功、把已撤除的书单重新发出。
+任务存在 booklist_api_jobs 表中，重启后未完成的任务（含执行到一半的）重新执行——发布与撤除本身幂等。
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.bot.request_scheduler import PRIORITY_NORMAL, request_priority
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# 值得重试的结果：Discord 调用失败、bot 未就绪或集群进程不可用
+RETRYABLE_STATUSES = frozenset({502, 503})
+
+JobHandler = Callable[[dict], Awaitable[Tuple[int, dict]]]
+
+
+def _order_key(job_id: str, payload: dict) -> str:
+    """串行执行的分组键：同一 booklist_id 的任务一组（提交前已校验；无法解析时单独成组）。"""
+    try:
+        return f"booklist:{int(payload.get('booklist_id'))}"
+    except (TypeError, ValueError, AttributeError):
+        return f"job:{job_id}"
+
+
+class BooklistJobQueue:
+    def __init__(self, db, handlers: Dict[str, JobHandler], workers: int = 2, max_attempts: int = 5,
+                 retry_base: float = 5.0, retry_max: float = 300.0, metrics=None,
+                 wait_ready: Optional[Callable[[], Awaitable[None]]] = None):
+        self.db = db
+        self.handlers = handlers
+        self.workers = max(1, int(workers))
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.metrics = metrics
+        self.wait_ready = wait_ready
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # 分组键 → 按提交顺序排队的任务；只有队首会被调度执行
+        self._chains: Dict[str, Deque[str]] = {}
+        self._keys: Dict[str, str] = {}
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+
+    def start(self, retention_days: Optional[int] = None) -> int:
+        """载入未完成的任务并启动 worker，返回恢复的任务数。"""
+        if retention_days is not None:
+            self.db.delete_finished_booklist_api_jobs(retention_days)
+        jobs = self.db.get_unfinished_booklist_api_jobs()
+        for job in jobs:
+            self._enqueue(job['job_id'], job['payload'], job['retry_in'])
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if jobs:
+            logger.info(f"📮 已恢复 {len(jobs)} 个未完成的书单接口任务")
+        return len(jobs)
+
+    def submit(self, kind: str, payload: dict) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f'unknown job kind: {kind}')
+        job_id = uuid.uuid4().hex
+        self.db.create_booklist_api_job(job_id, kind, payload)
+        self._enqueue(job_id, payload)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.db.get_booklist_api_job(job_id)
+
+    def _enqueue(self, job_id: str, payload: dict, delay: float = 0.0):
+        key = self._keys[job_id] = _order_key(job_id, payload)
+        chain = self._chains.setdefault(key, deque())
+        chain.append(job_id)
+        if len(chain) == 1:
+            self._schedule(job_id, delay)
+
+    def _finish(self, job_id: str):
+        """任务结束（完成、失败或已不存在），调度同组的下一个任务。"""
+        key = self._keys.pop(job_id, None)
+        chain = self._chains.get(key)
+        if not chain:
+            return
+        chain.remove(job_id)
+        if chain:
+            self._schedule(chain[0], 0)
+        else:
+            del self._chains[key]
+
+    def _schedule(self, job_id: str, delay: float):
+        if delay <= 0:
+            self._queue.put_nowait(job_id)
+            return
+
+        def due():
+            self._timers.pop(job_id, None)
+            self._queue.put_nowait(job_id)
+
+        self._timers[job_id] = asyncio.get_running_loop().call_later(delay, due)
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 多为数据库异常：保持队首位置，稍后再试，不让同组后续任务越过它
+                logger.error(f"❌ 书单接口任务 {job_id} 处理异常: {e}")
+                self._schedule(job_id, self.retry_max)
+
+    async def _run(self, job_id: str):
+        job = self.db.get_booklist_api_job(job_id)
+        if job is None or job['status'] not in (JOB_PENDING, JOB_RUNNING):
+            self._finish(job_id)
+            return
+        if self.wait_ready is not None:
+            await self.wait_ready()
+
+        attempts = job['attempts'] + 1
+        self.db.update_booklist_api_job(job_id, JOB_RUNNING, attempts)
+        retryable = False
+        try:
+            with request_priority(PRIORITY_NORMAL):
+                status, body = await self.handlers[job['kind']](job['payload'])
+            retryable = status in RETRYABLE_STATUSES
+        except asyncio.CancelledError:
+            # 关闭时中断：保持 running，下次启动重新执行
+            raise
+        except Exception as e:
+            logger.warning(f"书单接口任务 {job_id} 执行失败: {e}")
+            status, body = 500, {"ok": False, "error": "internal error"}
+            retryable = True
+
+        if retryable and attempts < self.max_attempts:
+            delay = self.backoff(attempts)
+            self.db.update_booklist_api_job(
+                job_id, JOB_PENDING, attempts, retry_in=delay,
+                result_status=status, result=body,
+            )
+            self.retries += 1
+            self._count(job['kind'], 'retry')
+            self._schedule(job_id, delay)
+            return
+
+        outcome = JOB_DONE if status < 400 else JOB_FAILED
+        self.db.update_booklist_api_job(job_id, outcome, attempts, result_status=status, result=body)
+        if outcome == JOB_DONE:
+            self.completed += 1
+        else:
+            self.failed += 1
+            logger.warning(f"⚠️ 书单接口任务失败 | job={job_id} | kind={job['kind']} | 尝试={attempts} | status={status}")
+        self._count(job['kind'], outcome)
+        self._finish(job_id)
+
+    def _count(self, kind: str, outcome: str):
+        if self.metrics is not None:
+            self.metrics.inc('bot_booklist_jobs_total', kind=kind, outcome=outcome)
+
+    async def close(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            'queued': self._queue.qsize(),
+            'waiting_retry': len(self._timers),
+            'waiting_order': sum(len(chain) - 1 for chain in self._chains.values()),
+            'workers': self.workers,
+            'completed': self.completed,
+            'failed': self.failed,
+            'retries': self.retries,
+        }
@@ -2,6 +2,7 @@ import discord
 
 from app.booklist.constants import PUBLIC_BOOKLIST_PAGE_SIZE
 from app.booklist.formatting import _build_book_entry_block
+from app.bot.auto_defer import auto_defer, defer, respond
 from app.utils.discord_links import (
     is_valid_discord_url as _is_valid_discord_url,
     parse_discord_url as _parse_discord_url,
@@ -39,6 +40,7 @@ class AddToBooklistModal(discord.ui.Modal, title="添加至书单"):
 
         review = (self.review_input.value or "").strip()
         thread_url = f"https://discord.com/channels/{interaction.guild_id}/{self.thread.id}"
+        self.cog.bot.thread_metadata.remember(self.thread)
 
         success, message = self.cog.db.add_post_to_booklist(
             user_id=interaction.user.id,
@@ -229,24 +231,23 @@ class LinkBooklistThreadModal(discord.ui.Modal, title="连结书单帖"):
                 await interaction.response.send_message("❌ 该服务器未接入本 Bot，无法绑定。", ephemeral=True)
                 return
 
-            channel = self.view.cog.bot.get_channel(thread_id)
-            if channel is None:
-                try:
-                    channel = await self.view.cog.bot.fetch_channel(thread_id)
-                except Exception:
-                    await interaction.response.send_message("❌ 无法读取该帖子，请检查 URL 是否正确。", ephemeral=True)
-                    return
+            # gateway 缓存未命中时以 fetch_channel 确认楼主与父论坛，不信任可能已过时的数据库记录
+            try:
+                thread_meta = await self.view.cog.bot.thread_metadata.resolve(thread_id)
+            except Exception:
+                await interaction.response.send_message("❌ 无法读取该帖子，请检查 URL 是否正确。", ephemeral=True)
+                return
 
-            if not isinstance(channel, discord.Thread):
+            if thread_meta is None:
                 await interaction.response.send_message("❌ 该链接不是帖子链接，请绑定论坛帖 URL。", ephemeral=True)
                 return
 
-            if channel.owner_id != interaction.user.id:
+            if thread_meta['owner_id'] != interaction.user.id:
                 await interaction.response.send_message("❌ 只能绑定你自己作为楼主的帖子。", ephemeral=True)
                 return
 
-            whitelist_forum_id = self.view.cog.db.get_booklist_thread_whitelist(interaction.guild_id)
-            if whitelist_forum_id and channel.parent_id != whitelist_forum_id:
+            whitelist_forum_id = self.view.cog.bot.guild_settings.booklist_whitelist(interaction.guild_id)
+            if whitelist_forum_id and thread_meta['parent_id'] != whitelist_forum_id:
                 await interaction.response.send_message("❌ 该帖子不在白名单论坛内，无法绑定。", ephemeral=True)
                 return
 
@@ -303,15 +304,13 @@ class AddPostByUrlModal(discord.ui.Modal, title="添加至书单（URL）"):
             await interaction.response.send_message("❌ 该服务器未接入本 Bot，无法添加。", ephemeral=True)
             return
 
-        channel = self.view.cog.bot.get_channel(thread_id)
-        if channel is None:
-            try:
-                channel = await self.view.cog.bot.fetch_channel(thread_id)
-            except Exception:
-                await interaction.response.send_message("❌ 无法读取该帖子，请检查 URL 是否正确。", ephemeral=True)
-                return
+        try:
+            thread_meta = await self.view.cog.bot.thread_metadata.resolve(thread_id)
+        except Exception:
+            await interaction.response.send_message("❌ 无法读取该帖子，请检查 URL 是否正确。", ephemeral=True)
+            return
 
-        if not isinstance(channel, discord.Thread):
+        if thread_meta is None:
             await interaction.response.send_message("❌ 该 URL 不是帖子链接，请提供论坛帖 URL。", ephemeral=True)
             return
 
@@ -321,7 +320,7 @@ class AddPostByUrlModal(discord.ui.Modal, title="添加至书单（URL）"):
             list_id=list_id,
             thread_guild_id=guild_id,
             thread_id=thread_id,
-            thread_title=channel.name or f"帖子 {thread_id}",
+            thread_title=thread_meta['title'],
             thread_url=f"https://discord.com/channels/{guild_id}/{thread_id}",
             review=review,
         )
@@ -330,7 +329,7 @@ class AddPostByUrlModal(discord.ui.Modal, title="添加至书单（URL）"):
             return
 
         self.view.current_list_id = list_id
-        embed = self.view.build_embed(extra_notice=f"✅ 已添加帖子：{channel.name}")
+        embed = self.view.build_embed(extra_notice=f"✅ 已添加帖子：{thread_meta['title']}")
         await interaction.response.edit_message(embed=embed, view=self.view)
 
 
@@ -356,24 +355,26 @@ class PublicBooklistModal(discord.ui.Modal, title="公开书单"):
         self.add_item(self.list_id_input)
         self.add_item(self.intro_input)
 
+    @auto_defer()
     async def on_submit(self, interaction: discord.Interaction):
         list_id = _safe_int(self.list_id_input.value)
         intro = (self.intro_input.value or "").strip()
 
         if list_id is None or not (0 <= list_id <= 9):
-            await interaction.response.send_message("❌ 书单 ID 必须是 0~9。", ephemeral=True)
+            await respond(interaction, "❌ 书单 ID 必须是 0~9。", ephemeral=True)
             return
 
         if len(intro) < 50:
-            await interaction.response.send_message("❌ 书单介绍至少 50 字。", ephemeral=True)
+            await respond(interaction, "❌ 书单介绍至少 50 字。", ephemeral=True)
             return
 
         data = self.cog.db.get_user_booklist(interaction.user.id, list_id)
         if data['post_count'] < 5:
-            await interaction.response.send_message("❌ 该书单至少要有 5 帖才能公开。", ephemeral=True)
+            await respond(interaction, "❌ 该书单至少要有 5 帖才能公开。", ephemeral=True)
             return
 
-        await interaction.response.defer(ephemeral=True, thinking=True)
+        # 接下来逐组发送消息，确定耗时，直接 defer
+        await defer(interaction)
         entries = data['entries']
         total_entries = len(entries)
         total_chunks = max(1, (total_entries + PUBLIC_BOOKLIST_PAGE_SIZE - 1) // PUBLIC_BOOKLIST_PAGE_SIZE)
@@ -424,7 +425,8 @@ class PublicBooklistModal(discord.ui.Modal, title="公开书单"):
                 channel_id=interaction.channel_id
             )
 
-        await interaction.followup.send(
+        await respond(
+            interaction,
             f"✅ 书单已公开，共发送 {len(published_messages)} 则。\n首则连结：{published_messages[0].jump_url}",
             ephemeral=True,
         )
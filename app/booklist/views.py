@@ -17,6 +17,7 @@ from app.booklist.modals import (
     MoveEntryModal,
     RenameBooklistModal,
 )
+from app.bot.render_cache import VIEW_BOOKLIST_ADMIN, RenderCache
 
 logger = logging.getLogger(__name__)
 
@@ -256,12 +257,33 @@ class GuildBooklistAdminView(discord.ui.View):
         return True
 
     def build_embed(self) -> tuple[discord.Embed, int]:
-        rows, total_pages = self.cog.db.get_guild_booklist_summary(self.guild_id, self.page, self.per_page)
-        whitelist_forum_id = self.cog.db.get_booklist_thread_whitelist(self.guild_id)
+        """优先使用渲染缓存；白名单/接管/书单变化时由数据库写入事件失效。"""
+        render_cache = self.cog.bot.render_cache
+        key = RenderCache.make_key(VIEW_BOOKLIST_ADMIN, (self.guild_id,), self.page)
+        cached = render_cache.get(key)
+        if cached is None:
+            embed, total_pages, takeover = self._render_page(self.page)
+            render_cache.set(key, embed, total_pages, takeover)
+        else:
+            embed, total_pages, takeover = cached
+
+        if takeover:
+            self.toggle_webpage_takeover.label = "关闭网页接管"
+            self.toggle_webpage_takeover.style = discord.ButtonStyle.success
+        else:
+            self.toggle_webpage_takeover.label = "开启网页接管"
+            self.toggle_webpage_takeover.style = discord.ButtonStyle.danger
+        self.prev_page.disabled = self.page <= 1
+        self.next_page.disabled = self.page >= total_pages
+        return embed, total_pages
+
+    def _render_page(self, page: int) -> tuple[discord.Embed, int, bool]:
+        rows, total_pages = self.cog.db.get_guild_booklist_summary(self.guild_id, page, self.per_page)
+        whitelist_forum_id = self.cog.bot.guild_settings.booklist_whitelist(self.guild_id)
 
         embed = discord.Embed(
             title="📚 全服书单列表",
-            description=f"本服有书单内容的用户（第 {self.page}/{total_pages} 页）",
+            description=f"本服有书单内容的用户（第 {page}/{total_pages} 页）",
             color=discord.Color.green(),
             timestamp=discord.utils.utcnow(),
         )
@@ -278,23 +300,19 @@ class GuildBooklistAdminView(discord.ui.View):
                 inline=False
             )
 
-        takeover = self.cog.db.is_booklist_webpage_takeover(self.guild_id)
+        takeover = self.cog.bot.guild_settings.webpage_takeover(self.guild_id)
         if takeover:
             embed.add_field(
                 name="🌐 网页接管",
                 value="已开启：bot 端书单指令已让位，用户将被引导前往网页版。",
                 inline=False
             )
-            self.toggle_webpage_takeover.label = "关闭网页接管"
-            self.toggle_webpage_takeover.style = discord.ButtonStyle.success
         else:
             embed.add_field(
                 name="🌐 网页接管",
                 value="未开启：bot 端书单指令正常工作。",
                 inline=False
             )
-            self.toggle_webpage_takeover.label = "开启网页接管"
-            self.toggle_webpage_takeover.style = discord.ButtonStyle.danger
 
         if rows:
             lines = []
@@ -308,9 +326,7 @@ class GuildBooklistAdminView(discord.ui.View):
         else:
             embed.add_field(name="用户概览", value="暂无用户创建书单内容。", inline=False)
 
-        self.prev_page.disabled = self.page <= 1
-        self.next_page.disabled = self.page >= total_pages
-        return embed, total_pages
+        return embed, total_pages, takeover
 
     @discord.ui.button(label="上一页", style=discord.ButtonStyle.secondary, emoji="◀️")
     async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -355,7 +371,7 @@ class GuildBooklistAdminView(discord.ui.View):
 
     @discord.ui.button(label="开启网页接管", style=discord.ButtonStyle.danger, emoji="🌐", row=2)
     async def toggle_webpage_takeover(self, interaction: discord.Interaction, button: discord.ui.Button):
-        current = self.cog.db.is_booklist_webpage_takeover(self.guild_id)
+        current = self.cog.bot.guild_settings.webpage_takeover(self.guild_id)
         self.cog.db.set_booklist_webpage_takeover(self.guild_id, not current)
         embed, _ = self.build_embed()
         embed.add_field(
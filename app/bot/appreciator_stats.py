@@ -0,0 +1,84 @@
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AppreciatorStats:
+    """鉴赏家申请条件的预计算数据：各用户被精选次数、引荐人数与是否绑定书单帖。
+
+    每个统计范围（某服务器，或跨服时为 None）首次使用时用一次 GROUP BY 汇总全部用户；
+    之后精选写入只把涉及的用户标记为待重算，书单帖绑定变化同理。申请按钮点击时通常只是字典读取。
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._scopes: Dict[Optional[int], Dict[int, Tuple[int, int]]] = {}
+        self._dirty: Dict[Optional[int], Set[int]] = {}
+        self._linked: Optional[Set[int]] = None
+        self._linked_dirty: Set[int] = set()
+        self.loads = 0
+        self.recomputes = 0
+
+    def _scope(self, scope: Optional[int]) -> Dict[int, Tuple[int, int]]:
+        stats = self._scopes.get(scope)
+        if stats is None:
+            stats = self._scopes[scope] = self.db.get_appreciator_stats(scope)
+            self._dirty[scope] = set()
+            self.loads += 1
+            logger.info(f"📜 已汇总鉴赏家申请统计（{'跨服' if scope is None else f'服务器 {scope}'}）：{len(stats)} 位用户")
+        return stats
+
+    def _is_linked(self, user_id: int) -> bool:
+        if self._linked is None:
+            self._linked = self.db.get_booklist_linked_user_ids()
+            self._linked_dirty.clear()
+        if user_id in self._linked_dirty:
+            self._linked_dirty.discard(user_id)
+            if self.db.get_user_booklist_thread_url(user_id):
+                self._linked.add(user_id)
+            else:
+                self._linked.discard(user_id)
+        return user_id in self._linked
+
+    def get(self, user_id: int, guild_id: int, include_all_guilds: bool = False) -> dict:
+        """返回 {'featured_count', 'featuring_count', 'booklist_linked'}，口径同 get_user_stats。"""
+        scope = None if include_all_guilds else guild_id
+        stats = self._scope(scope)
+        dirty = self._dirty[scope]
+        if user_id in dirty:
+            dirty.discard(user_id)
+            fresh = self.db.get_user_stats(user_id, guild_id, include_all_guilds=include_all_guilds)
+            stats[user_id] = (fresh['featured_count'], fresh['featuring_count'])
+            self.recomputes += 1
+        featured_count, featuring_count = stats.get(user_id, (0, 0))
+        return {
+            'featured_count': featured_count,
+            'featuring_count': featuring_count,
+            'booklist_linked': self._is_linked(user_id),
+        }
+
+    def on_db_write(self, event: str, payload: Dict):
+        if event in ('featured_added', 'featured_removed'):
+            users = (payload['author_id'], payload['featured_by_id'])
+            for scope, dirty in self._dirty.items():
+                if scope is None or scope == payload['guild_id']:
+                    dirty.update(users)
+        elif event == 'booklist_link' and self._linked is not None:
+            if payload.get('user_id') is None:
+                # 整服清除绑定：下次使用时重新载入
+                self._linked = None
+            else:
+                self._linked_dirty.add(payload['user_id'])
+        elif event == 'resync':
+            self._scopes.clear()
+            self._dirty.clear()
+            self._linked = None
+
+    def stats(self) -> dict:
+        return {
+            'scopes': len(self._scopes),
+            'users': sum(len(stats) for stats in self._scopes.values()),
+            'loads': self.loads,
+            'recomputes': self.recomputes,
+        }
@@ -0,0 +1,141 @@
+"""慢交互处理的自动 defer。
+
+@auto_defer 包装交互处理函数（斜杠指令、表单提交、按钮回调），按处理器记录最近的耗时：
+- 预计耗时（近期样本的高分位）加上已过去的派发延迟超过 AUTO_DEFER_THRESHOLD 时，进入处理前先 defer；
+- 否则在交互创建后 AUTO_DEFER_DEADLINE 秒仍未回应时由定时器 defer，兜住首次调用与偶发慢请求。
+
+被包装的处理器统一用 respond() 回应：尚未回应时发送首个回应，已 defer 时改发 followup；
+与定时器之间用每个交互一把锁串行，不会出现重复回应。
+"""
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+import discord
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class HandlerLatency:
+    """各处理器最近 window 次的耗时；expected() 取其中的 quantile 分位。"""
+
+    def __init__(self, window: int = 20, quantile: float = 0.8):
+        self.window = max(1, int(window))
+        self.quantile = quantile
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, name: str, seconds: float):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def expected(self, name: str) -> Optional[float]:
+        samples = self._samples.get(name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+
+    def stats(self) -> dict:
+        return {
+            name: {'samples': len(samples), 'expected': round(self.expected(name), 4)}
+            for name, samples in self._samples.items()
+        }
+
+
+class _DeferState:
+    __slots__ = ('handler', 'ephemeral', 'lock', 'tasks')
+
+    def __init__(self, handler: str, ephemeral: bool):
+        self.handler = handler
+        self.ephemeral = ephemeral
+        self.lock = asyncio.Lock()
+        self.tasks: Set[asyncio.Task] = set()
+
+
+# 进行中的被包装交互：interaction.id → 状态（discord.Interaction 使用 __slots__，无法挂属性）
+_states: Dict[int, _DeferState] = {}
+
+
+async def _defer(interaction: discord.Interaction, state: _DeferState, reason: str):
+    async with state.lock:
+        if interaction.response.is_done():
+            return
+        try:
+            await interaction.response.defer(ephemeral=state.ephemeral, thinking=True)
+        except (discord.InteractionResponded, discord.HTTPException) as e:
+            logger.debug(f"自动 defer 失败 handler={state.handler}: {e}")
+            return
+    metrics = getattr(interaction.client, 'metrics', None)
+    if metrics is not None:
+        metrics.inc('bot_auto_defer_total', handler=state.handler, reason=reason)
+
+
+async def _send(interaction: discord.Interaction, content, kwargs):
+    if interaction.response.is_done():
+        return await interaction.followup.send(content, **kwargs)
+    return await interaction.response.send_message(content, **kwargs)
+
+
+async def respond(interaction: discord.Interaction, content: Optional[str] = None, **kwargs):
+    """发送回应：尚未回应时为首个回应，已 defer/已回应时为 followup。参数同 send_message。"""
+    state = _states.get(interaction.id)
+    if state is None:
+        return await _send(interaction, content, kwargs)
+    async with state.lock:
+        return await _send(interaction, content, kwargs)
+
+
+async def defer(interaction: discord.Interaction, ephemeral: bool = True):
+    """确定接下来要做耗时工作时显式 defer；已回应时不做任何事。"""
+    state = _states.get(interaction.id) or _DeferState('unwrapped', ephemeral)
+    await _defer(interaction, state, 'explicit')
+
+
+def auto_defer(ephemeral: bool = True, name: Optional[str] = None):
+    """包装交互处理函数；ephemeral 为自动 defer 时「思考中」与后续回应是否仅自己可见。"""
+
+    def decorator(func):
+        handler = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None)
+            if interaction is None:
+                return await func(*args, **kwargs)
+
+            history: Optional[HandlerLatency] = getattr(interaction.client, 'handler_latency', None)
+            state = _states[interaction.id] = _DeferState(handler, ephemeral)
+            elapsed = max(0.0, (discord.utils.utcnow() - interaction.created_at).total_seconds())
+            expected = history.expected(handler) if history is not None else None
+
+            timer = None
+            if expected is not None and elapsed + expected > config.AUTO_DEFER_THRESHOLD:
+                await _defer(interaction, state, 'history')
+            else:
+                def fire():
+                    task = asyncio.create_task(_defer(interaction, state, 'deadline'))
+                    state.tasks.add(task)
+                    task.add_done_callback(state.tasks.discard)
+
+                timer = asyncio.get_running_loop().call_later(max(0.0, config.AUTO_DEFER_DEADLINE - elapsed), fire)
+
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                _states.pop(interaction.id, None)
+                if history is not None:
+                    history.record(handler, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,63 @@
+import logging
+import os
+from typing import Dict, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# 档案 → (成员缓存, 启动时分块拉取成员, 消息缓存条数)
+# full：discord.py 默认行为；balanced：只缓存运行期间新加入的成员；minimal：不缓存成员与消息。
+# bot 的功能都不依赖成员/消息缓存（权限判断用交互自带的 Member，删除监听用 raw 事件）。
+CACHE_PROFILES = {
+    'full': {'members': 'all', 'chunk_guilds_at_startup': True, 'max_messages': 1000},
+    'balanced': {'members': 'joined', 'chunk_guilds_at_startup': False, 'max_messages': 200},
+    'minimal': {'members': 'none', 'chunk_guilds_at_startup': False, 'max_messages': None},
+}
+DEFAULT_CACHE_PROFILE = 'full'
+
+
+def resolve_cache_profile(name: str) -> str:
+    if name in CACHE_PROFILES:
+        return name
+    logger.warning(f"⚠️ 未知的 CACHE_PROFILE={name!r}，改用 {DEFAULT_CACHE_PROFILE}")
+    return DEFAULT_CACHE_PROFILE
+
+
+def cache_options(name: str, intents: discord.Intents) -> Dict:
+    """转换为 commands.Bot 的构造参数。"""
+    profile = CACHE_PROFILES[resolve_cache_profile(name)]
+    if profile['members'] == 'all':
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+    elif profile['members'] == 'joined':
+        member_cache_flags = discord.MemberCacheFlags.none()
+        member_cache_flags.joined = intents.members
+    else:
+        member_cache_flags = discord.MemberCacheFlags.none()
+    return {
+        'member_cache_flags': member_cache_flags,
+        'chunk_guilds_at_startup': profile['chunk_guilds_at_startup'] and intents.members,
+        'max_messages': profile['max_messages'],
+    }
+
+
+def process_rss_bytes() -> Optional[int]:
+    """当前常驻内存（Linux 读 /proc/self/statm，其他平台返回 None）。"""
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def cache_memory_report(bot) -> Dict:
+    """当前档案下 discord.py 缓存的规模与进程内存，用于比较各档案的占用。"""
+    return {
+        'profile': bot.cache_profile,
+        'rss_bytes': process_rss_bytes(),
+        'guilds': len(bot.guilds),
+        'members_cached': sum(len(guild.members) for guild in bot.guilds),
+        'users_cached': len(bot.users),
+        'messages_cached': len(bot.cached_messages),
+    }
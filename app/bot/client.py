@@ -1,73 +1,363 @@
+import asyncio
 import logging
+import math
+import time
 from datetime import datetime
+from typing import Dict, Optional, Set
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import config
+from app.bot.appreciator_stats import AppreciatorStats
+from app.bot.auto_defer import HandlerLatency
+from app.bot.cache_profile import cache_memory_report, cache_options, resolve_cache_profile
+from app.bot.command_sync import sync_command_tree
+from app.bot.featured_index import FeaturedKeyIndex
+from app.bot.guild_settings import GuildSettingsCache
+from app.bot.metrics import (
+    RateLimitCounter,
+    create_bot_metrics,
+    instrument_methods,
+    monitor_event_loop_lag,
+    start_metrics_server,
+)
+from app.bot.prefetch import PagePrefetcher
+from app.bot.reaction_cache import ReactionCountCache
+from app.bot.render_cache import VIEW_THREAD_STATS, RenderCache
+from app.bot.request_scheduler import RequestScheduler, current_priority, route_bucket
+from app.bot.role_cache import RoleNameCache
+from app.bot.thread_metadata import ThreadMetadataStore
+from app.cluster import ClusterClient, cluster_for_shard
 from database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
 
+# 指标中按 custom_id 区分的组件：只有持久化 View 的 custom_id 固定不变；
+# 其余 View 每次生成随机 custom_id，一律记为 other，避免指标序列无限增长
+METRIC_CUSTOM_IDS = frozenset({
+    'booklist_public:prev:v1',
+    'booklist_public:next:v1',
+    'appreciator:apply:v1',
+})
+
+
+def metric_target(custom_id: Optional[str]) -> str:
+    return custom_id if custom_id in METRIC_CUSTOM_IDS else 'other'
+
+
+def _latency_or_none(latency: float) -> Optional[float]:
+    """心跳延迟在首次心跳前为 inf/nan，JSON 中以 null 表示。"""
+    return latency if math.isfinite(latency) else None
+
+
 class FeaturedMessageBot(commands.Bot):
-    def __init__(self):
+    def __init__(self, **options):
         intents = discord.Intents.default()
         intents.message_content = True
         intents.guilds = True
         intents.members = True
 
+        # 成员/消息缓存按 CACHE_PROFILE 控制，小内存容器可用 balanced/minimal
+        self.cache_profile = resolve_cache_profile(config.CACHE_PROFILE)
         super().__init__(
             command_prefix='!',
             intents=intents,
             help_command=None,
+            **cache_options(self.cache_profile, intents),
+            **options,
         )
 
         self.db = DatabaseManager(config.DATABASE_FILE)
         self.booklist_api_runner = None
+        # 书单发布接口 async 模式的任务队列（接口启动时创建）
+        self.booklist_jobs = None
+        # 进程内指标（/metrics），数据库方法逐个计时
+        self.metrics = create_bot_metrics(self)
+        instrument_methods(self.db, self.metrics, 'bot_db_method_seconds')
+        self.metrics_runner = None
+        self._loop_lag_task = None
+        # 各交互处理器的近期耗时，@auto_defer 据此决定是否提前 defer
+        self.handler_latency = HandlerLatency(window=config.AUTO_DEFER_HISTORY)
+        # 出站 REST 请求按优先级调度，后台工作不挤占交互回应的限流额度
+        self.request_scheduler = RequestScheduler(
+            background_per_bucket=config.REST_BACKGROUND_PER_BUCKET,
+            max_background=config.REST_BACKGROUND_MAX_CONCURRENCY,
+            metrics=self.metrics,
+        )
+        # 全 bot 共享的表情数量缓存（各统计视图共用）
+        self.reaction_cache = ReactionCountCache(
+            self,
+            maxsize=config.REACTION_CACHE_MAX_ENTRIES,
+            ttl=config.REACTION_CACHE_DURATION,
+        )
+        # 帖子元数据（标题/父论坛/楼主/归档），归档帖也能显示标题
+        self.thread_metadata = ThreadMetadataStore(self, maxsize=config.THREAD_METADATA_CACHE_MAX_ENTRIES)
+        # 翻页 View 已渲染 embed 缓存，由数据库写入事件失效
+        self.render_cache = RenderCache(maxsize=config.RENDER_CACHE_MAX_ENTRIES, ttl=config.RENDER_CACHE_TTL)
+        # 已精选 (thread_id, message_id) 内存索引，重复精选检查免查库
+        self.featured_index = FeaturedKeyIndex(self.db)
+        self.featured_index.load()
+        # 每服小型设置（欢迎频道/网页接管/书单白名单），写入时直接更新
+        self.guild_settings = GuildSettingsCache(self.db)
+        self.guild_settings.load()
+        # 鉴赏家申请：按名称查身份组的索引与预汇总的申请条件统计
+        self.role_cache = RoleNameCache()
+        self.appreciator_stats = AppreciatorStats(self.db)
+        self._event_loop = None
+        self.db.add_write_listener(self._on_db_write)
+        # 已就绪的分片（未分片时记为 0）；每个分片首次就绪时派发 guilds_ready 事件做启动工作
+        self.ready_shards: Set[int] = set()
+        self._started_shards: Set[int] = set()
+        self._first_ready = asyncio.Event()
+        # 多进程集群：经本机 IPC 与其他进程互相广播数据库写入事件、转发跨分片操作
+        self.cluster = None
+        self._applying_remote_write = False
+        if config.CLUSTER_ID is not None:
+            self.cluster = ClusterClient(
+                config.CLUSTER_ID, config.CLUSTER_IPC_HOST, config.CLUSTER_IPC_PORT,
+                shard_ids=config.CLUSTER_SHARD_IDS,
+            )
+            self.cluster.on_broadcast = self._on_cluster_broadcast
+            self.cluster.on_reconnect = self._on_cluster_reconnected
+        self.page_prefetcher = PagePrefetcher(
+            self.render_cache,
+            max_concurrency=config.PAGE_PREFETCH_MAX_CONCURRENCY,
+            enabled=config.PAGE_PREFETCH_ENABLED,
+        )
 
     async def setup_hook(self):
         """机器人启动时的设置"""
+        self._event_loop = asyncio.get_running_loop()
         from app.booklist import BooklistCommands
-        from app.booklist.api import start_booklist_api
+        from app.booklist.api import register_cluster_handlers, start_booklist_api
         from app.features.featured_system import AppreciatorApplicationView, FeaturedCommands
+        from app.features.reaction_ranking import ReactionRankingJob
         from app.features.welcome import WelcomeCommands
 
+        if self.cluster is not None:
+            register_cluster_handlers(self)
+            self.cluster.start()
         self.add_view(AppreciatorApplicationView(self))
         await self.add_cog(FeaturedCommands(self))
         await self.add_cog(BooklistCommands(self))
         await self.add_cog(WelcomeCommands(self))
-        await self.tree.sync()
+        await self.add_cog(ReactionRankingJob(self))
+        # 指令树哈希未变化时跳过全局同步（慢且限流严格）；集群中只由 0 号进程同步
+        if config.CLUSTER_ID in (None, 0):
+            await sync_command_tree(self)
+        self._instrument_discord()
         # 启动书单发布 HTTP 接口（按配置；未启用或未配置密钥时自动跳过）
         try:
             self.booklist_api_runner = await start_booklist_api(self)
         except Exception as e:
             logger.error(f"❌ 书单发布接口启动失败: {e}")
+        # /metrics 随书单发布接口提供；接口未运行时单独监听 METRICS_PORT
+        try:
+            self.metrics_runner = await start_metrics_server(self)
+        except Exception as e:
+            logger.error(f"❌ 指标接口启动失败: {e}")
         logger.info('🤖 机器人设置完成，正在连接...')
 
+    def _instrument_discord(self):
+        """REST 请求优先级调度与计数/计时、429 限流计数与事件循环延迟监测。"""
+        request = self.http.request
+        metrics = self.metrics
+        scheduler = self.request_scheduler
+
+        async def timed_request(route, **kwargs):
+            bucket = route_bucket(route)
+            priority = current_priority()
+            await scheduler.acquire(bucket, priority)
+            started = time.perf_counter()
+            status = 'ok'
+            try:
+                return await request(route, **kwargs)
+            except discord.HTTPException as e:
+                status = str(e.status)
+                raise
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                metrics.inc('discord_rest_requests_total', method=route.method, route=route.path, status=status)
+                metrics.observe('discord_rest_request_seconds', time.perf_counter() - started, method=route.method, route=route.path)
+                scheduler.release(bucket, priority)
+
+        self.http.request = timed_request
+
+        rate_limit_counter = RateLimitCounter(metrics, 'discord_rate_limit_hits_total')
+        for name in ('discord.http', 'discord.webhook.async_'):
+            logging.getLogger(name).addHandler(rate_limit_counter)
+
+        self._loop_lag_task = asyncio.create_task(monitor_event_loop_lag(metrics, 'bot_event_loop_lag_seconds'))
+
     async def close(self):
-        """关闭时清理书单发布 HTTP 站点。"""
-        if self.booklist_api_runner is not None:
+        """关闭时清理书单发布与指标 HTTP 站点。"""
+        if self.booklist_jobs is not None:
+            await self.booklist_jobs.close()
+        for runner in (self.booklist_api_runner, self.metrics_runner):
+            if runner is None:
+                continue
             try:
-                await self.booklist_api_runner.cleanup()
+                await runner.cleanup()
             except Exception as e:
-                logger.debug(f"清理书单发布接口失败: {e}")
+                logger.debug(f"清理 HTTP 站点失败: {e}")
+        if self._loop_lag_task is not None:
+            self._loop_lag_task.cancel()
+        if self.cluster is not None:
+            await self.cluster.close()
         await super().close()
 
+    def shard_id_for(self, guild_id: int) -> int:
+        """服务器所在的分片编号（未分片时为 0）。"""
+        if not self.shard_count:
+            return 0
+        return (guild_id >> 22) % self.shard_count
+
+    def cluster_for_guild(self, guild_id: int) -> Optional[int]:
+        """集群模式下负责该服务器的进程编号；单进程运行时为 None。"""
+        if self.cluster is None:
+            return None
+        return cluster_for_shard(self.shard_id_for(guild_id), config.CLUSTER_COUNT, self.shard_count)
+
+    def is_guild_ready(self, guild_id: int) -> bool:
+        """该服务器所在的分片是否已就绪；分片模式下不必等全部分片。"""
+        return self.shard_id_for(guild_id) in self.ready_shards
+
+    async def wait_until_first_ready(self):
+        """等到任一分片就绪（未分片时等同 wait_until_ready）。"""
+        await self._first_ready.wait()
+
+    def shard_status(self) -> Dict[int, Dict]:
+        """各分片的就绪状态与心跳延迟（/healthz、/metrics 用）。"""
+        return {0: {'ready': 0 in self.ready_shards, 'latency': _latency_or_none(self.latency), 'guilds': len(self.guilds)}}
+
+    def _mark_shard_ready(self, shard_id: int):
+        self.ready_shards.add(shard_id)
+        self._first_ready.set()
+        if shard_id in self._started_shards:
+            return
+        self._started_shards.add(shard_id)
+        self.dispatch('guilds_ready', shard_id)
+
     async def on_ready(self):
         """机器人准备就绪时的回调"""
+        self._log_ready()
+        self._mark_shard_ready(0)
+
+    async def on_disconnect(self):
+        self.ready_shards.discard(0)
+
+    async def on_resumed(self):
+        self.ready_shards.add(0)
+
+    def _log_ready(self):
         logger.info('=' * 50)
         logger.info('🤖 机器人已成功启动！')
         logger.info(f'📝 机器人名称: {self.user.name}')
         logger.info(f'🆔 机器人ID: {self.user.id}')
         logger.info(f'📅 启动时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
         logger.info(f'🌐 连接状态: 已连接到 {len(self.guilds)} 个服务器')
+        report = cache_memory_report(self)
+        rss = f"{report['rss_bytes'] / (1024 * 1024):.1f} MB" if report['rss_bytes'] else "未知"
+        logger.info(f"🧠 缓存档案: {report['profile']} | 内存: {rss} | 已缓存成员: {report['members_cached']} | 已缓存消息: {report['messages_cached']}")
+        if self.shard_count:
+            logger.info(f'🧩 分片: {self.shard_count} 个')
         logger.info('=' * 50)
         logger.info('✅ 机器人已准备就绪，可以开始使用！')
-        logger.info('📋 可用命令: /留言 精选, /留言 精选记录, /留言 帖子统计, /留言 总排行, /留言 鉴赏申请窗口, /留言 全服精选列表, /书单 添加至书单, /书单 管理书单, /书单 公开书单, /书单 全服书单列表, /欢迎 设置频道, /欢迎 关闭')
+        logger.info('📋 可用命令: /留言 精选, /留言 批量精选, /留言 精选记录, /留言 帖子统计, /留言 总排行, /留言 精选标准, /留言 同步指令, /留言 鉴赏申请窗口, /留言 全服精选列表, /书单 添加至书单, /书单 管理书单, /书单 公开书单, /书单 全服书单列表, /欢迎 设置频道, /欢迎 关闭')
         logger.info('=' * 50)
 
+    def _on_db_write(self, event: str, payload: dict):
+        """数据库写入事件；来自 asyncio.to_thread 工作线程时转回事件循环线程处理，缓存只在单线程内修改。"""
+        loop = self._event_loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or running is loop:
+            self._handle_db_write(event, payload)
+        else:
+            loop.call_soon_threadsafe(self._handle_db_write, event, payload)
+
+    def _handle_db_write(self, event: str, payload: dict):
+        self.featured_index.on_db_write(event, payload)
+        self.guild_settings.on_db_write(event, payload)
+        self.appreciator_stats.on_db_write(event, payload)
+        self.render_cache.on_db_write(event, payload)
+        if self.cluster is not None and not self._applying_remote_write:
+            self.cluster.broadcast('db_write', {'event': event, 'payload': payload})
+
+    def _on_cluster_broadcast(self, event: str, message: dict):
+        """其他集群进程的广播；数据库写入事件交给本进程的监听者，不再转播。"""
+        if event == 'resync':
+            self._resync_caches()
+            return
+        if event != 'db_write':
+            return
+        self._applying_remote_write = True
+        try:
+            self.db.apply_external_write(message['event'], message['payload'])
+        finally:
+            self._applying_remote_write = False
+
+    def _on_cluster_reconnected(self):
+        """IPC 重连：断线期间本进程收不到他人的写入广播，他人也收不到本进程的，双方都整体重建缓存。"""
+        logger.info("🔄 集群 IPC 已重连，重建本地缓存并通知其他进程")
+        self._resync_caches()
+        self.cluster.broadcast('resync', {})
+
+    def _resync_caches(self):
+        self._applying_remote_write = True
+        try:
+            self.db.apply_external_write('resync', {})
+        finally:
+            self._applying_remote_write = False
+
+    def _invalidate_reactions(self, channel_id: int, message_id: int):
+        """表情变化时让对应消息的表情数量缓存及帖子统计页缓存失效。"""
+        self.reaction_cache.invalidate(channel_id, message_id)
+        self.render_cache.invalidate_scope(VIEW_THREAD_STATS, (channel_id,))
+
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        self._invalidate_reactions(payload.channel_id, payload.message_id)
+
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        self._invalidate_reactions(payload.channel_id, payload.message_id)
+
+    async def on_raw_reaction_clear(self, payload: discord.RawReactionClearEvent):
+        self._invalidate_reactions(payload.channel_id, payload.message_id)
+
+    async def on_raw_reaction_clear_emoji(self, payload: discord.RawReactionClearEmojiEvent):
+        self._invalidate_reactions(payload.channel_id, payload.message_id)
+
+    async def on_guild_role_create(self, role: discord.Role):
+        self.role_cache.invalidate(role.guild.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            self.role_cache.invalidate(after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.role_cache.invalidate(role.guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.role_cache.invalidate(guild.id)
+
+    async def on_thread_create(self, thread: discord.Thread):
+        """新帖子/帖子变化时刷新帖子元数据。"""
+        self.thread_metadata.remember(thread)
+
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        self.thread_metadata.remember(after)
+
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        self.thread_metadata.forget(payload.thread_id)
+        self.reaction_cache.invalidate_thread(payload.thread_id)
+
     async def on_interaction(self, interaction: discord.Interaction):
         """统一记录交互日志，覆盖斜杠命令/右键菜单/按钮/表单。"""
         try:
@@ -76,25 +366,40 @@ class FeaturedMessageBot(commands.Bot):
             channel_id = interaction.channel.id if interaction.channel else 0
             user_name = interaction.user.name if interaction.user else "Unknown"
             user_id = interaction.user.id if interaction.user else 0
+            shard_id = interaction.guild.shard_id if interaction.guild else 0
 
             if interaction.type == discord.InteractionType.application_command:
-                command_name = interaction.command.qualified_name if interaction.command else "unknown"
-                logger.info(
-                    f"🧭 交互: application_command | 命令: {command_name} | 用户: {user_name}({user_id}) | "
-                    f"群组: {guild_name}({guild_id}) | 频道: {channel_id}"
-                )
-            elif interaction.type == discord.InteractionType.component:
-                custom_id = interaction.data.get("custom_id") if interaction.data else "unknown"
-                logger.info(
-                    f"🧭 交互: component | custom_id: {custom_id} | 用户: {user_name}({user_id}) | "
-                    f"群组: {guild_name}({guild_id}) | 频道: {channel_id}"
-                )
-            elif interaction.type == discord.InteractionType.modal_submit:
-                custom_id = interaction.data.get("custom_id") if interaction.data else "unknown"
-                logger.info(
-                    f"🧭 交互: modal_submit | custom_id: {custom_id} | 用户: {user_name}({user_id}) | "
-                    f"群组: {guild_name}({guild_id}) | 频道: {channel_id}"
-                )
+                kind, label = "application_command", "命令"
+                target = interaction.command.qualified_name if interaction.command else "unknown"
+            elif interaction.type in (discord.InteractionType.component, discord.InteractionType.modal_submit):
+                kind, label = interaction.type.name, "custom_id"
+                target = interaction.data.get("custom_id") if interaction.data else "unknown"
+            else:
+                return
+
+            metric_label = target if kind == "application_command" else metric_target(target)
+            self.metrics.inc('bot_interactions_total', kind=kind, target=metric_label, shard=shard_id)
+            dispatch_lag = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+            self.metrics.observe(
+                'bot_interaction_dispatch_seconds', max(0.0, dispatch_lag), kind=kind, target=metric_label, shard=shard_id,
+            )
+
+            # 高频日志：按 LOG_SAMPLE_RATES['interaction'] 抽样，惰性格式化
+            logger.info(
+                "🧭 交互: %s | %s: %s | 用户: %s(%s) | 群组: %s(%s) | 频道: %s | 分片: %s",
+                kind, label, target, user_name, user_id, guild_name, guild_id, channel_id, shard_id,
+                extra={
+                    'log_category': 'interaction',
+                    'fields': {
+                        'interaction_type': kind,
+                        'target': target,
+                        'user_id': user_id,
+                        'guild_id': guild_id,
+                        'channel_id': channel_id,
+                        'shard_id': shard_id,
+                    },
+                },
+            )
         except Exception as e:
             logger.debug(f"记录交互日志失败: {e}")
 
@@ -117,6 +422,11 @@ class FeaturedMessageBot(commands.Bot):
         except Exception as e:
             logger.error(f"发送错误消息失败: {e}")
 
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        """斜杠命令/右键菜单处理完成：记录从交互创建到完成的耗时。"""
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        self.metrics.observe('bot_app_command_seconds', max(0.0, elapsed), command=command.qualified_name)
+
     async def on_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         """处理斜杠命令错误"""
         if isinstance(error, app_commands.CommandNotFound):
@@ -135,3 +445,55 @@ class FeaturedMessageBot(commands.Bot):
                 await interaction.response.send_message("❌ 命令执行时发生错误，请稍后重试", ephemeral=True)
         except Exception as e:
             logger.error(f"发送斜杠命令错误消息失败: {e}")
+
+
+class ShardedFeaturedMessageBot(FeaturedMessageBot, commands.AutoShardedBot):
+    """分片模式（SHARDING_ENABLED）：每个分片一条 gateway 连接，启动工作按分片就绪逐个进行。"""
+
+    def __init__(self):
+        # 集群进程只连接分给自己的分片（需同时给出总分片数）
+        shard_ids = config.CLUSTER_SHARD_IDS or None
+        super().__init__(shard_count=config.SHARD_COUNT, shard_ids=shard_ids)
+
+    def shard_status(self) -> Dict[int, Dict]:
+        guild_counts: Dict[int, int] = {}
+        for guild in self.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        return {
+            shard_id: {
+                'ready': shard_id in self.ready_shards,
+                'latency': _latency_or_none(shard.latency),
+                'guilds': guild_counts.get(shard_id, 0),
+            }
+            for shard_id, shard in sorted(self.shards.items())
+        }
+
+    async def on_ready(self):
+        """全部分片就绪；各分片的启动工作已在 on_shard_ready 中进行。"""
+        self._log_ready()
+
+    async def on_shard_ready(self, shard_id: int):
+        guilds = sum(1 for guild in self.guilds if guild.shard_id == shard_id)
+        logger.info(f"🧩 分片 {shard_id}/{self.shard_count} 已就绪，{guilds} 个服务器")
+        self._mark_shard_ready(shard_id)
+
+    async def on_disconnect(self):
+        pass
+
+    async def on_resumed(self):
+        pass
+
+    async def on_shard_disconnect(self, shard_id: int):
+        logger.warning(f"⚠️ 分片 {shard_id} 已断开")
+        self.ready_shards.discard(shard_id)
+
+    async def on_shard_resumed(self, shard_id: int):
+        logger.info(f"🧩 分片 {shard_id} 已恢复连接")
+        self.ready_shards.add(shard_id)
+
+
+def create_bot() -> FeaturedMessageBot:
+    """按 SHARDING_ENABLED / 集群配置创建单连接或分片的 bot。"""
+    if config.SHARDING_ENABLED or config.CLUSTER_SHARD_IDS:
+        return ShardedFeaturedMessageBot()
+    return FeaturedMessageBot()
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+
+import discord
+
+import config
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY_GLOBAL = 'command_tree_hash:global'
+
+
+def _state_key(guild_id: Optional[int]) -> str:
+    return STATE_KEY_GLOBAL if guild_id is None else f'command_tree_hash:guild:{guild_id}'
+
+
+def command_tree_hash(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """指令树序列化后的 sha256；斜杠指令组与右键菜单都包含在内，顺序无关。"""
+    payload = sorted(
+        (command.to_dict() for command in tree.get_commands(guild=guild)),
+        key=lambda data: (data.get('type', 1), data['name']),
+    )
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+async def _sync_scope(bot, guild_id: Optional[int], force: bool) -> bool:
+    guild = discord.Object(id=guild_id) if guild_id is not None else None
+    if guild is not None:
+        bot.tree.copy_global_to(guild=guild)
+
+    digest = command_tree_hash(bot.tree, guild=guild)
+    key = _state_key(guild_id)
+    scope = '全局' if guild is None else f'服务器 {guild_id}'
+    if not force and bot.db.get_bot_state(key) == digest:
+        logger.info(f"⏭️ 指令树未变化（{scope}），跳过同步")
+        return False
+
+    synced = await bot.tree.sync(guild=guild)
+    bot.db.set_bot_state(key, digest)
+    logger.info(f"🔄 已同步 {len(synced)} 个指令（{scope}）")
+    return True
+
+
+async def sync_command_tree(bot, force: bool = False) -> int:
+    """按需同步指令树，返回实际同步的范围数。
+
+    配置了 COMMAND_SYNC_GUILD_IDS 时只同步到这些服务器（开发用，即时生效），否则做全局同步。
+    哈希与上次成功同步时一致则跳过；force 或 COMMAND_SYNC_FORCE 无视哈希。
+    """
+    force = force or config.COMMAND_SYNC_FORCE
+    guild_ids = config.COMMAND_SYNC_GUILD_IDS or [None]
+    synced = 0
+    for guild_id in guild_ids:
+        if await _sync_scope(bot, guild_id, force):
+            synced += 1
+    return synced
@@ -0,0 +1,65 @@
+import logging
+from typing import Dict, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+
+class FeaturedKeyIndex:
+    """已精选留言的内存索引：thread_id → {message_id}。
+
+    启动时从数据库全量载入，之后由数据库写入事件（featured_added / featured_removed）维护，
+    「是否已精选」检查变成一次集合查找。仅用于提前拦截；写入时仍以数据库唯一约束为准。
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._threads: Dict[int, Set[int]] = {}
+        self._size = 0
+
+    def load(self) -> int:
+        threads: Dict[int, Set[int]] = {}
+        size = 0
+        for thread_id, message_id in self.db.get_all_featured_keys():
+            threads.setdefault(thread_id, set()).add(message_id)
+            size += 1
+        self._threads = threads
+        self._size = size
+        logger.info(f"📇 已载入精选索引：{size} 条精选，{len(threads)} 个帖子")
+        return size
+
+    def contains(self, thread_id: int, message_id: int) -> bool:
+        messages = self._threads.get(thread_id)
+        return messages is not None and message_id in messages
+
+    def featured_in(self, thread_id: int, message_ids: Iterable[int]) -> Set[int]:
+        """返回给定留言中已精选的 message_id。"""
+        messages = self._threads.get(thread_id)
+        if not messages:
+            return set()
+        return messages.intersection(message_ids)
+
+    def add(self, thread_id: int, message_id: int):
+        messages = self._threads.setdefault(thread_id, set())
+        if message_id not in messages:
+            messages.add(message_id)
+            self._size += 1
+
+    def discard(self, thread_id: int, message_id: int):
+        messages = self._threads.get(thread_id)
+        if messages is None or message_id not in messages:
+            return
+        messages.discard(message_id)
+        self._size -= 1
+        if not messages:
+            del self._threads[thread_id]
+
+    def on_db_write(self, event: str, payload: Dict):
+        if event == 'featured_added':
+            self.add(payload['thread_id'], payload['message_id'])
+        elif event == 'featured_removed':
+            self.discard(payload['thread_id'], payload['message_id'])
+        elif event == 'resync':
+            self.load()
+
+    def stats(self) -> dict:
+        return {'keys': self._size, 'threads': len(self._threads)}
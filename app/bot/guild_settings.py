@@ -0,0 +1,61 @@
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 数据库 guild_settings 写入事件中的 setting 名称
+WELCOME_CHANNEL = 'welcome_channel'
+WEBPAGE_TAKEOVER = 'webpage_takeover'
+BOOKLIST_WHITELIST = 'booklist_whitelist'
+
+
+class GuildSettingsCache:
+    """每服小型设置的内存副本：欢迎频道、书单网页接管、书单帖白名单论坛。
+
+    启动时从数据库全量载入，之后由 guild_settings 写入事件直接写入新值（事件负载带 setting/value），
+    热路径上的查询都是字典读取，不再访问数据库。
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._settings: Dict[str, Dict[int, object]] = {
+            WELCOME_CHANNEL: {},
+            WEBPAGE_TAKEOVER: {},
+            BOOKLIST_WHITELIST: {},
+        }
+
+    def load(self) -> int:
+        settings = self.db.get_all_guild_settings()
+        self._settings = {name: dict(settings.get(name, {})) for name in self._settings}
+        guilds = set().union(*(values.keys() for values in self._settings.values()))
+        logger.info(f"⚙️ 已载入服务器设置：{len(guilds)} 个服务器")
+        return len(guilds)
+
+    def welcome_channel(self, guild_id: int) -> Optional[int]:
+        """已启用的欢迎频道ID；未设置或已关闭为 None。"""
+        return self._settings[WELCOME_CHANNEL].get(guild_id)
+
+    def webpage_takeover(self, guild_id: int) -> bool:
+        return bool(self._settings[WEBPAGE_TAKEOVER].get(guild_id, False))
+
+    def booklist_whitelist(self, guild_id: int) -> Optional[int]:
+        """书单帖白名单论坛频道ID；未设置为 None。"""
+        return self._settings[BOOKLIST_WHITELIST].get(guild_id)
+
+    def on_db_write(self, event: str, payload: Dict):
+        if event == 'resync':
+            self.load()
+            return
+        if event != 'guild_settings':
+            return
+        values = self._settings.get(payload.get('setting'))
+        if values is None:
+            return
+        value = payload.get('value')
+        if value is None or value is False:
+            values.pop(payload['guild_id'], None)
+        else:
+            values[payload['guild_id']] = value
+
+    def stats(self) -> dict:
+        return {name: len(values) for name, values in self._settings.items()}
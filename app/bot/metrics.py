@@ -0,0 +1,288 @@
+"""进程内指标与 Prometheus 文本格式输出（不依赖 prometheus_client）。
+
+指标在事件循环线程中更新；数据库方法计时可能来自 asyncio.to_thread 工作线程，
+计数为简单的加法，偶发的竞争只会让个别样本丢失，不影响监控用途。
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from aiohttp import web
+
+import config
+from app.bot.cache_profile import cache_memory_report
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# 交互/数据库/REST 耗时的直方图桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value) -> str:
+    """Prometheus 文本格式的样本值：bool 记为 0/1，非有限值为 +Inf/-Inf/NaN，整数值不带小数与指数。"""
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(value)
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """计数器 / 直方图 / 抓取时求值的 gauge。"""
+
+    def __init__(self):
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._histogram_buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauges: Dict[str, Callable[[], Iterable[Tuple[Dict[str, object], float]]]] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._help[name] = ('counter', help_text)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._help[name] = ('histogram', help_text)
+        self._histograms.setdefault(name, {})
+        self._histogram_buckets[name] = tuple(buckets)
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], Iterable[Tuple[Dict[str, object], float]]]):
+        """collect() 在抓取时调用，返回 [(labels, value), ...]。"""
+        self._help[name] = ('gauge', help_text)
+        self._gauges[name] = collect
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        series = self._counters[name]
+        key = _label_key(labels)
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        series = self._histograms[name]
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = _Histogram(self._histogram_buckets[name])
+        histogram.observe(value)
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, (kind, help_text) in self._help.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for key, value in list(self._counters[name].items()):
+                    lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+            elif kind == 'histogram':
+                for key, histogram in list(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(key, [("le", f"{bound:g}")])} {cumulative}')
+                    lines.append(f'{name}_bucket{_format_labels(key, [("le", "+Inf")])} {histogram.count}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{_format_labels(key)} {histogram.count}')
+            else:
+                try:
+                    samples = list(self._gauges[name]())
+                except Exception as e:
+                    logger.debug(f"指标 {name} 取值失败: {e}")
+                    continue
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(_label_key(labels))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_methods(target, registry: MetricsRegistry, metric: str, label: str = 'method'):
+    """给实例的公开同步方法套上计时（写入实例属性，不修改类）。"""
+    for name, method in inspect.getmembers(target, predicate=inspect.ismethod):
+        if name.startswith('_') or asyncio.iscoroutinefunction(method):
+            continue
+
+        def wrap(func, method_name=name):
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    registry.observe(metric, time.perf_counter() - started, **{label: method_name})
+            return timed
+
+        setattr(target, name, wrap(method))
+
+
+class RateLimitCounter(logging.Handler):
+    """统计 discord.py 记录的 429 限流日志（discord.http 与 webhook 适配器都会记录 WARNING）。
+
+    scope=route 为单个路由/webhook 被限流，scope=global 为全局限流（同一次 429 会各记一次）。
+    """
+
+    def __init__(self, registry: MetricsRegistry, metric: str):
+        super().__init__(level=logging.WARNING)
+        self.registry = registry
+        self.metric = metric
+
+    def emit(self, record: logging.LogRecord):
+        template = str(record.msg)
+        if template.startswith('Global rate limit'):
+            self.registry.inc(self.metric, scope='global', source=record.name)
+        elif 'rate limited' in template:
+            self.registry.inc(self.metric, scope='route', source=record.name)
+
+
+async def monitor_event_loop_lag(registry: MetricsRegistry, metric: str, interval: float = 1.0):
+    """按固定间隔 sleep，实际唤醒时间与预期之差即事件循环延迟。"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        registry.observe(metric, max(0.0, loop.time() - expected))
+
+
+def create_bot_metrics(bot) -> MetricsRegistry:
+    """声明 bot 的全部指标；缓存命中率与 gateway 延迟在抓取时读取。"""
+    registry = MetricsRegistry()
+    registry.counter('bot_interactions_total', '收到的交互数（按类型、命令/custom_id 与分片）')
+    registry.histogram('bot_interaction_dispatch_seconds', '交互创建到 bot 收到的延迟（按类型、命令/custom_id 与分片）')
+    registry.histogram('bot_app_command_seconds', '斜杠命令/右键菜单从交互创建到处理完成的耗时')
+    registry.counter('bot_auto_defer_total', '@auto_defer 自动 defer 次数（history 按近期耗时 / deadline 期限前 / explicit 显式）')
+    registry.histogram('bot_db_method_seconds', 'DatabaseManager 方法耗时')
+    registry.counter('discord_rest_requests_total', 'Discord REST 请求数（不含交互回应/webhook）')
+    registry.histogram('discord_rest_request_seconds', 'Discord REST 请求耗时（含限流等待）')
+    registry.counter('discord_rate_limit_hits_total', 'discord.py 记录的 429 限流次数')
+    registry.histogram(
+        'discord_rest_queue_wait_seconds', 'REST 请求在优先级调度中的排队时间（按优先级）',
+        buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    )
+    registry.counter('bot_welcome_messages_total', '已发送的新成员欢迎消息数（single 单人 / batch 合并）')
+    registry.counter('bot_welcome_dropped_total', '未欢迎的新成员数（queue_full 队列已满 / send_failed 发送失败）')
+    registry.counter('bot_booklist_jobs_total', '书单接口异步任务的执行结果（done / failed / retry，按 publish / unpublish）')
+    registry.histogram(
+        'bot_event_loop_lag_seconds', '事件循环调度延迟',
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    )
+
+    def cache_samples(field: str):
+        caches = {
+            'reaction': bot.reaction_cache.stats(),
+            'thread_metadata': bot.thread_metadata.stats(),
+            'render': bot.render_cache.stats(),
+        }
+        return [({'cache': name}, stats[field]) for name, stats in caches.items()]
+
+    registry.gauge('bot_cache_hit_ratio', '进程内缓存命中率', lambda: cache_samples('hit_ratio'))
+    registry.gauge('bot_cache_entries', '进程内缓存条目数', lambda: cache_samples('size'))
+    def memory_samples(field: str):
+        value = cache_memory_report(bot)[field]
+        return [({'profile': bot.cache_profile}, value)] if value is not None else []
+
+    registry.gauge('bot_process_resident_bytes', '进程常驻内存', lambda: memory_samples('rss_bytes'))
+    registry.gauge('discord_cached_members', 'discord.py 已缓存成员数', lambda: memory_samples('members_cached'))
+    registry.gauge('discord_cached_messages', 'discord.py 已缓存消息数', lambda: memory_samples('messages_cached'))
+    registry.gauge(
+        'discord_gateway_latency_seconds', 'Gateway 心跳延迟（分片模式下为各分片平均）',
+        lambda: [({}, bot.latency)] if math.isfinite(bot.latency) else [],
+    )
+
+    def shard_samples(field: str):
+        samples = []
+        for shard_id, status in bot.shard_status().items():
+            value = status[field]
+            if value is None:
+                continue
+            samples.append(({'shard': shard_id}, int(value) if isinstance(value, bool) else value))
+        return samples
+
+    registry.gauge(
+        'discord_rest_queue_depth', '排队中的后台 REST 请求数（按优先级）',
+        lambda: [({'priority': priority}, count) for priority, count in bot.request_scheduler.stats()['queued'].items()],
+    )
+
+    def welcome_samples():
+        cog = bot.get_cog('WelcomeCommands')
+        return [({}, cog.dispatcher.queue_depth)] if cog is not None else []
+
+    registry.gauge('bot_welcome_queue_depth', '待发送欢迎的新成员数（全部服务器）', welcome_samples)
+
+    registry.gauge('discord_shard_ready', '分片是否就绪（1/0）', lambda: shard_samples('ready'))
+    registry.gauge('discord_shard_latency_seconds', '各分片心跳延迟', lambda: shard_samples('latency'))
+    registry.gauge('discord_shard_guilds', '各分片服务器数', lambda: shard_samples('guilds'))
+    return registry
+
+
+def metrics_route(bot) -> web.RouteDef:
+    """GET /metrics 路由，书单发布接口与独立指标站点共用。"""
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(text=bot.metrics.render(), content_type='text/plain', charset='utf-8')
+
+    return web.get('/metrics', handle_metrics)
+
+
+async def start_metrics_server(bot):
+    """书单发布接口未运行时，单独启动 /metrics 站点；返回 runner，未启用或无需启动返回 None。"""
+    if not config.METRICS_ENABLED:
+        return None
+    if bot.booklist_api_runner is not None:
+        logger.info("📈 指标接口挂在书单发布接口上：/metrics")
+        return None
+
+    # 集群模式下每个进程一个端口：METRICS_PORT + CLUSTER_ID
+    port = config.METRICS_PORT + (config.CLUSTER_ID or 0)
+    app = web.Application()
+    app.add_routes([metrics_route(bot)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.METRICS_HOST, port)
+    await site.start()
+    logger.info(f"📈 指标接口已启动：http://{config.METRICS_HOST}:{port}/metrics")
+    return runner
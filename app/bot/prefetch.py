@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+import discord
+
+from app.bot.render_cache import RenderCache
+from app.bot.request_scheduler import PRIORITY_BULK, request_priority
+
+logger = logging.getLogger(__name__)
+
+RenderPage = Callable[[int], Awaitable[Tuple[discord.Embed, int]]]
+
+
+class PagePrefetcher:
+    """翻页预取：某页发送后，在后台渲染相邻页（n+1，必要时 n-1）写入 RenderCache。
+
+    - 全局并发预算用尽时直接跳过（预取是投机性的，不排队）；
+    - 每个 View 的预取任务单独记录，View 超时时由 cancel(view) 取消。
+    """
+
+    def __init__(self, render_cache: RenderCache, max_concurrency: int, enabled: bool = True):
+        self.render_cache = render_cache
+        self.enabled = enabled
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._running = 0
+        self._tasks: Dict[int, Set[asyncio.Task]] = {}
+        self.completed = 0
+        self.skipped = 0
+
+    def schedule(self, owner, make_key: Callable[[int], Hashable], render: RenderPage,
+                 page: int, total_pages: int):
+        """当前页为 page 时，预取后一页与（非首页时）前一页。"""
+        if not self.enabled:
+            return
+
+        candidates = [page + 1]
+        if page > 1:
+            candidates.append(page - 1)
+
+        for target in candidates:
+            if not (1 <= target <= total_pages):
+                continue
+            key = make_key(target)
+            if key in self.render_cache:
+                continue
+            if self._running >= self.max_concurrency:
+                self.skipped += 1
+                continue
+
+            self._running += 1
+            self.render_cache.begin_render(key)
+            task = asyncio.create_task(self._render(make_key, render, target, key))
+            self._tasks.setdefault(id(owner), set()).add(task)
+            task.add_done_callback(lambda t, owner_id=id(owner), key=key: self._on_done(owner_id, key, t))
+
+    async def _render(self, make_key: Callable[[int], Hashable], render: RenderPage, page: int, key: Hashable):
+        # View 在排程之后切换了排序/模式时，渲染结果已不属于原来的键，直接放弃
+        if make_key(page) != key:
+            return None
+        try:
+            # 预取是投机性的，REST 请求排在交互回应之后
+            with request_priority(PRIORITY_BULK):
+                result = await render(page)
+        except Exception as e:
+            logger.debug(f"预取第 {page} 页失败: {e}")
+            return None
+        return result if make_key(page) == key else None
+
+    def _on_done(self, owner_id: int, key: Hashable, task: asyncio.Task):
+        # 收尾放在回调里：任务在开始执行前就被取消时协程体不会运行
+        self._running -= 1
+        result = None if task.cancelled() else task.result()
+        if result is not None:
+            embed, total_pages = result
+            if self.render_cache.finish_render(key, embed, total_pages):
+                self.completed += 1
+        else:
+            self.render_cache.finish_render(key)
+
+        tasks = self._tasks.get(owner_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                self._tasks.pop(owner_id, None)
+
+    def cancel(self, owner) -> int:
+        """取消某个 View 尚未完成的预取，返回取消数量。"""
+        tasks = self._tasks.pop(id(owner), set())
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'running': self._running,
+            'max_concurrency': self.max_concurrency,
+            'completed': self.completed,
+            'skipped': self.skipped,
+        }
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class ReactionCountCache:
+    """bot 级共享的表情数量缓存，键为 (thread_id, message_id)。
+
+    所有统计视图共用同一份缓存：多名管理员打开同一列表、或重复打开时不再重复请求。
+    同一键的并发请求只发出一次 fetch_message；表情 gateway 事件会让对应条目失效。
+    """
+
+    def __init__(self, bot, maxsize: int, ttl: float):
+        self.bot = bot
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Tuple[int, int], asyncio.Future] = {}
+
+    async def get_count(self, thread_id: int, message_id: int, default: Optional[int] = 0) -> Optional[int]:
+        """获取消息的最高表情符号数量（带缓存）；获取失败时返回 default。"""
+        key = (thread_id, message_id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                count = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # 发起请求的一方被取消时，由当前调用方重新获取
+                if not pending.cancelled():
+                    raise
+                return await self.get_count(thread_id, message_id, default)
+            return count if count is not None else default
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            count = await self._fetch_count(thread_id, message_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if count is not None:
+            self._cache.set(key, count)
+        future.set_result(count)
+        return count if count is not None else default
+
+    async def _fetch_count(self, thread_id: int, message_id: int):
+        try:
+            # 归档帖不在 gateway 缓存中，用 PartialMessageable 直接按 ID 获取消息
+            channel = self.bot.get_channel(thread_id) or self.bot.get_partial_messageable(thread_id)
+            message = await channel.fetch_message(message_id)
+        except Exception as e:
+            # 无法获取消息或表情符号时不写入缓存，下次仍会重试
+            logger.debug(f"無法獲取消息 {message_id} 的表情符號: {e}")
+            return None
+
+        if not message or not message.reactions:
+            return 0
+        return max(reaction.count for reaction in message.reactions)
+
+    def invalidate(self, thread_id: int, message_id: int) -> bool:
+        return self._cache.invalidate((thread_id, message_id))
+
+    def invalidate_thread(self, thread_id: int) -> int:
+        return self._cache.invalidate_where(lambda key: key[0] == thread_id)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
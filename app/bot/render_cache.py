@@ -0,0 +1,106 @@
+import logging
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import discord
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 各翻页 View 的缓存类型名，与 scope 组成键的前两段
+VIEW_FEATURED_RECORDS = "featured_records"    # scope: (guild_id, user_id)
+VIEW_REFERRAL_RANKING = "referral_ranking"    # scope: (guild_id,)
+VIEW_THREAD_STATS = "thread_stats"            # scope: (thread_id,)
+VIEW_BOOKLIST_ADMIN = "booklist_admin"        # scope: (guild_id,)
+VIEW_ALL_FEATURED = "all_featured"            # scope: (guild_id,)
+
+
+class RenderCache:
+    """翻页 View 的已渲染 embed 缓存。
+
+    键为 (view 类型, scope, page, sort, start_date, end_date)，值为 (embed, total_pages, state)。
+    来回翻页时直接取缓存，不再查库与拼字符串；数据库写入事件（见 DatabaseManager.add_write_listener）
+    会让受影响的 scope 失效。取出/存入时都复制 embed，调用方可以放心追加字段。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # 后台预取中的键 → 是否仍有效；渲染期间被失效的结果不会写入缓存
+        self._inflight: Dict[Hashable, bool] = {}
+
+    @staticmethod
+    def make_key(view_type: str, scope: Tuple, page: int, sort: Optional[str] = None,
+                 start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple:
+        return (view_type, tuple(scope), page, sort, start_date, end_date)
+
+    def get(self, key: Hashable) -> Optional[Tuple[discord.Embed, int, Any]]:
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        embed, total_pages, state = cached
+        return embed.copy(), total_pages, state
+
+    def set(self, key: Hashable, embed: discord.Embed, total_pages: int, state: Any = None):
+        self._cache.set(key, (embed.copy(), total_pages, state))
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._cache or key in self._inflight
+
+    def begin_render(self, key: Hashable):
+        """标记某键正在后台渲染（预取用）。"""
+        self._inflight[key] = True
+
+    def finish_render(self, key: Hashable, embed: Optional[discord.Embed] = None,
+                      total_pages: int = 0, state: Any = None) -> bool:
+        """结束后台渲染；若期间未被失效则写入缓存，返回是否写入。embed 为 None 表示放弃。"""
+        fresh = self._inflight.pop(key, False)
+        if fresh and embed is not None:
+            self.set(key, embed, total_pages, state)
+            return True
+        return False
+
+    def invalidate_scope(self, view_type: str, scope: Optional[Tuple] = None) -> int:
+        """按 view 类型失效；给出 scope 时只失效以该 scope 为前缀的条目。"""
+        if scope is None:
+            def predicate(key):
+                return key[0] == view_type
+        else:
+            scope = tuple(scope)
+            size = len(scope)
+
+            def predicate(key):
+                return key[0] == view_type and key[1][:size] == scope
+
+        for key in self._inflight:
+            if predicate(key):
+                self._inflight[key] = False
+        return self._cache.invalidate_where(predicate)
+
+    def on_db_write(self, event: str, payload: Dict):
+        """数据库写入事件 → 失效相关 View 的缓存。"""
+        guild_id = payload.get('guild_id')
+        if event in ('featured_added', 'featured_removed'):
+            self.invalidate_scope(VIEW_FEATURED_RECORDS, (guild_id, payload['author_id']))
+            self.invalidate_scope(VIEW_FEATURED_RECORDS, (guild_id, payload['featured_by_id']))
+            self.invalidate_scope(VIEW_REFERRAL_RANKING, (guild_id,))
+            self.invalidate_scope(VIEW_THREAD_STATS, (payload['thread_id'],))
+            self.invalidate_scope(VIEW_ALL_FEATURED, (guild_id,))
+        elif event == 'booklist_link':
+            # 精选记录页附带书单帖链接；user_id 为 None 表示整服批量解绑
+            user_id = payload.get('user_id')
+            self.invalidate_scope(VIEW_FEATURED_RECORDS, (guild_id, user_id) if user_id else (guild_id,))
+            self.invalidate_scope(VIEW_BOOKLIST_ADMIN, (guild_id,))
+        elif event == 'booklist_entries':
+            # 删除/搬移书单条目时不知道所属服务器，失效全部管理面板（数量很少）
+            self.invalidate_scope(VIEW_BOOKLIST_ADMIN, (guild_id,) if guild_id else None)
+        elif event == 'guild_settings':
+            self.invalidate_scope(VIEW_BOOKLIST_ADMIN, (guild_id,))
+        elif event == 'reaction_snapshot':
+            self.invalidate_scope(VIEW_ALL_FEATURED, (guild_id,))
+        elif event == 'resync':
+            for key in self._inflight:
+                self._inflight[key] = False
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
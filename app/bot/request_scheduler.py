@@ -0,0 +1,171 @@
+"""出站 Discord REST 请求的优先级调度。
+
+请求按当前上下文的优先级分类（contextvars，后台任务在自己的协程里用 request_priority 标记）：
+- interactive：默认，交互/指令的直接回应，从不排队；
+- normal：用户可见但非直接回应（欢迎消息、书单发布接口、书单帖守门删除）；
+- bulk：后台批量工作（讚數排行计算、公开书单索引校验、翻页预取）。
+
+非 interactive 请求按路由桶（方法 + 路径 + 频道/服务器等主参数）排队：同一桶有 interactive 请求
+在途时让路，每桶与全局的后台并发各有上限，放行顺序为 normal 先于 bulk、同级先到先得。
+交互回应与 followup 走 webhook 适配器，不经过这里。
+"""
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_NORMAL = 'normal'
+PRIORITY_BULK = 'bulk'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BULK)
+_RANK = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+_current_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    'discord_request_priority', default=PRIORITY_INTERACTIVE,
+)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+@contextlib.contextmanager
+def request_priority(priority: str):
+    """在 with 块内（及其中创建的任务）发出的 REST 请求使用指定优先级。"""
+    if priority not in _RANK:
+        raise ValueError(f'unknown request priority: {priority}')
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def route_bucket(route) -> str:
+    """discord.py Route 的本地桶键；Discord 实际的桶可能合并多个路由，这里按路由 + 主参数近似。"""
+    return f'{route.key}:{route.major_parameters}'
+
+
+class _Bucket:
+    __slots__ = ('interactive', 'background', 'waiters')
+
+    def __init__(self):
+        self.interactive = 0
+        self.background = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+
+
+class RequestScheduler:
+    def __init__(self, background_per_bucket: int = 1, max_background: int = 4, metrics=None):
+        self.background_per_bucket = max(1, int(background_per_bucket))
+        self.max_background = max(1, int(max_background))
+        self.metrics = metrics
+        self._buckets: Dict[str, _Bucket] = {}
+        self._background = 0
+        self._seq = itertools.count()
+        self._queued = {priority: 0 for priority in PRIORITIES}
+
+    def _can_start(self, state: _Bucket) -> bool:
+        return (
+            state.interactive == 0
+            and state.background < self.background_per_bucket
+            and self._background < self.max_background
+        )
+
+    async def acquire(self, bucket: str, priority: str) -> float:
+        """取得发送许可，返回排队等待的秒数；之后必须调用 release。"""
+        state = self._buckets.get(bucket)
+        if state is None:
+            state = self._buckets[bucket] = _Bucket()
+
+        if priority == PRIORITY_INTERACTIVE:
+            state.interactive += 1
+            self._observe(priority, 0.0)
+            return 0.0
+        if not state.waiters and self._can_start(state):
+            state.background += 1
+            self._background += 1
+            self._observe(priority, 0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (_RANK[priority], next(self._seq), future)
+        heapq.heappush(state.waiters, entry)
+        self._queued[priority] += 1
+        started = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已放行但调用方被取消：归还许可
+                self.release(bucket, priority)
+            else:
+                self._queued[priority] -= 1
+                state.waiters.remove(entry)
+                heapq.heapify(state.waiters)
+                self._cleanup(bucket, state)
+            raise
+        waited = time.perf_counter() - started
+        self._observe(priority, waited)
+        return waited
+
+    def release(self, bucket: str, priority: str):
+        state = self._buckets.get(bucket)
+        if state is None:
+            return
+        if priority == PRIORITY_INTERACTIVE:
+            state.interactive -= 1
+        else:
+            state.background -= 1
+            self._background -= 1
+        self._wake()
+        self._cleanup(bucket, state)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, bucket: str, priority: Optional[str] = None):
+        priority = priority or current_priority()
+        await self.acquire(bucket, priority)
+        try:
+            yield
+        finally:
+            self.release(bucket, priority)
+
+    def _wake(self):
+        """按优先级放行所有桶里能开始的等待者（全局上限可能让别的桶的等待者变得可以开始）。"""
+        while self._background < self.max_background:
+            best: Optional[Tuple[Tuple[int, int], _Bucket]] = None
+            for state in self._buckets.values():
+                if state.waiters and self._can_start(state):
+                    head = state.waiters[0][:2]
+                    if best is None or head < best[0]:
+                        best = (head, state)
+            if best is None:
+                return
+            state = best[1]
+            rank, _, future = heapq.heappop(state.waiters)
+            self._queued[PRIORITIES[rank]] -= 1
+            state.background += 1
+            self._background += 1
+            future.set_result(None)
+
+    def _cleanup(self, bucket: str, state: _Bucket):
+        if not state.interactive and not state.background and not state.waiters:
+            self._buckets.pop(bucket, None)
+
+    def _observe(self, priority: str, waited: float):
+        if self.metrics is not None:
+            self.metrics.observe('discord_rest_queue_wait_seconds', waited, priority=priority)
+
+    def queue_depth(self, priority: str) -> int:
+        return self._queued[priority]
+
+    def stats(self) -> dict:
+        return {
+            'queued': {priority: count for priority, count in self._queued.items() if priority != PRIORITY_INTERACTIVE},
+            'background_inflight': self._background,
+            'max_background': self.max_background,
+            'buckets': len(self._buckets),
+        }
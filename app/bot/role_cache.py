@@ -0,0 +1,38 @@
+import logging
+from typing import Dict, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class RoleNameCache:
+    """每服 身份组名称 → role_id 的索引，按名称查身份组从逐个比较变成一次字典查找。
+
+    某服首次查询时由 guild.roles 建立索引（同名时取位置最低的，与按 guild.roles 顺序查找一致）；
+    身份组新增/修改/删除事件把该服索引作废，下次查询时重建。
+    """
+
+    def __init__(self):
+        self._guilds: Dict[int, Dict[str, int]] = {}
+        self.hits = 0
+        self.rebuilds = 0
+
+    def get(self, guild: discord.Guild, name: str) -> Optional[discord.Role]:
+        names = self._guilds.get(guild.id)
+        if names is None:
+            names = {}
+            for role in guild.roles:
+                names.setdefault(role.name, role.id)
+            self._guilds[guild.id] = names
+            self.rebuilds += 1
+        else:
+            self.hits += 1
+        role_id = names.get(name)
+        return guild.get_role(role_id) if role_id is not None else None
+
+    def invalidate(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def stats(self) -> dict:
+        return {'guilds': len(self._guilds), 'hits': self.hits, 'rebuilds': self.rebuilds}
@@ -0,0 +1,126 @@
+import logging
+from typing import Dict, Iterable, Optional
+
+import discord
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 数据库中也查不到的帖子短暂记为“未知”，避免同一页列表反复查库
+_UNKNOWN = False
+_UNKNOWN_TTL = 60
+
+
+class ThreadMetadataStore:
+    """帖子元数据（标题/父论坛/楼主/归档状态）：LRU + thread_metadata 表。
+
+    get（列表显示）：gateway 缓存中的 Thread → LRU → 数据库；归档帖不在 gateway 缓存中，靠数据库中最近一次记录的标题显示。
+    resolve（权限校验）：gateway 缓存中的 Thread → REST fetch_channel；记录可能已过时，不作为校验依据。
+    """
+
+    def __init__(self, bot, maxsize: int):
+        self.bot = bot
+        self._cache = TTLCache(maxsize=maxsize)
+
+    @staticmethod
+    def _from_thread(thread: discord.Thread) -> Dict:
+        parent = thread.parent
+        return {
+            'thread_id': thread.id,
+            'guild_id': thread.guild.id,
+            'title': thread.name or f"帖子 {thread.id}",
+            'parent_id': thread.parent_id,
+            'parent_is_forum': parent is not None and parent.type == discord.ChannelType.forum,
+            'owner_id': thread.owner_id,
+            'archived': bool(thread.archived),
+        }
+
+    def remember(self, thread: discord.Thread) -> Dict:
+        """以一个 Thread 对象刷新元数据；内容未变化时不写库。"""
+        metadata = self._from_thread(thread)
+        if self._cache.get(thread.id) != metadata:
+            try:
+                self.bot.db.upsert_thread_metadata(
+                    thread_id=metadata['thread_id'],
+                    guild_id=metadata['guild_id'],
+                    title=metadata['title'],
+                    parent_id=metadata['parent_id'],
+                    parent_is_forum=metadata['parent_is_forum'],
+                    owner_id=metadata['owner_id'],
+                    archived=metadata['archived'],
+                )
+            except Exception as e:
+                logger.warning(f"写入帖子元数据失败 thread={thread.id}: {e}")
+            self._cache.set(thread.id, metadata)
+        return metadata
+
+    def forget(self, thread_id: int):
+        """帖子被删除时清除元数据。"""
+        self._cache.invalidate(thread_id)
+        try:
+            self.bot.db.delete_thread_metadata(thread_id)
+        except Exception as e:
+            logger.warning(f"删除帖子元数据失败 thread={thread_id}: {e}")
+
+    def prefetch(self, thread_ids: Iterable[int]):
+        """批量把一页列表需要的元数据从数据库载入 LRU（一次查询）。"""
+        missing = [
+            thread_id for thread_id in dict.fromkeys(thread_ids)
+            if thread_id not in self._cache and not isinstance(self.bot.get_channel(thread_id), discord.Thread)
+        ]
+        if not missing:
+            return
+
+        rows = self.bot.db.get_thread_metadata_bulk(missing)
+        for thread_id in missing:
+            if thread_id in rows:
+                self._cache.set(thread_id, rows[thread_id])
+            else:
+                self._cache.set(thread_id, _UNKNOWN, ttl=_UNKNOWN_TTL)
+
+    def get(self, thread_id: int) -> Optional[Dict]:
+        """不发 REST 请求地获取元数据；完全未知时返回 None。"""
+        channel = self.bot.get_channel(thread_id)
+        if isinstance(channel, discord.Thread):
+            return self.remember(channel)
+
+        cached = self._cache.get(thread_id)
+        if cached is _UNKNOWN:
+            return None
+        if cached is not None:
+            return cached
+
+        metadata = self.bot.db.get_thread_metadata(thread_id)
+        if metadata:
+            self._cache.set(thread_id, metadata)
+        else:
+            self._cache.set(thread_id, _UNKNOWN, ttl=_UNKNOWN_TTL)
+        return metadata
+
+    def get_title(self, thread_id: int) -> Optional[str]:
+        metadata = self.get(thread_id)
+        return metadata['title'] if metadata else None
+
+    async def resolve(self, thread_id: int) -> Optional[Dict]:
+        """获取用于权限校验的元数据：gateway 缓存中有该帖时直接使用，否则 fetch_channel 确认并刷新记录。
+
+        LRU/数据库中的记录可能已过时（帖子已删除、楼主或父论坛变化），只作显示用的快速路径。
+        目标频道不是帖子时返回 None；fetch_channel 的异常（NotFound/Forbidden 等）原样抛出，
+        由调用方决定如何提示；NotFound 时顺带清除记录。
+        """
+        channel = self.bot.get_channel(thread_id)
+        if isinstance(channel, discord.Thread):
+            return self.remember(channel)
+
+        try:
+            channel = await self.bot.fetch_channel(thread_id)
+        except discord.NotFound:
+            self.forget(thread_id)
+            raise
+        if not isinstance(channel, discord.Thread):
+            return None
+        return self.remember(channel)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
@@ -0,0 +1,6 @@
+"""Multi-process shard cluster: launcher, local IPC and shard assignment."""
+
+from app.cluster.ipc import ClusterClient, ClusterError, ClusterHub
+from app.cluster.topology import cluster_for_shard, shard_ids_for_cluster
+
+__all__ = ["ClusterClient", "ClusterError", "ClusterHub", "cluster_for_shard", "shard_ids_for_cluster"]
@@ -0,0 +1,24 @@
+"""python -m app.cluster [--clusters N] [--shards M]"""
+import argparse
+import asyncio
+import logging
+
+import config
+from app.cluster.launcher import main
+
+
+def run():
+    parser = argparse.ArgumentParser(description="以多进程集群方式启动 bot")
+    parser.add_argument("--clusters", type=int, default=config.CLUSTER_COUNT, help="进程数")
+    parser.add_argument("--shards", type=int, default=None, help="总分片数（默认 SHARD_COUNT 或 Discord 推荐值）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(main(args.clusters, args.shards))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,261 @@
+"""集群进程间通信：本机 TCP 上逐行 JSON。
+
+launcher 进程运行 ClusterHub，每个 bot 进程用 ClusterClient 连接并以 cluster_id 登记。
+- broadcast：发给其他所有进程（数据库写入事件，用于缓存失效）；
+- request / response：发给指定进程并等待结果（跨分片操作，如书单发布转发）。
+Hub 只做路由，不保存状态；进程重连后重新登记即可。断线期间的广播不补发，
+重连后由 ClusterClient.on_reconnect 让各进程整体重建缓存。
+"""
+import asyncio
+import itertools
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 单行消息上限（书单发布的请求体也经由 IPC 转发）
+_LINE_LIMIT = 4 * 1024 * 1024
+
+
+class ClusterError(RuntimeError):
+    """IPC 未连接、目标进程不在线，或远端处理失败。"""
+
+
+def _encode(message: Dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+
+async def _drain(writer: asyncio.StreamWriter):
+    """等待写缓冲排空；对端已断开时忽略，由其连接协程自行清理。"""
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+
+class ClusterHub:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Dict[int, asyncio.StreamWriter] = {}
+        self._connections: Set[asyncio.Task] = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=_LINE_LIMIT)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"🔗 集群 IPC 已监听 {self.host}:{self.port}")
+
+    async def close(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._clients.values()):
+            writer.close()
+        self._clients.clear()
+        # 关闭连接后各连接协程读到 EOF 自行结束
+        if self._connections:
+            await asyncio.wait(list(self._connections), timeout=1.0)
+        await self._server.wait_closed()
+        self._server = None
+
+    @property
+    def connected(self):
+        return sorted(self._clients)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        cluster_id = None
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                op = message.get('op')
+                if op == 'hello':
+                    cluster_id = message['cluster']
+                    self._clients[cluster_id] = writer
+                    logger.info(f"🔗 集群进程 {cluster_id} 已连接（分片 {message.get('shards')}）")
+                elif op == 'broadcast':
+                    # 全部写入后一起等待排空：接收慢的进程对发送方形成背压，而不是在 Hub 内无限堆积
+                    others = [other for other_id, other in list(self._clients.items()) if other_id != cluster_id]
+                    for other in others:
+                        other.write(line)
+                    await asyncio.gather(*(_drain(other) for other in others))
+                elif op in ('request', 'response'):
+                    target = self._clients.get(message.get('to'))
+                    if target is not None:
+                        target.write(line)
+                        await _drain(target)
+                    elif op == 'request':
+                        writer.write(_encode({
+                            'op': 'response', 'id': message['id'], 'to': cluster_id,
+                            'error': f"cluster {message.get('to')} unavailable",
+                        }))
+                        await _drain(writer)
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"⚠️ 集群进程 {cluster_id} 的 IPC 连接异常: {e}")
+        finally:
+            if cluster_id is not None and self._clients.get(cluster_id) is writer:
+                del self._clients[cluster_id]
+                logger.warning(f"⚠️ 集群进程 {cluster_id} 已断开")
+            self._connections.discard(task)
+            writer.close()
+
+
+class ClusterClient:
+    """bot 进程一侧的 IPC 连接，断线自动重连。
+
+    未连接时广播直接丢弃，Hub 也不补发断线期间他人的广播；重连（非首次连接）后调用 on_reconnect，
+    由上层重建本进程缓存并通知其他进程同样重建。
+    """
+
+    def __init__(self, cluster_id: int, host: str, port: int, shard_ids: Iterable[int] = ()):
+        self.cluster_id = cluster_id
+        self.host = host
+        self.port = port
+        self.shard_ids = list(shard_ids)
+        self.on_broadcast: Optional[Callable[[str, Dict], None]] = None
+        self.on_reconnect: Optional[Callable[[], None]] = None
+        self._handlers: Dict[str, Callable[[Dict], Awaitable[Dict]]] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._serving: Set[asyncio.Task] = set()
+        self.sent = 0
+        self.received = 0
+        self.connections = 0
+
+    def register(self, action: str, handler: Callable[[Dict], Awaitable[Dict]]):
+        self._handlers[action] = handler
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def wait_connected(self, timeout: float = None):
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            'cluster_id': self.cluster_id,
+            'connected': self._writer is not None,
+            'reconnects': max(0, self.connections - 1),
+            'sent': self.sent,
+            'received': self.received,
+            'pending_requests': len(self._pending),
+        }
+
+    def _send(self, message: Dict) -> bool:
+        if self._writer is None:
+            return False
+        self._writer.write(_encode(message))
+        self.sent += 1
+        return True
+
+    def broadcast(self, event: str, payload: Dict) -> bool:
+        return self._send({'op': 'broadcast', 'event': event, 'payload': payload})
+
+    async def request(self, to: int, action: str, payload: Dict, timeout: float = 10.0):
+        if self._writer is None:
+            raise ClusterError('IPC not connected')
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._send({
+            'op': 'request', 'id': request_id, 'from': self.cluster_id, 'to': to,
+            'action': action, 'payload': payload,
+        })
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _run(self):
+        delay = 1.0
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=_LINE_LIMIT)
+            except OSError as e:
+                logger.debug(f"集群 IPC 连接失败，{delay:.0f} 秒后重试: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            delay = 1.0
+            self._writer = writer
+            self._send({'op': 'hello', 'cluster': self.cluster_id, 'shards': self.shard_ids})
+            self._connected.set()
+            self.connections += 1
+            logger.info(f"🔗 已连接集群 IPC（进程 {self.cluster_id}）")
+            if self.connections > 1 and self.on_reconnect is not None:
+                try:
+                    self.on_reconnect()
+                except Exception as e:
+                    logger.warning(f"集群 IPC 重连后重建缓存失败: {e}")
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self.received += 1
+                    self._dispatch(json.loads(line))
+            except (ConnectionError, ValueError) as e:
+                logger.warning(f"⚠️ 集群 IPC 连接异常: {e}")
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(ClusterError('IPC disconnected'))
+                self._pending.clear()
+            logger.warning("⚠️ 集群 IPC 已断开，正在重连")
+
+    def _dispatch(self, message: Dict):
+        op = message.get('op')
+        if op == 'broadcast':
+            if self.on_broadcast is not None:
+                try:
+                    self.on_broadcast(message['event'], message['payload'])
+                except Exception as e:
+                    logger.warning(f"处理集群广播失败 event={message.get('event')}: {e}")
+        elif op == 'request':
+            task = asyncio.create_task(self._serve(message))
+            self._serving.add(task)
+            task.add_done_callback(self._serving.discard)
+        elif op == 'response':
+            future = self._pending.get(message['id'])
+            if future is None or future.done():
+                return
+            if 'error' in message:
+                future.set_exception(ClusterError(message['error']))
+            else:
+                future.set_result(message.get('result'))
+
+    async def _serve(self, message: Dict):
+        reply = {'op': 'response', 'id': message['id'], 'to': message['from']}
+        handler = self._handlers.get(message.get('action'))
+        if handler is None:
+            reply['error'] = f"unknown action: {message.get('action')}"
+        else:
+            try:
+                reply['result'] = await handler(message['payload'])
+            except Exception as e:
+                logger.error(f"❌ 处理集群请求失败 action={message.get('action')}: {e}")
+                reply['error'] = str(e)
+        self._send(reply)
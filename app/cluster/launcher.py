@@ -0,0 +1,106 @@
+"""集群启动器：把分片分成若干组，每组一个 bot 进程，共用同一个数据库。
+
+launcher 进程本身不连接 gateway，只运行 IPC Hub 并守护子进程（异常退出后按退避重启）。
+子进程通过环境变量得知自己的 CLUSTER_ID / CLUSTER_SHARD_IDS / SHARD_COUNT。
+"""
+import asyncio
+import logging
+import os
+import signal
+import sys
+from typing import Dict, List, Optional
+
+import aiohttp
+
+import config
+from app.cluster.ipc import ClusterHub
+from app.cluster.topology import shard_ids_for_cluster
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_BOT_URL = 'https://discord.com/api/v10/gateway/bot'
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def fetch_recommended_shards(token: str) -> int:
+    """Discord 推荐的分片数（GET /gateway/bot）。"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_BOT_URL, headers={'Authorization': f'Bot {token}'}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return int(data['shards'])
+
+
+def worker_env(cluster_id: int, cluster_count: int, shard_count: int, ipc_port: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        'CLUSTER_ID': str(cluster_id),
+        'CLUSTER_COUNT': str(cluster_count),
+        'CLUSTER_SHARD_IDS': ','.join(map(str, shard_ids_for_cluster(cluster_id, cluster_count, shard_count))),
+        'SHARD_COUNT': str(shard_count),
+        'CLUSTER_IPC_PORT': str(ipc_port),
+    })
+    return env
+
+
+class ClusterLauncher:
+    def __init__(self, cluster_count: int, shard_count: int, command: Optional[List[str]] = None,
+                 ipc_host: str = '127.0.0.1', ipc_port: int = 0):
+        if shard_count < cluster_count:
+            raise ValueError(f"shard_count ({shard_count}) must be >= cluster_count ({cluster_count})")
+        self.cluster_count = cluster_count
+        self.shard_count = shard_count
+        self.command = command or [sys.executable, os.path.join(_ROOT, 'bot.py')]
+        self.hub = ClusterHub(ipc_host, ipc_port)
+        self._processes: Dict[int, asyncio.subprocess.Process] = {}
+        self._stopping = False
+
+    async def run(self):
+        await self.hub.start()
+        logger.info(f"🚀 启动集群：{self.cluster_count} 个进程，{self.shard_count} 个分片")
+        try:
+            await asyncio.gather(*(self._supervise(cluster_id) for cluster_id in range(self.cluster_count)))
+        finally:
+            await self.hub.close()
+
+    async def _supervise(self, cluster_id: int):
+        delay = 1.0
+        while not self._stopping:
+            env = worker_env(cluster_id, self.cluster_count, self.shard_count, self.hub.port)
+            process = await asyncio.create_subprocess_exec(*self.command, env=env, cwd=_ROOT)
+            self._processes[cluster_id] = process
+            logger.info(f"▶️ 集群进程 {cluster_id} 已启动 pid={process.pid} 分片={env['CLUSTER_SHARD_IDS']}")
+            started = asyncio.get_running_loop().time()
+            code = await process.wait()
+            self._processes.pop(cluster_id, None)
+            if self._stopping:
+                return
+            # 运行超过一分钟才退出视为偶发故障，退避重置
+            if asyncio.get_running_loop().time() - started > 60:
+                delay = 1.0
+            logger.warning(f"⚠️ 集群进程 {cluster_id} 退出（code={code}），{delay:.0f} 秒后重启")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+    async def stop(self):
+        self._stopping = True
+        for process in list(self._processes.values()):
+            if process.returncode is None:
+                process.terminate()
+        await asyncio.gather(*(process.wait() for process in list(self._processes.values())), return_exceptions=True)
+
+
+async def main(cluster_count: int, shard_count: Optional[int] = None):
+    if shard_count is None:
+        shard_count = config.SHARD_COUNT or await fetch_recommended_shards(config.DISCORD_TOKEN)
+    shard_count = max(shard_count, cluster_count)
+    launcher = ClusterLauncher(cluster_count, shard_count, ipc_host=config.CLUSTER_IPC_HOST, ipc_port=config.CLUSTER_IPC_PORT)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: asyncio.ensure_future(launcher.stop()))
+        except NotImplementedError:
+            # Windows 不支持 add_signal_handler，Ctrl+C 由 KeyboardInterrupt 处理
+            pass
+    await launcher.run()
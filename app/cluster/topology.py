@@ -0,0 +1,16 @@
+from typing import List
+
+
+def shard_ids_for_cluster(cluster_id: int, cluster_count: int, shard_count: int) -> List[int]:
+    """把 shard_count 个分片连续地分给 cluster_count 个进程，前面的进程多分余数。"""
+    base, extra = divmod(shard_count, cluster_count)
+    start = cluster_id * base + min(cluster_id, extra)
+    size = base + (1 if cluster_id < extra else 0)
+    return list(range(start, start + size))
+
+
+def cluster_for_shard(shard_id: int, cluster_count: int, shard_count: int) -> int:
+    for cluster_id in range(cluster_count):
+        if shard_id in shard_ids_for_cluster(cluster_id, cluster_count, shard_count):
+            return cluster_id
+    raise ValueError(f"shard {shard_id} out of range (shard_count={shard_count})")
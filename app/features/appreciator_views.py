@@ -25,8 +25,8 @@ class AppreciatorApplicationView(discord.ui.View):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            # 获取用户统计信息
-            stats = self.bot.db.get_user_stats(
+            # 获取用户统计信息（预汇总，申请窗口公布后大量点击不再逐次查库）
+            stats = self.bot.appreciator_stats.get(
                 interaction.user.id,
                 interaction.guild_id,
                 include_all_guilds=config.APPRECIATOR_CROSS_GUILD_STATS
@@ -35,8 +35,7 @@ class AppreciatorApplicationView(discord.ui.View):
             # 检查被引荐人数或引荐人数要求（满足其中一个即可）
             featured_ok = stats['featured_count'] >= config.APPRECIATOR_MIN_FEATURED
             referrals_ok = stats['featuring_count'] >= config.APPRECIATOR_MIN_REFERRALS
-            booklist_link = self.bot.db.get_user_booklist_thread_url(interaction.user.id, interaction.guild_id)
-            booklist_ok = bool(booklist_link)
+            booklist_ok = stats['booklist_linked']
             
             stats_scope_label = "全服累计" if config.APPRECIATOR_CROSS_GUILD_STATS else "本服累计"
 
@@ -52,9 +51,13 @@ class AppreciatorApplicationView(discord.ui.View):
                 return
             
             # 检查是否已经有鉴赏家身份
-            # 使用 fetch_member 而不是 get_member，避免缓存问题
+            # 交互自带的 Member 含最新身份组；其次用 gateway 成员缓存，都拿不到时才请求 API
+            member = interaction.user if isinstance(interaction.user, discord.Member) else None
+            if member is None:
+                member = interaction.guild.get_member(interaction.user.id)
             try:
-                member = await interaction.guild.fetch_member(interaction.user.id)
+                if member is None:
+                    member = await interaction.guild.fetch_member(interaction.user.id)
             except discord.NotFound:
                 await interaction.followup.send(
                     "❌ 无法找到您的成员信息，请确认您在服务器中。",
@@ -69,21 +72,15 @@ class AppreciatorApplicationView(discord.ui.View):
                 )
                 return
             
-            if member:
-                for role in member.roles:
-                    if role.name == config.APPRECIATOR_ROLE_NAME:
-                        await interaction.followup.send(
-                            f"❌ 您已经拥有 {config.APPRECIATOR_ROLE_NAME} 身份了！",
-                            ephemeral=True
-                        )
-                        return
+            # 查找鉴赏家角色（按名称的索引随身份组变更事件刷新）
+            appreciator_role = self.bot.role_cache.get(interaction.guild, config.APPRECIATOR_ROLE_NAME)
             
-            # 查找或创建鉴赏家角色
-            appreciator_role = None
-            for role in interaction.guild.roles:
-                if role.name == config.APPRECIATOR_ROLE_NAME:
-                    appreciator_role = role
-                    break
+            if member and appreciator_role and member.get_role(appreciator_role.id):
+                await interaction.followup.send(
+                    f"❌ 您已经拥有 {config.APPRECIATOR_ROLE_NAME} 身份了！",
+                    ephemeral=True
+                )
+                return
             
             if not appreciator_role:
                 # 创建鉴赏家角色
@@ -1,13 +1,190 @@
 import asyncio
 import logging
+from typing import Optional
 
 import discord
 
 import config
 from app.utils.permissions import can_manage_thread_feature
+from app.utils.text import truncate
 
 logger = logging.getLogger(__name__)
 
+async def publish_feature(interaction: discord.Interaction, bot, db, message: discord.Message,
+                          thread_id: int, reason: str, embed: discord.Embed) -> Optional[bool]:
+    """發送精選通知並寫入精選記錄。返回 True 表示成功，False 表示該留言已被精選，
+    None 表示寫入出錯（已撤回通知並以 followup 告知用戶，調用方無需再回應）。
+
+    資料庫插入在工作線程中與通知發送並行；機器人消息 ID 直接取自 interaction 的 original response，
+    不再等待後掃描頻道歷史。插入失敗時撤回剛發送的通知。
+    """
+    insert = asyncio.create_task(asyncio.to_thread(
+        db.add_featured_message,
+        guild_id=interaction.guild_id,
+        thread_id=thread_id,
+        message_id=message.id,
+        author_id=message.author.id,
+        author_name=message.author.display_name,
+        featured_by_id=interaction.user.id,
+        featured_by_name=interaction.user.display_name,
+        reason=reason,
+    ))
+
+    try:
+        # 在訊息內容中 @ 留言者，這樣會真正觸發 Discord 的 @ 通知
+        await interaction.response.send_message(content=f"{message.author.mention}", embed=embed)
+    except Exception:
+        # 通知沒發出去，撤回已寫入的記錄
+        try:
+            inserted = await insert
+        except Exception as e:
+            logger.error(f"❌ 寫入精選記錄失敗: {e}")
+            inserted = False
+        if inserted:
+            await asyncio.to_thread(db.remove_featured_message, message.id, thread_id)
+        raise
+
+    bot_message = None
+    try:
+        bot_message = await interaction.original_response()
+    except discord.HTTPException as e:
+        logger.warning(f"⚠️ 無法獲取機器人消息ID: {e}")
+
+    try:
+        inserted = await insert
+    except Exception as e:
+        # 通知已經發出（interaction 已回應），不能讓異常傳回調用方再 send_message：撤回通知後用 followup 告知
+        logger.error(f"❌ 寫入精選記錄失敗，撤回精選通知: {e}")
+        if bot_message is not None:
+            try:
+                await bot_message.delete()
+            except discord.HTTPException as delete_error:
+                logger.warning(f"⚠️ 撤回精選通知失敗: {delete_error}")
+        try:
+            await interaction.followup.send("❌ 精選記錄寫入失敗，已撤回通知，請稍後重試。", ephemeral=True)
+        except discord.HTTPException as followup_error:
+            logger.warning(f"⚠️ 發送精選失敗提示失敗: {followup_error}")
+        return None
+
+    if not inserted:
+        if bot_message is not None:
+            try:
+                await bot_message.delete()
+            except discord.HTTPException as e:
+                logger.warning(f"⚠️ 撤回重複的精選通知失敗: {e}")
+        return False
+
+    if bot_message is not None:
+        await asyncio.to_thread(db.set_featured_bot_message_id, thread_id, message.id, bot_message.id)
+
+    # 記錄帖子元數據，之後列表即使帖子歸檔也能顯示標題
+    if isinstance(interaction.channel, discord.Thread):
+        bot.thread_metadata.remember(interaction.channel)
+    return True
+
+class BulkFeatureView(discord.ui.View):
+    """批量精選：從帖子近期留言中多選，一次寫入並發送一條合併通知"""
+
+    def __init__(self, bot, db, invoker_id: int, thread_id: int, candidates: list, reason: str = None):
+        super().__init__(timeout=config.VIEW_TIMEOUT)
+        self.bot = bot
+        self.db = db
+        self.invoker_id = invoker_id
+        self.thread_id = thread_id
+        self.reason = reason
+        self.candidates = {message.id: message for message in candidates}
+
+        self.select = discord.ui.Select(
+            placeholder="選擇要精選的留言（可多選）",
+            min_values=1,
+            max_values=len(candidates),
+            options=[
+                discord.SelectOption(
+                    label=truncate(f"{message.author.display_name}: {' '.join(message.content.split())}", 100),
+                    value=str(message.id),
+                    description=message.created_at.strftime('%m-%d %H:%M'),
+                )
+                for message in candidates
+            ],
+        )
+        self.select.callback = self.on_select
+        self.add_item(self.select)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.invoker_id:
+            await interaction.response.send_message("❌ 只有發起批量精選的用戶可以操作。", ephemeral=True)
+            return False
+        return True
+
+    async def on_select(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+
+    @discord.ui.button(label="確認精選", style=discord.ButtonStyle.success, emoji="🌟", row=1)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        selected = [self.candidates[int(value)] for value in self.select.values if int(value) in self.candidates]
+        if not selected:
+            await interaction.response.send_message("❌ 請先在選單中選擇要精選的留言。", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+        self.stop()
+
+        # 一個事務寫入全部精選記錄；並發期間已被精選的留言會被跳過
+        inserted = set(await asyncio.to_thread(
+            self.db.add_featured_messages_bulk,
+            interaction.guild_id,
+            self.thread_id,
+            interaction.user.id,
+            interaction.user.display_name,
+            [
+                {'message_id': m.id, 'author_id': m.author.id, 'author_name': m.author.display_name}
+                for m in selected
+            ],
+            self.reason,
+        ))
+        featured = [m for m in selected if m.id in inserted]
+        if not featured:
+            await interaction.edit_original_response(content="❌ 所選留言都已經被精選過了。", view=None)
+            return
+
+        embed = build_bulk_feature_embed(featured, interaction.user.display_name, self.reason)
+        mentions = " ".join(dict.fromkeys(m.author.mention for m in featured))
+        try:
+            announcement = await interaction.channel.send(content=mentions, embed=embed)
+            await asyncio.to_thread(
+                self.db.set_featured_bot_message_ids, self.thread_id, [m.id for m in featured], announcement.id
+            )
+        except discord.HTTPException as e:
+            logger.warning(f"⚠️ 批量精選通知發送失敗: {e}")
+
+        if isinstance(interaction.channel, discord.Thread):
+            self.bot.thread_metadata.remember(interaction.channel)
+
+        skipped = len(selected) - len(featured)
+        summary = f"✅ 已精選 {len(featured)} 則留言"
+        if skipped:
+            summary += f"（{skipped} 則已被精選，已跳過）"
+        await interaction.edit_original_response(content=summary, view=None)
+        logger.info(f"✅ 用戶 {interaction.user.name} 批量精選了 {len(featured)} 則留言（帖子 {self.thread_id}）")
+
+
+def build_bulk_feature_embed(messages: list, featured_by_name: str, reason: str = None) -> discord.Embed:
+    """批量精選的合併通知"""
+    lines = [
+        f"{i}. **{m.author.display_name}** — [點擊查看]({m.jump_url})"
+        for i, m in enumerate(messages, 1)
+    ]
+    embed = discord.Embed(
+        title="🌟 留言精選",
+        description=f"{len(messages)} 則留言被設為精選！\n\n" + "\n".join(lines),
+        color=discord.Color.gold(),
+        timestamp=discord.utils.utcnow()
+    )
+    embed.add_field(name="精選者", value=featured_by_name, inline=True)
+    if reason:
+        embed.add_field(name="精選原因", value=reason, inline=False)
+    return embed
+
 class UnfeatureConfirmView(discord.ui.View):
     """取消精選確認視圖"""
     
@@ -35,7 +212,8 @@ class UnfeatureConfirmView(discord.ui.View):
             
             # 嘗試刪除機器人的精選消息
             bot_message_deleted = False
-            if featured_info.get('bot_message_id'):
+            # 批量精選共用一條合併通知，其他記錄仍引用時保留
+            if featured_info.get('bot_message_id') and self.db.count_featured_by_bot_message(featured_info['bot_message_id']) <= 1:
                 try:
                     bot_message = await interaction.channel.fetch_message(featured_info['bot_message_id'])
                     await bot_message.delete()
@@ -144,7 +322,7 @@ class FeatureMessageModal(discord.ui.Modal):
         """表單提交處理"""
         try:
             # 再次檢查該留言是否已被精選（防止重複提交）
-            if self.db.is_already_featured(self.thread_id, self.message.id):
+            if self.bot.featured_index.contains(self.thread_id, self.message.id):
                 await interaction.response.send_message(
                     "❌ 這則留言已經被精選過了！同一則留言不能重複精選。",
                     ephemeral=True
@@ -182,42 +360,13 @@ class FeatureMessageModal(discord.ui.Modal):
             
             embed.set_footer(text=f"留言ID: {self.message.id}")
             
-            # 在訊息內容中 @ 留言者，這樣會真正觸發 Discord 的 @ 通知
-            await interaction.response.send_message(content=f"{self.message.author.mention}", embed=embed)
-            
-            # 等待一下让消息发送完成，然后获取机器人发送的消息ID
-            await asyncio.sleep(0.5)
-            
-            # 获取机器人发送的最新消息ID
-            bot_message_id = None
-            try:
-                # 获取频道的最新消息
-                async for bot_msg in interaction.channel.history(limit=10):
-                    if bot_msg.author.id == self.bot.user.id and bot_msg.embeds:
-                        # 检查是否是精选消息（通过检查embed标题）
-                        if bot_msg.embeds[0].title == "🌟 留言精選":
-                            bot_message_id = bot_msg.id
-                            break
-            except Exception as e:
-                logger.warning(f"⚠️ 無法獲取機器人消息ID: {e}")
-            
-            # 添加精選記錄（包含機器人消息ID）
-            success = self.db.add_featured_message(
-                guild_id=interaction.guild_id,
-                thread_id=self.thread_id,
-                message_id=self.message.id,
-                author_id=self.message.author.id,
-                author_name=self.message.author.display_name,
-                featured_by_id=interaction.user.id,
-                featured_by_name=interaction.user.display_name,
-                reason=reason,
-                bot_message_id=bot_message_id
-            )
-            
+            success = await publish_feature(interaction, self.bot, self.db, self.message, self.thread_id, reason, embed)
+            if success is None:
+                return
             if not success:
                 await interaction.followup.send("❌ 精選失敗，這則留言可能已經被精選過了。", ephemeral=True)
                 return
-            
+
             # 記錄成功
             logger.info(f"✅ 用戶 {interaction.user.name} 成功精選了 {self.message.author.display_name} 的留言")
             
@@ -1,6 +1,4 @@
-import asyncio
 import logging
-import re
 from datetime import datetime
 
 import discord
@@ -8,10 +6,15 @@ from discord import app_commands
 from discord.ext import commands
 
 import config
+from app.bot.auto_defer import auto_defer, respond
 from app.bot.client import FeaturedMessageBot
+from app.bot.command_sync import sync_command_tree
+from app.features.feature_actions import publish_feature
+from app.features.message_quality import MessageQualityRules
 from app.features.featured_views import (
     AllFeaturedMessagesView,
     AppreciatorApplicationView,
+    BulkFeatureView,
     EnhancedRankingView,
     FeaturedRecordsView,
     FeatureMessageModal,
@@ -19,7 +22,7 @@ from app.features.featured_views import (
     UnfeatureConfirmView,
 )
 from app.utils.discord_links import extract_message_id_from_url
-from app.utils.permissions import can_manage_thread_feature
+from app.utils.permissions import can_manage_thread_feature, has_admin_permission
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +32,8 @@ class FeaturedCommands(commands.Cog):
     def __init__(self, bot: FeaturedMessageBot):
         self.bot = bot
         self.db = bot.db
+        # 每服已編譯的留言質量規則，設置變更時由數據庫寫入事件失效（監聽隨 Cog 載入/卸載註冊與移除）
+        self.quality_rules = MessageQualityRules(self.db)
         
         # 註冊 Message Context Menu
         context_menu = app_commands.ContextMenu(
@@ -53,67 +58,21 @@ class FeaturedCommands(commands.Cog):
         )
         self.bot.tree.add_command(points_menu)
         logger.info(f"✅ 已註冊 Context Menu: {points_menu.name}")
+
+    async def cog_load(self):
+        self.db.add_write_listener(self.quality_rules.on_db_write)
+
+    async def cog_unload(self):
+        self.db.remove_write_listener(self.quality_rules.on_db_write)
     
     def extract_message_id_from_url(self, url: str) -> int:
         """从Discord消息URL中提取消息ID"""
         return extract_message_id_from_url(url)
     
     def check_message_quality(self, message) -> dict:
-        """检查留言内容质量"""
-        # 检查是否为bot消息或包含embed
-        if message.author.bot or message.embeds:
-            return {'valid': False, 'reason': '不能精选bot消息或系统消息！'}
-        
-        # 获取文字内容
-        content = message.content.strip()
-        
-        # 检查是否为空
-        if not content:
-            return {'valid': False, 'reason': '留言内容不能为空！'}
-        
-        # 检查长度（最少字符数）
-        if len(content) < config.MIN_MESSAGE_LENGTH:
-            return {'valid': False, 'reason': f'留言内容至少需要{config.MIN_MESSAGE_LENGTH}个字符！'}
-        
-        # 检查长度（最大字符数）
-        if config.MAX_MESSAGE_LENGTH > 0 and len(content) > config.MAX_MESSAGE_LENGTH:
-            return {'valid': False, 'reason': f'留言内容不能超过{config.MAX_MESSAGE_LENGTH}个字符！'}
-        
-        # 检查是否有贴纸
-        if message.stickers:
-            return {'valid': False, 'reason': '不能精选只包含贴纸的留言！'}
-        
-        # 检查是否只包含表情符号
-        # 移除所有表情符号和空白字符
-        text_only = content
-        # 移除Discord表情符号格式 <:name:id>
-        import re
-        text_only = re.sub(r'<a?:[^:]+:\d+>', '', text_only)
-        # 移除Unicode表情符号
-        text_only = re.sub(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\U00002600-\U000027BF\U0001F900-\U0001F9FF]', '', text_only)
-        # 移除空白字符
-        text_only = text_only.strip()
-        
-        if not text_only:
-            return {'valid': False, 'reason': '留言不能只包含表情符号！'}
-        
-        # 检查是否只包含重复字符
-        if len(set(text_only)) <= 2 and len(text_only) > 5:
-            return {'valid': False, 'reason': '留言内容过于简单，请提供更有价值的回复！'}
-        
-        # 检查是否包含常见垃圾内容
-        spam_patterns = [
-            r'^[^\w\s]*$',  # 只包含特殊字符
-            r'^[a-zA-Z]{1,3}$',  # 只有1-3个字母
-            r'^[0-9]{1,3}$',  # 只有1-3个数字
-            r'^[^\w\s]{3,}$',  # 3个以上特殊字符
-        ]
-        
-        for pattern in spam_patterns:
-            if re.match(pattern, content):
-                return {'valid': False, 'reason': '留言内容不符合精选标准！'}
-        
-        return {'valid': True, 'reason': '内容检查通过'}
+        """检查留言内容质量（按所在服务器的规则）"""
+        guild_id = message.guild.id if message.guild else None
+        return self.quality_rules.check(message, guild_id)
     
     async def context_feature_message(self, interaction: discord.Interaction, message: discord.Message):
         """Message Context Menu 精選留言回調"""
@@ -146,7 +105,7 @@ class FeaturedCommands(commands.Cog):
                 return
             
             # 檢查該留言是否已被精選（同一則不可重複）
-            if self.db.is_already_featured(thread_id, message.id):
+            if self.bot.featured_index.contains(thread_id, message.id):
                 await interaction.response.send_message(
                     "❌ 這則留言已經被精選過了！同一則留言不能重複精選。",
                     ephemeral=True
@@ -250,6 +209,7 @@ class FeaturedCommands(commands.Cog):
             
             # 精选记录默认私密回覆，避免洗版
             await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+            view.schedule_prefetch()
             
         except Exception as e:
             logger.error(f"右鍵查看精選紀錄時發生錯誤: {e}")
@@ -308,7 +268,7 @@ class FeaturedCommands(commands.Cog):
                 return
             
             # 检查该留言是否已被精选（同一则不可重复）
-            if self.db.is_already_featured(thread_id, message.id):
+            if self.bot.featured_index.contains(thread_id, message.id):
                 await interaction.response.send_message(
                     "❌ 这则留言已经被精选过了！同一则留言不能重复精选。",
                     ephemeral=True
@@ -344,40 +304,11 @@ class FeaturedCommands(commands.Cog):
             
             embed.set_footer(text=f"留言ID: {message.id}")
             
-            # 在訊息內容中 @ 留言者，這樣會真正觸發 Discord 的 @ 通知
-            await interaction.response.send_message(content=f"{message.author.mention}", embed=embed)
-            
-            # 等待一下让消息发送完成，然后获取机器人发送的消息ID
-            await asyncio.sleep(0.5)
-            
-            # 获取机器人发送的最新消息ID
-            bot_message_id = None
-            try:
-                # 获取频道的最新消息
-                async for bot_msg in interaction.channel.history(limit=10):
-                    if bot_msg.author.id == self.bot.user.id and bot_msg.embeds:
-                        # 检查是否是精选消息（通过检查embed标题）
-                        if bot_msg.embeds[0].title == "🌟 留言精选":
-                            bot_message_id = bot_msg.id
-                            break
-            except Exception as e:
-                logger.warning(f"⚠️ 无法获取机器人消息ID: {e}")
-            
-            # 添加精选记录（包含机器人消息ID）
-            success = self.db.add_featured_message(
-                guild_id=interaction.guild_id,
-                thread_id=thread_id,
-                message_id=message.id,
-                author_id=message.author.id,
-                author_name=message.author.display_name,
-                featured_by_id=interaction.user.id,
-                featured_by_name=interaction.user.display_name,
-                reason=reason,
-                bot_message_id=bot_message_id
-            )
-            
+            success = await publish_feature(interaction, self.bot, self.db, message, thread_id, reason, embed)
+            if success is None:
+                return
             if not success:
-                await interaction.response.send_message("❌ 精选失败，这则留言可能已经被精选过了。", ephemeral=True)
+                await interaction.followup.send("❌ 精选失败，这则留言可能已经被精选过了。", ephemeral=True)
                 return
             
         except Exception as e:
@@ -392,6 +323,56 @@ class FeaturedCommands(commands.Cog):
                 logger.error(f"发送错误消息时发生错误: {followup_error}")
                 # 如果連 followup 都失敗，就記錄錯誤但不拋出異常
     
+    @message_group.command(name="批量精选", description="从本帖近期留言中多选精选，合并为一条通知（仅楼主或版主可用）")
+    @app_commands.describe(reason="精选原因（可选，所有选中的留言共用）")
+    async def bulk_feature_messages(self, interaction: discord.Interaction, reason: str = None):
+        """批量精選命令：一次掃描近期留言，統一校驗後多選精選"""
+        logger.info(f"🔍 用户 {interaction.user.name} (ID: {interaction.user.id}) 在群组 {interaction.guild.name} (ID: {interaction.guild.id}) 使用了 /留言 批量精选 命令")
+
+        try:
+            if not interaction.channel.type == discord.ChannelType.public_thread:
+                await interaction.response.send_message("❌ 此命令只能在帖子中使用！", ephemeral=True)
+                return
+
+            if not can_manage_thread_feature(interaction.user, interaction.channel, config.ADMIN_ROLE_NAMES):
+                await interaction.response.send_message("❌ 只有楼主或版主才能精选留言！", ephemeral=True)
+                return
+
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+            # 一次 REST 请求取近期留言，随后在内存中一次性校验（已精选用内存索引判断）
+            recent = [m async for m in interaction.channel.history(limit=config.BULK_FEATURE_SCAN_LIMIT)]
+            featured_ids = self.bot.featured_index.featured_in(interaction.channel.id, (m.id for m in recent))
+            candidates = [
+                m for m in recent
+                if m.author.id != interaction.user.id
+                and m.id not in featured_ids
+                and self.check_message_quality(m)['valid']
+            ][:25]  # 下拉选单最多 25 项
+
+            if not candidates:
+                await interaction.followup.send(
+                    f"❌ 最近 {config.BULK_FEATURE_SCAN_LIMIT} 条留言中没有可精选的留言。", ephemeral=True
+                )
+                return
+
+            view = BulkFeatureView(self.bot, self.db, interaction.user.id, interaction.channel.id, candidates, reason)
+            await interaction.followup.send(
+                f"📋 共 {len(candidates)} 条可精选的留言（最近 {config.BULK_FEATURE_SCAN_LIMIT} 条中，已排除已精选、自己的留言与不符合标准的留言），选择后点击「確認精選」。",
+                view=view,
+                ephemeral=True
+            )
+
+        except Exception as e:
+            logger.error(f"批量精选时发生错误: {e}")
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message("❌ 批量精选时发生错误，请稍后重试。", ephemeral=True)
+                else:
+                    await interaction.followup.send("❌ 批量精选时发生错误，请稍后重试。", ephemeral=True)
+            except Exception as followup_error:
+                logger.error(f"发送错误消息时发生错误: {followup_error}")
+    
     @message_group.command(name="精选取消", description="取消指定留言的精选状态（仅楼主可用）")
     @app_commands.describe(
         message_url="要取消精选的留言URL（右键留言 -> 复制链接）"
@@ -430,7 +411,8 @@ class FeaturedCommands(commands.Cog):
             
             # 尝试删除机器人的精选消息
             bot_message_deleted = False
-            if featured_info.get('bot_message_id'):
+            # 批量精选共用一条合并通知，其他记录仍引用时保留
+            if featured_info.get('bot_message_id') and self.db.count_featured_by_bot_message(featured_info['bot_message_id']) <= 1:
                 try:
                     bot_message = await interaction.channel.fetch_message(featured_info['bot_message_id'])
                     await bot_message.delete()
@@ -494,11 +476,87 @@ class FeaturedCommands(commands.Cog):
             except Exception as followup_error:
                 logger.error(f"发送错误消息时发生错误: {followup_error}")
                 
+    @message_group.command(name="同步指令", description="强制把指令列表同步到 Discord（管理组，指令未更新时使用）")
+    async def force_command_sync(self, interaction: discord.Interaction):
+        """無視指令樹哈希，強制同步"""
+        logger.info(f"🔍 用户 {interaction.user.name} (ID: {interaction.user.id}) 在群组 {interaction.guild.name} (ID: {interaction.guild.id}) 使用了 /留言 同步指令 命令")
+
+        if not isinstance(interaction.user, discord.Member) or not has_admin_permission(interaction.user, config.ADMIN_ROLE_NAMES):
+            await interaction.response.send_message("❌ 此命令僅限管理組使用！", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            scopes = await sync_command_tree(self.bot, force=True)
+            await interaction.followup.send(f"✅ 已强制同步指令（{scopes} 个范围），客户端可能需要几分钟才会更新。", ephemeral=True)
+        except discord.HTTPException as e:
+            logger.error(f"强制同步指令失败: {e}")
+            await interaction.followup.send("❌ 同步指令失败，请稍后重试", ephemeral=True)
+
+    @message_group.command(name="精选标准", description="查看或调整本服留言精选的内容标准（管理组，即时生效）")
+    @app_commands.describe(
+        min_length="最少字符数",
+        max_length="最多字符数（0 表示不限制）",
+        reject_emoji_only="是否拒绝只含表情的留言",
+        repeat_max_distinct="去掉表情后不同字符数不超过此值视为重复内容（0 表示不检查）",
+        reset="恢复默认标准"
+    )
+    async def quality_settings(self, interaction: discord.Interaction,
+                               min_length: app_commands.Range[int, 0, 2000] = None,
+                               max_length: app_commands.Range[int, 0, 4000] = None,
+                               reject_emoji_only: bool = None,
+                               repeat_max_distinct: app_commands.Range[int, 0, 20] = None,
+                               reset: bool = False):
+        """查看/調整本服精選內容標準"""
+        logger.info(f"🔍 用户 {interaction.user.name} (ID: {interaction.user.id}) 在群组 {interaction.guild.name} (ID: {interaction.guild.id}) 使用了 /留言 精选标准 命令")
+
+        if not isinstance(interaction.user, discord.Member) or not has_admin_permission(interaction.user, config.ADMIN_ROLE_NAMES):
+            await interaction.response.send_message("❌ 此命令僅限管理組使用！", ephemeral=True)
+            return
+
+        try:
+            if reset:
+                self.db.reset_message_quality_settings(interaction.guild_id)
+            elif any(value is not None for value in (min_length, max_length, reject_emoji_only, repeat_max_distinct)):
+                self.db.set_message_quality_settings(
+                    interaction.guild_id,
+                    min_length=min_length,
+                    max_length=max_length,
+                    reject_emoji_only=reject_emoji_only,
+                    repeat_max_distinct=repeat_max_distinct,
+                )
+
+            settings = self.quality_rules.effective_settings(interaction.guild_id)
+            embed = discord.Embed(
+                title="📏 本服精选标准",
+                color=discord.Color.blurple(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed.add_field(name="最少字符数", value=str(settings['min_length']), inline=True)
+            embed.add_field(
+                name="最多字符数",
+                value=str(settings['max_length']) if settings['max_length'] > 0 else "不限制",
+                inline=True
+            )
+            embed.add_field(name="拒绝只含表情", value="是" if settings['reject_emoji_only'] else "否", inline=True)
+            embed.add_field(
+                name="重复内容判定",
+                value=f"不同字符 ≤ {settings['repeat_max_distinct']}" if settings['repeat_max_distinct'] else "不检查",
+                inline=True
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+        except Exception as e:
+            logger.error(f"设置精选标准时发生错误: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("❌ 设置精选标准时发生错误，请稍后重试。", ephemeral=True)
+    
     @message_group.command(name="总排行", description="查看引荐人数排行榜（管理组，支持时间范围）")
     @app_commands.describe(
         start_date="起始日期（可选，格式：YYYY-MM-DD，例如：2024-01-01）",
         end_date="结束日期（可选，格式：YYYY-MM-DD，例如：2024-12-31）"
     )
+    @auto_defer()
     async def total_ranking(self, interaction: discord.Interaction, start_date: str = None, end_date: str = None):
         """查看總排行榜命令（僅管理組可用）- 支持引薦人數排行，支持時間範圍"""
         # 记录命令使用
@@ -521,7 +579,7 @@ class FeaturedCommands(commands.Cog):
                                 interaction.user.guild_permissions.administrator
             
             if not has_admin_role:
-                await interaction.response.send_message("❌ 此命令僅限管理組使用！", ephemeral=True)
+                await respond(interaction, "❌ 此命令僅限管理組使用！", ephemeral=True)
                 return
             
             # 验证日期格式
@@ -529,14 +587,14 @@ class FeaturedCommands(commands.Cog):
                 try:
                     datetime.strptime(start_date, '%Y-%m-%d')
                 except ValueError:
-                    await interaction.response.send_message("❌ 起始日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-01-01", ephemeral=True)
+                    await respond(interaction, "❌ 起始日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-01-01", ephemeral=True)
                     return
             
             if end_date:
                 try:
                     datetime.strptime(end_date, '%Y-%m-%d')
                 except ValueError:
-                    await interaction.response.send_message("❌ 結束日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-12-31", ephemeral=True)
+                    await respond(interaction, "❌ 結束日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-12-31", ephemeral=True)
                     return
             
             # 創建增強排行榜視圖（預設為引薦排行）
@@ -545,19 +603,17 @@ class FeaturedCommands(commands.Cog):
             # 獲取嵌入訊息
             embed = await view.get_ranking_embed()
             
-            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+            await respond(interaction, embed=embed, view=view, ephemeral=True)
             
         except Exception as e:
             logger.error(f"查看總排行榜时发生错误: {e}")
             try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ 查看總排行榜时发生错误，请稍后重试。", ephemeral=True)
-                else:
-                    await interaction.followup.send("❌ 查看總排行榜时发生错误，请稍后重试。", ephemeral=True)
+                await respond(interaction, "❌ 查看總排行榜时发生错误，请稍后重试。", ephemeral=True)
             except Exception as followup_error:
                 logger.error(f"发送错误消息时发生错误: {followup_error}")
     
     @message_group.command(name="精选记录", description="查看用户精选记录与引荐统计（如果没有指定用户，默认查看自己）")
+    @auto_defer()
     async def check_featured_stats(self, interaction: discord.Interaction, user: discord.Member = None):
         """查看精選紀錄命令（支持查看其他用戶）"""
         # 记录命令使用
@@ -578,18 +634,15 @@ class FeaturedCommands(commands.Cog):
             embed = await view.get_records_embed()
             
             # 精选记录默认私密回覆，避免洗版
-            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+            await respond(interaction, embed=embed, view=view, ephemeral=True)
+            view.schedule_prefetch()
             
         except Exception as e:
             logger.error(f"查看精選紀錄時發生錯誤: {e}")
-            # 檢查是否已經回應過
-            if not interaction.response.is_done():
-                await interaction.response.send_message("❌ 查看精選紀錄時發生錯誤，請稍後重試。", ephemeral=True)
-            else:
-                # 如果已經回應過，使用 followup
-                await interaction.followup.send("❌ 查看精選紀錄時發生錯誤，請稍後重試。", ephemeral=True)
+            await respond(interaction, "❌ 查看精選紀錄時發生錯誤，請稍後重試。", ephemeral=True)
     
     @message_group.command(name="帖子统计", description="查看当前帖子的精选统计（仅自己可见）")
+    @auto_defer()
     async def thread_stats(self, interaction: discord.Interaction):
         """查看帖子统计命令（隱藏回應）"""
         # 记录命令使用
@@ -598,7 +651,7 @@ class FeaturedCommands(commands.Cog):
         try:
             # 检查是否在帖子中
             if not interaction.channel.type == discord.ChannelType.public_thread:
-                await interaction.response.send_message("❌ 此命令只能在帖子中使用！", ephemeral=True)
+                await respond(interaction, "❌ 此命令只能在帖子中使用！", ephemeral=True)
                 return
             
             thread_id = interaction.channel.id
@@ -610,19 +663,14 @@ class FeaturedCommands(commands.Cog):
             embed = await view.get_stats_embed()
             
             # 使用 ephemeral=True 讓回應只有使用者自己可見
-            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+            await respond(interaction, embed=embed, view=view, ephemeral=True)
             
         except Exception as e:
             logger.error(f"查看帖子统计时发生错误: {e}")
-            # 檢查是否已經回應過
             try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ 查看帖子统计时发生错误，请稍后重试。", ephemeral=True)
-                else:
-                    await interaction.followup.send("❌ 查看帖子统计时发生错误，请稍后重试。", ephemeral=True)
+                await respond(interaction, "❌ 查看帖子统计时发生错误，请稍后重试。", ephemeral=True)
             except Exception as followup_error:
                 logger.error(f"发送错误消息时发生错误: {followup_error}")
-                # 如果連 followup 都失敗，就記錄錯誤但不拋出異常
     
 
 
@@ -703,6 +751,7 @@ class FeaturedCommands(commands.Cog):
         start_date="起始日期（可选，格式：YYYY-MM-DD，例如：2024-01-01）",
         end_date="结束日期（可选，格式：YYYY-MM-DD，例如：2024-12-31）"
     )
+    @auto_defer()
     async def all_featured_messages(self, interaction: discord.Interaction, start_date: str = None, end_date: str = None):
         """查看全服精選留言命令（仅管理组可用）"""
         # 记录命令使用
@@ -720,7 +769,7 @@ class FeaturedCommands(commands.Cog):
                 has_admin_role = interaction.user.guild_permissions.manage_messages or \
                                 interaction.user.guild_permissions.administrator
             if not has_admin_role:
-                await interaction.response.send_message("❌ 此命令仅限管理组使用！", ephemeral=True)
+                await respond(interaction, "❌ 此命令仅限管理组使用！", ephemeral=True)
                 return
             
             # 验证日期格式
@@ -728,14 +777,14 @@ class FeaturedCommands(commands.Cog):
                 try:
                     datetime.strptime(start_date, '%Y-%m-%d')
                 except ValueError:
-                    await interaction.response.send_message("❌ 起始日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-01-01", ephemeral=True)
+                    await respond(interaction, "❌ 起始日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-01-01", ephemeral=True)
                     return
             
             if end_date:
                 try:
                     datetime.strptime(end_date, '%Y-%m-%d')
                 except ValueError:
-                    await interaction.response.send_message("❌ 結束日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-12-31", ephemeral=True)
+                    await respond(interaction, "❌ 結束日期格式錯誤！請使用 YYYY-MM-DD 格式，例如：2024-12-31", ephemeral=True)
                     return
             
             # 創建全服精選留言視圖（預設為時間排序）
@@ -744,14 +793,12 @@ class FeaturedCommands(commands.Cog):
             # 獲取嵌入訊息
             embed = await view.get_messages_embed(interaction)
             
-            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+            await respond(interaction, embed=embed, view=view, ephemeral=True)
+            view.schedule_prefetch()
             
         except Exception as e:
             logger.error(f"查看全服精選留言时发生错误: {e}")
             try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ 查看全服精選留言时发生错误，请稍后重试。", ephemeral=True)
-                else:
-                    await interaction.followup.send("❌ 查看全服精選留言时发生错误，请稍后重试。", ephemeral=True)
+                await respond(interaction, "❌ 查看全服精選留言时发生错误，请稍后重试。", ephemeral=True)
             except Exception as followup_error:
                 logger.error(f"发送错误消息时发生错误: {followup_error}")
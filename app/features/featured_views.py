@@ -1,11 +1,12 @@
 from app.features.appreciator_views import AppreciatorApplicationView
-from app.features.feature_actions import FeatureMessageModal, UnfeatureConfirmView
+from app.features.feature_actions import BulkFeatureView, FeatureMessageModal, UnfeatureConfirmView
 from app.features.record_views import EnhancedRankingView, FeaturedRecordsView
 from app.features.stats_views import AllFeaturedMessagesView, ThreadStatsView
 
 __all__ = [
     "AllFeaturedMessagesView",
     "AppreciatorApplicationView",
+    "BulkFeatureView",
     "EnhancedRankingView",
     "FeaturedRecordsView",
     "FeatureMessageModal",
@@ -0,0 +1,118 @@
+import logging
+import re
+from typing import Dict, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# 正则只在导入时编译一次
+# Discord 自定义表情 <:name:id> / <a:name:id> 与常见 Unicode 表情区段
+_EMOJI_RE = re.compile(
+    r'<a?:[^:]+:\d+>'
+    r'|[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF'
+    r'\U00002600-\U000027BF\U0001F900-\U0001F9FF]'
+)
+# 常见垃圾内容：只有特殊字符 / 只有 1-3 个字母 / 只有 1-3 个数字
+_SPAM_RE = re.compile(r'[^\w\s]*|[a-zA-Z]{1,3}|[0-9]{1,3}')
+
+def default_quality_settings() -> Dict:
+    """可按服务器调整的规则项及其 config 默认值"""
+    return {
+        'min_length': config.MIN_MESSAGE_LENGTH,
+        'max_length': config.MAX_MESSAGE_LENGTH,
+        'reject_emoji_only': config.QUALITY_REJECT_EMOJI_ONLY,
+        'repeat_max_distinct': config.QUALITY_REPEAT_MAX_DISTINCT,
+    }
+
+
+# 判定结果预先生成，调用方只读
+_PASSED = {'valid': True, 'reason': '内容检查通过'}
+_REJECT_BOT = {'valid': False, 'reason': '不能精选bot消息或系统消息！'}
+_REJECT_EMPTY = {'valid': False, 'reason': '留言内容不能为空！'}
+_REJECT_STICKER = {'valid': False, 'reason': '不能精选只包含贴纸的留言！'}
+_REJECT_EMOJI_ONLY = {'valid': False, 'reason': '留言不能只包含表情符号！'}
+_REJECT_REPEAT = {'valid': False, 'reason': '留言内容过于简单，请提供更有价值的回复！'}
+_REJECT_SPAM = {'valid': False, 'reason': '留言内容不符合精选标准！'}
+
+
+class CompiledQualityRules:
+    """一个服务器的已编译规则；check() 对内容只做一次表情剥离，其余规则共用结果。"""
+
+    __slots__ = ('min_length', 'max_length', 'reject_emoji_only', 'repeat_max_distinct',
+                 '_too_short', '_too_long')
+
+    def __init__(self, settings: Dict):
+        self.min_length = max(0, int(settings['min_length']))
+        self.max_length = max(0, int(settings['max_length']))
+        self.reject_emoji_only = bool(settings['reject_emoji_only'])
+        self.repeat_max_distinct = max(0, int(settings['repeat_max_distinct']))
+        self._too_short = {'valid': False, 'reason': f'留言内容至少需要{self.min_length}个字符！'}
+        self._too_long = {'valid': False, 'reason': f'留言内容不能超过{self.max_length}个字符！'}
+
+    def check(self, message) -> dict:
+        # 检查是否为bot消息或包含embed
+        if message.author.bot or message.embeds:
+            return _REJECT_BOT
+
+        content = message.content.strip()
+        if not content:
+            return _REJECT_EMPTY
+
+        length = len(content)
+        if length < self.min_length:
+            return self._too_short
+        if self.max_length > 0 and length > self.max_length:
+            return self._too_long
+
+        if message.stickers:
+            return _REJECT_STICKER
+
+        # 去掉表情后的文字，供「只含表情」与「重复字符」两条规则共用
+        text_only = _EMOJI_RE.sub('', content).strip()
+        if self.reject_emoji_only and not text_only:
+            return _REJECT_EMOJI_ONLY
+
+        if self.repeat_max_distinct and len(text_only) > 5 and len(set(text_only)) <= self.repeat_max_distinct:
+            return _REJECT_REPEAT
+
+        # 只含表情且本服允许时，不再按「只有特殊字符」判为垃圾内容
+        if text_only and _SPAM_RE.fullmatch(content):
+            return _REJECT_SPAM
+
+        return _PASSED
+
+
+class MessageQualityRules:
+    """按服务器缓存已编译的留言质量规则。
+
+    服务器设置存于 message_quality_settings 表，未设置的项使用 config 默认值；
+    设置写入时经由数据库写入事件（message_quality）让该服缓存失效，无需重启。
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._compiled: Dict[Optional[int], CompiledQualityRules] = {}
+
+    def effective_settings(self, guild_id: Optional[int]) -> Dict:
+        settings = default_quality_settings()
+        if guild_id is not None:
+            overrides = self.db.get_message_quality_settings(guild_id)
+            settings.update({key: value for key, value in overrides.items() if value is not None})
+        return settings
+
+    def rules_for(self, guild_id: Optional[int]) -> CompiledQualityRules:
+        rules = self._compiled.get(guild_id)
+        if rules is None:
+            rules = CompiledQualityRules(self.effective_settings(guild_id))
+            self._compiled[guild_id] = rules
+        return rules
+
+    def check(self, message, guild_id: Optional[int] = None) -> dict:
+        return self.rules_for(guild_id).check(message)
+
+    def on_db_write(self, event: str, payload: Dict):
+        if event == 'message_quality':
+            self._compiled.pop(payload.get('guild_id'), None)
+        elif event == 'resync':
+            self._compiled.clear()
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Set, Tuple
+
+import discord
+from discord.ext import commands, tasks
+
+import config
+from app.bot.request_scheduler import PRIORITY_BULK, request_priority
+
+logger = logging.getLogger(__name__)
+
+# 每计算多少条留言写一次库，重启后从上次写入处继续
+_SAVE_CHUNK = 50
+
+
+class ReactionRankingJob(commands.Cog):
+    """后台预计算全服精选的表情排行，写入 reaction_ranking_snapshots。
+
+    - 每轮只处理：尚无快照的精选、近期有表情变化（dirty）的精选、以及快照过旧的精选；
+    - 进度按批写库，重启后自然从剩余的工作继续；
+    - 获取失败的留言记下失败次数并退避（REACTION_RANKING_RETRY_MINUTES 起翻倍），不会挤占每轮的名额；
+    - 全服精选列表的「讚數排序」直接读快照，不再在交互内逐条扫描。
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+        self._dirty: Set[Tuple[int, int]] = set()
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending_tasks: Dict[int, asyncio.Task] = {}
+        self._last_requested: Dict[int, float] = {}
+
+    async def cog_load(self):
+        self.refresh_loop.change_interval(seconds=config.REACTION_RANKING_REFRESH_INTERVAL)
+        self.refresh_loop.start()
+
+    async def cog_unload(self):
+        self.refresh_loop.cancel()
+        for task in self._pending_tasks.values():
+            task.cancel()
+
+    def _mark_dirty(self, thread_id: int, message_id: int):
+        if len(self._dirty) >= config.REACTION_RANKING_DIRTY_MAX:
+            # 极端情况下丢弃待标记集合，过期快照会在后续轮次中按时间重算
+            logger.warning(f"⚠️ 表情排行待重算标记超过上限 {config.REACTION_RANKING_DIRTY_MAX}，本轮丢弃")
+            self._dirty.clear()
+        self._dirty.add((thread_id, message_id))
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        self._mark_dirty(payload.channel_id, payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        self._mark_dirty(payload.channel_id, payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload: discord.RawReactionClearEvent):
+        self._mark_dirty(payload.channel_id, payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: discord.RawReactionClearEmojiEvent):
+        self._mark_dirty(payload.channel_id, payload.message_id)
+
+    def flush_dirty(self) -> int:
+        """把内存中的表情变化标记写入快照表（只影响已有快照的精选留言）。"""
+        if not self._dirty:
+            return 0
+        keys = list(self._dirty)
+        self._dirty.clear()
+        return self.db.mark_reaction_snapshots_dirty(keys)
+
+    async def refresh_guild(self, guild_id: int, limit: int = None) -> int:
+        """增量计算一个服务器的表情排行，返回本次计算的留言数。"""
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            stale_before = (
+                datetime.utcnow() - timedelta(hours=config.REACTION_RANKING_STALE_HOURS)
+            ).strftime('%Y-%m-%d %H:%M:%S')
+            work = self.db.get_reaction_snapshot_work(
+                guild_id, stale_before, limit or config.REACTION_RANKING_BATCH_SIZE
+            )
+            if not work:
+                if self.db.get_reaction_ranking_refreshed_at(guild_id) is None:
+                    self.db.save_reaction_snapshots(guild_id, [])
+                return 0
+
+            computed = 0
+            counts = []
+            failed = []
+            for i, item in enumerate(work, 1):
+                key = (item['thread_id'], item['message_id'])
+                count = await self.bot.reaction_cache.get_count(*key, default=None)
+                if count is None:
+                    failed.append(key)
+                else:
+                    counts.append((*key, count))
+
+                if len(counts) + len(failed) >= _SAVE_CHUNK:
+                    computed += self._save(guild_id, counts, failed)
+                    counts, failed = [], []
+
+                # 添加延遲以避免 Discord API 限制
+                if i % 5 == 0:
+                    await asyncio.sleep(0.1)
+
+            return computed + self._save(guild_id, counts, failed)
+
+    def _save(self, guild_id: int, counts: list, failed: list) -> int:
+        self.db.save_reaction_snapshots(guild_id, counts)
+        if failed:
+            self.db.save_reaction_snapshot_failures(
+                guild_id, failed,
+                retry_minutes=config.REACTION_RANKING_RETRY_MINUTES,
+                max_retry_minutes=config.REACTION_RANKING_STALE_HOURS * 60,
+            )
+        return len(counts)
+
+    def request_refresh(self, guild_id: int):
+        """立即在后台计算某服排行（例如从未计算过时）；已在排队或冷却期内则忽略。"""
+        task = self._pending_tasks.get(guild_id)
+        if task is not None and not task.done():
+            return
+        now = time.monotonic()
+        last = self._last_requested.get(guild_id)
+        if last is not None and now - last < config.REACTION_RANKING_REQUEST_COOLDOWN:
+            return
+        self._last_requested[guild_id] = now
+        self._pending_tasks[guild_id] = asyncio.create_task(self._refresh_guild_logged(guild_id))
+
+    async def _refresh_guild_logged(self, guild_id: int):
+        try:
+            # 后台计算的表情抓取让路给交互回应
+            with request_priority(PRIORITY_BULK):
+                computed = await self.refresh_guild(guild_id)
+            if computed:
+                logger.info(f"📊 表情排行已更新 guild={guild_id}，计算 {computed} 条")
+        except Exception as e:
+            logger.error(f"❌ 表情排行计算失败 guild={guild_id}: {e}")
+
+    @tasks.loop(seconds=600)
+    async def refresh_loop(self):
+        self.flush_dirty()
+        for guild_id in self.db.get_featured_guild_ids():
+            # 分片模式下只处理所在分片已就绪的服务器
+            if not self.bot.is_guild_ready(guild_id) or self.bot.get_guild(guild_id) is None:
+                continue
+            await self._refresh_guild_logged(guild_id)
+
+    @refresh_loop.before_loop
+    async def before_refresh_loop(self):
+        await self.bot.wait_until_first_ready()
@@ -5,6 +5,7 @@ import discord
 
 import config
 from app.bot.client import FeaturedMessageBot
+from app.bot.render_cache import VIEW_FEATURED_RECORDS, VIEW_REFERRAL_RANKING, RenderCache
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,7 @@ class FeaturedRecordsView(discord.ui.View):
         self.current_page = current_page
         self.per_page = config.USER_RECORDS_PER_PAGE
         self.record_type = record_type  # "featured" 或 "referral"
+        self.total_pages = 1
 
     def _build_booklist_link_text(self) -> str:
         thread_url = self.bot.db.get_user_booklist_thread_url(self.user_id, self.guild_id)
@@ -25,8 +27,27 @@ class FeaturedRecordsView(discord.ui.View):
             return "該用戶暫無書單帖"
         return f"[點擊跳轉]({thread_url})"
     
+    def _cache_key(self, page: int):
+        return RenderCache.make_key(VIEW_FEATURED_RECORDS, (self.guild_id, self.user_id), page, self.record_type)
+
     async def get_records_embed(self) -> discord.Embed:
-        """獲取當前頁面的記錄嵌入訊息"""
+        """獲取當前頁面的記錄嵌入訊息（優先使用渲染緩存）"""
+        key = self._cache_key(self.current_page)
+        cached = self.bot.render_cache.get(key)
+        if cached is None:
+            embed, total_pages = await self._render_page(self.current_page)
+            self.bot.render_cache.set(key, embed, total_pages)
+        else:
+            embed, total_pages, _ = cached
+
+        # 更新按鈕狀態
+        self.total_pages = total_pages
+        self.update_buttons(total_pages)
+
+        return embed
+
+    async def _render_page(self, page: int):
+        """渲染指定頁面，返回 (embed, total_pages)；不修改 View 狀態"""
         # 獲取用戶資訊
         user = self.bot.get_user(self.user_id)
         username = user.display_name if user else f"用戶 {self.user_id}"
@@ -34,18 +55,18 @@ class FeaturedRecordsView(discord.ui.View):
         if self.record_type == "featured":
             # 獲取被精選記錄
             records, total_pages = self.bot.db.get_user_featured_records(
-                self.user_id, self.guild_id, self.current_page, self.per_page
+                self.user_id, self.guild_id, page, self.per_page
             )
             title = f"🏆 {username} 的被精選記錄"
-            description = f"被其他用戶精選的記錄 • 第 {self.current_page} 頁，共 {max(total_pages, 1)} 頁"
+            description = f"被其他用戶精選的記錄 • 第 {page} 頁，共 {max(total_pages, 1)} 頁"
             empty_description = "還沒有被精選的記錄"
         else:
             # 獲取引薦記錄（用戶精選別人的記錄）
             records, total_pages = self.bot.db.get_user_referral_records(
-                self.user_id, self.guild_id, self.current_page, self.per_page
+                self.user_id, self.guild_id, page, self.per_page
             )
             title = f"👥 {username} 的引薦記錄"
-            description = f"精選其他用戶的記錄 • 第 {self.current_page} 頁，共 {max(total_pages, 1)} 頁"
+            description = f"精選其他用戶的記錄 • 第 {page} 頁，共 {max(total_pages, 1)} 頁"
             empty_description = "還沒有引薦記錄"
 
         embed = discord.Embed(
@@ -56,6 +77,9 @@ class FeaturedRecordsView(discord.ui.View):
         )
 
         if records:
+            # 一次查詢預載本頁帖子的元數據
+            self.bot.thread_metadata.prefetch(record['thread_id'] for record in records)
+
             for i, record in enumerate(records, 1):
                 # 格式化時間
                 featured_at = datetime.fromisoformat(record['featured_at'].replace('Z', '+00:00'))
@@ -67,11 +91,7 @@ class FeaturedRecordsView(discord.ui.View):
                 # 嘗試獲取帖子標題
                 thread_title = None
                 try:
-                    channel = self.bot.get_channel(record['thread_id'])
-                    if channel and hasattr(channel, 'name') and channel.name:
-                        thread_title = channel.name
-                    else:
-                        thread_title = f"帖子 {record['thread_id']}"
+                    thread_title = self.bot.thread_metadata.get_title(record['thread_id']) or f"帖子 {record['thread_id']}"
                 except Exception as e:
                     thread_title = f"帖子 {record['thread_id']}"
                     logger.debug(f"無法獲取帖子標題 {record['thread_id']}: {e}")
@@ -114,10 +134,14 @@ class FeaturedRecordsView(discord.ui.View):
         if user:
             embed.set_thumbnail(url=user.display_avatar.url)
 
-        # 更新按鈕狀態
-        self.update_buttons(total_pages)
+        return embed, total_pages
+    
+    def schedule_prefetch(self):
+        """在後台預取相鄰頁面，下一次翻頁直接命中渲染緩存"""
+        self.bot.page_prefetcher.schedule(self, self._cache_key, self._render_page, self.current_page, self.total_pages)
 
-        return embed
+    async def on_timeout(self):
+        self.bot.page_prefetcher.cancel(self)
     
     def update_buttons(self, total_pages: int):
         """更新按鈕狀態"""
@@ -132,6 +156,7 @@ class FeaturedRecordsView(discord.ui.View):
         self.current_page = 1
         embed = await self.get_records_embed()
         await interaction.response.edit_message(embed=embed, view=self)
+        self.schedule_prefetch()
     
     @discord.ui.button(label="上一頁", style=discord.ButtonStyle.primary, emoji="◀️")
     async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -139,37 +164,23 @@ class FeaturedRecordsView(discord.ui.View):
             self.current_page -= 1
             embed = await self.get_records_embed()
             await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
     
     @discord.ui.button(label="下一頁", style=discord.ButtonStyle.primary, emoji="▶️")
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.record_type == "featured":
-            _, total_pages = self.bot.db.get_user_featured_records(
-                self.user_id, self.guild_id, self.current_page, self.per_page
-            )
-        else:
-            _, total_pages = self.bot.db.get_user_referral_records(
-                self.user_id, self.guild_id, self.current_page, self.per_page
-            )
-        
-        if self.current_page < total_pages:
+        # 總頁數沿用上次渲染結果，數據變化時渲染緩存會失效並重新計算
+        if self.current_page < self.total_pages:
             self.current_page += 1
             embed = await self.get_records_embed()
             await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
     
     @discord.ui.button(label="最後一頁", style=discord.ButtonStyle.gray, emoji="⏭️")
     async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.record_type == "featured":
-            _, total_pages = self.bot.db.get_user_featured_records(
-                self.user_id, self.guild_id, self.current_page, self.per_page
-            )
-        else:
-            _, total_pages = self.bot.db.get_user_referral_records(
-                self.user_id, self.guild_id, self.current_page, self.per_page
-            )
-        
-        self.current_page = total_pages
+        self.current_page = max(self.total_pages, 1)
         embed = await self.get_records_embed()
         await interaction.response.edit_message(embed=embed, view=self)
+        self.schedule_prefetch()
     
     @discord.ui.button(label="被精選", style=discord.ButtonStyle.success, emoji="🏆")
     async def switch_to_featured(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -178,6 +189,7 @@ class FeaturedRecordsView(discord.ui.View):
             self.current_page = 1  # 重置到第一頁
             embed = await self.get_records_embed()
             await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
         else:
             await interaction.response.send_message("✅ 當前已是被精選記錄模式", ephemeral=True)
     
@@ -188,6 +200,7 @@ class FeaturedRecordsView(discord.ui.View):
             self.current_page = 1  # 重置到第一頁
             embed = await self.get_records_embed()
             await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
         else:
             await interaction.response.send_message("✅ 當前已是引薦記錄模式", ephemeral=True)
 
@@ -199,25 +212,43 @@ class EnhancedRankingView(discord.ui.View):
         self.guild_id = guild_id
         self.current_page = current_page
         self.per_page = config.RANKING_PER_PAGE
-        self.per_page = config.RANKING_PER_PAGE
         self.start_date = start_date
         self.end_date = end_date
+        self.total_pages = 1
     
     async def get_ranking_embed(self) -> discord.Embed:
-        """獲取當前頁面的排行榜嵌入訊息"""
+        """獲取當前頁面的排行榜嵌入訊息（優先使用渲染緩存）"""
+        key = RenderCache.make_key(
+            VIEW_REFERRAL_RANKING, (self.guild_id,), self.current_page, None, self.start_date, self.end_date
+        )
+        cached = self.bot.render_cache.get(key)
+        if cached is None:
+            embed, total_pages = await self._render_page(self.current_page)
+            self.bot.render_cache.set(key, embed, total_pages)
+        else:
+            embed, total_pages, _ = cached
+
+        # 更新按鈕狀態
+        self.total_pages = total_pages
+        self.update_buttons(total_pages)
+
+        return embed
+
+    async def _render_page(self, page: int):
+        """渲染指定頁面，返回 (embed, total_pages)；不修改 View 狀態"""
         # 獲取引薦人數排行榜數據
-        ranking_data, total_pages = self.bot.db.get_referral_ranking(self.guild_id, self.current_page, self.per_page, self.start_date, self.end_date)
+        ranking_data, total_pages = self.bot.db.get_referral_ranking(self.guild_id, page, self.per_page, self.start_date, self.end_date)
         title = "👥 引薦人數排行榜"
         
         # 根据时间范围调整描述
         if self.start_date and self.end_date:
-            description = f"時間範圍: {self.start_date} 至 {self.end_date} • 第 {self.current_page} 頁，共 {total_pages} 頁"
+            description = f"時間範圍: {self.start_date} 至 {self.end_date} • 第 {page} 頁，共 {total_pages} 頁"
         elif self.start_date:
-            description = f"時間範圍: {self.start_date} 至今 • 第 {self.current_page} 頁，共 {total_pages} 頁"
+            description = f"時間範圍: {self.start_date} 至今 • 第 {page} 頁，共 {total_pages} 頁"
         elif self.end_date:
-            description = f"時間範圍: 開始至 {self.end_date} • 第 {self.current_page} 頁，共 {total_pages} 頁"
+            description = f"時間範圍: 開始至 {self.end_date} • 第 {page} 頁，共 {total_pages} 頁"
         else:
-            description = f"精選留言引薦統計 • 第 {self.current_page} 頁，共 {total_pages} 頁"
+            description = f"精選留言引薦統計 • 第 {page} 頁，共 {total_pages} 頁"
         
         empty_description = "還沒有引薦記錄"
         
@@ -228,10 +259,10 @@ class EnhancedRankingView(discord.ui.View):
                 color=0x00ff00,
                 timestamp=discord.utils.utcnow()
             )
-            return embed
+            return embed, total_pages
         
         # 計算當前頁的起始排名
-        start_rank = (self.current_page - 1) * self.per_page + 1
+        start_rank = (page - 1) * self.per_page + 1
         
         embed = discord.Embed(
             title=title,
@@ -256,10 +287,7 @@ class EnhancedRankingView(discord.ui.View):
                 inline=False
             )
         
-        # 更新按鈕狀態
-        self.update_buttons(total_pages)
-        
-        return embed
+        return embed, total_pages
     
     def update_buttons(self, total_pages: int):
         """更新按鈕狀態"""
@@ -287,18 +315,15 @@ class EnhancedRankingView(discord.ui.View):
     
     @discord.ui.button(label="下一頁", style=discord.ButtonStyle.primary, emoji="▶️")
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        _, total_pages = self.bot.db.get_referral_ranking(self.guild_id, self.current_page, self.per_page, self.start_date, self.end_date)
-        
-        if self.current_page < total_pages:
+        # 總頁數沿用上次渲染結果，數據變化時渲染緩存會失效並重新計算
+        if self.current_page < self.total_pages:
             self.current_page += 1
             embed = await self.get_ranking_embed()
             await interaction.response.edit_message(embed=embed, view=self)
     
     @discord.ui.button(label="最後一頁", style=discord.ButtonStyle.gray, emoji="⏭️")
     async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        _, total_pages = self.bot.db.get_referral_ranking(self.guild_id, self.current_page, self.per_page, self.start_date, self.end_date)
-        
-        self.current_page = total_pages
+        self.current_page = max(self.total_pages, 1)
         embed = await self.get_ranking_embed()
         await interaction.response.edit_message(embed=embed, view=self)
     
@@ -1,11 +1,11 @@
-import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 
 import discord
 
 import config
 from app.bot.client import FeaturedMessageBot
+from app.bot.render_cache import VIEW_ALL_FEATURED, VIEW_THREAD_STATS, RenderCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +19,26 @@ class ThreadStatsView(discord.ui.View):
         self.current_page = current_page
         self.per_page = config.THREAD_STATS_PER_PAGE
         self.sort_mode = sort_mode  # "time" 或 "reactions"
+        self.total_pages = 1
     
     async def get_stats_embed(self) -> discord.Embed:
-        """獲取當前頁面的統計嵌入訊息"""
+        """獲取當前頁面的統計嵌入訊息（優先使用渲染緩存）"""
+        key = RenderCache.make_key(VIEW_THREAD_STATS, (self.thread_id,), self.current_page, self.sort_mode)
+        cached = self.bot.render_cache.get(key)
+        if cached is None:
+            embed, total_pages = await self._render_page(self.current_page)
+            self.bot.render_cache.set(key, embed, total_pages)
+        else:
+            embed, total_pages, _ = cached
+
+        # 更新按鈕狀態
+        self.total_pages = total_pages
+        self.update_buttons(total_pages)
+
+        return embed
+
+    async def _render_page(self, page: int):
+        """渲染指定頁面，返回 (embed, total_pages)；不修改 View 狀態"""
         # 獲取所有統計數據
         all_stats = self.bot.db.get_thread_stats(self.thread_id)
         
@@ -32,7 +49,7 @@ class ThreadStatsView(discord.ui.View):
                 color=discord.Color.light_grey(),
                 timestamp=discord.utils.utcnow()
             )
-            return embed
+            return embed, 0
         
         # 記錄開始時間
         start_time = datetime.now()
@@ -57,17 +74,17 @@ class ThreadStatsView(discord.ui.View):
         # 計算分頁
         total_records = len(all_stats)
         total_pages = (total_records + self.per_page - 1) // self.per_page
-        start_idx = (self.current_page - 1) * self.per_page
+        start_idx = (page - 1) * self.per_page
         end_idx = min(start_idx + self.per_page, total_records)
         current_stats = all_stats[start_idx:end_idx]
         
         # 根據排序模式設置標題和描述
         if self.sort_mode == "reactions":
             title = "📊 帖子精选统计 (按讚數排序)"
-            description = f"共 {total_records} 条精选记录 • 第 {self.current_page} 页，共 {total_pages} 页 • 按讚數排序"
+            description = f"共 {total_records} 条精选记录 • 第 {page} 页，共 {total_pages} 页 • 按讚數排序"
         else:
             title = "📊 帖子精选统计 (按時間排序)"
-            description = f"共 {total_records} 条精选记录 • 第 {self.current_page} 页，共 {total_pages} 页 • 按精選時間排序"
+            description = f"共 {total_records} 条精选记录 • 第 {page} 页，共 {total_pages} 页 • 按精選時間排序"
         
         embed = discord.Embed(
             title=title,
@@ -110,12 +127,13 @@ class ThreadStatsView(discord.ui.View):
         
         # 計算並記錄處理時間
         processing_time = (datetime.now() - start_time).total_seconds()
-        logger.info(f"📊 帖子統計處理完成 - 頁面 {self.current_page}, 排序模式: {self.sort_mode}, 處理 {len(current_stats)} 條記錄, 耗時 {processing_time:.2f}秒")
-        
-        # 更新按鈕狀態
-        self.update_buttons(total_pages)
+        logger.info(
+            "📊 帖子統計處理完成 - 頁面 %s, 排序模式: %s, 處理 %s 條記錄, 耗時 %.2f秒",
+            page, self.sort_mode, len(current_stats), processing_time,
+            extra={'log_category': 'page_timing', 'fields': {'view': 'thread_stats', 'page': page, 'seconds': processing_time}}
+        )
         
-        return embed
+        return embed, total_pages
     
     def update_buttons(self, total_pages: int):
         """更新按鈕狀態"""
@@ -143,20 +161,15 @@ class ThreadStatsView(discord.ui.View):
     
     @discord.ui.button(label="下一頁", style=discord.ButtonStyle.primary, emoji="▶️")
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        all_stats = self.bot.db.get_thread_stats(self.thread_id)
-        total_pages = (len(all_stats) + self.per_page - 1) // self.per_page
-        
-        if self.current_page < total_pages:
+        # 總頁數沿用上次渲染結果，數據變化時渲染緩存會失效並重新計算
+        if self.current_page < self.total_pages:
             self.current_page += 1
             embed = await self.get_stats_embed()
             await interaction.response.edit_message(embed=embed, view=self)
     
     @discord.ui.button(label="最後一頁", style=discord.ButtonStyle.gray, emoji="⏭️")
     async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        all_stats = self.bot.db.get_thread_stats(self.thread_id)
-        total_pages = (len(all_stats) + self.per_page - 1) // self.per_page
-        
-        self.current_page = total_pages
+        self.current_page = max(self.total_pages, 1)
         embed = await self.get_stats_embed()
         await interaction.response.edit_message(embed=embed, view=self)
     
@@ -181,39 +194,8 @@ class ThreadStatsView(discord.ui.View):
             await interaction.response.send_message("✅ 當前已是讚數排序模式", ephemeral=True)
     
     async def get_message_reaction_count(self, message_id: int) -> int:
-        """獲取消息的最高表情符號數量（帶緩存）"""
-        # 簡單的內存緩存，避免短時間內重複請求
-        cache_key = f"{self.thread_id}_{message_id}"
-        if hasattr(self, '_reaction_cache') and cache_key in self._reaction_cache:
-            cache_time, count = self._reaction_cache[cache_key]
-            # 緩存5秒
-            if (datetime.now() - cache_time).total_seconds() < 5:
-                return count
-        
-        try:
-            # 獲取消息對象
-            message = await self.bot.get_channel(self.thread_id).fetch_message(message_id)
-            
-            if not message or not message.reactions:
-                return 0
-            
-            # 計算所有表情符號中的最高數量
-            max_count = 0
-            for reaction in message.reactions:
-                if reaction.count > max_count:
-                    max_count = reaction.count
-            
-            # 緩存結果
-            if not hasattr(self, '_reaction_cache'):
-                self._reaction_cache = {}
-            self._reaction_cache[cache_key] = (datetime.now(), max_count)
-            
-            return max_count
-            
-        except Exception as e:
-            # 如果無法獲取消息或表情符號，返回 0
-            logger.debug(f"無法獲取消息 {message_id} 的表情符號: {e}")
-            return 0
+        """獲取消息的最高表情符號數量（使用 bot 級共享緩存）"""
+        return await self.bot.reaction_cache.get_count(self.thread_id, message_id)
 
 class AllFeaturedMessagesView(discord.ui.View):
     """全服精選留言分頁視圖"""
@@ -227,120 +209,65 @@ class AllFeaturedMessagesView(discord.ui.View):
         self.sort_mode = sort_mode  # "time" 或 "reactions"
         self.start_date = start_date
         self.end_date = end_date
-        self._reactions_cache = {}  # 緩存表情符號數量
-        self._sorted_messages = None  # 緩存排序後的消息
+        self.total_pages = 1
+
+    def _cache_key(self, page: int):
+        return RenderCache.make_key(
+            VIEW_ALL_FEATURED, (self.guild_id,), page, self.sort_mode, self.start_date, self.end_date
+        )
     
     async def get_messages_embed(self, interaction: discord.Interaction = None) -> discord.Embed:
-        """獲取當前頁面的全服精選留言嵌入訊息"""
+        """獲取當前頁面的全服精選留言嵌入訊息（優先使用渲染緩存）"""
+        key = self._cache_key(self.current_page)
+        cached = self.bot.render_cache.get(key)
+        if cached is None:
+            embed, total_pages = await self._render_page(self.current_page)
+            self.bot.render_cache.set(key, embed, total_pages)
+        else:
+            embed, total_pages, _ = cached
+
+        # 更新按鈕狀態
+        self.total_pages = total_pages
+        self.update_buttons(total_pages)
+
+        return embed
+
+    async def _render_page(self, page: int):
+        """渲染指定頁面，返回 (embed, total_pages)；不修改 View 狀態"""
         # 記錄開始時間
         start_time = datetime.now()
         
         # 根據排序模式獲取數據
+        snapshot_note = None
         if self.sort_mode == "reactions":
-            # 讚數排序：需要獲取所有記錄進行全局排序
-            all_messages, _ = self.bot.db.get_all_featured_messages(
-                self.guild_id, 1, 10000,  # 獲取所有記錄
-                "time", self.start_date, self.end_date  # 先按時間排序獲取
+            # 讚數排序：讀取後台預先計算的表情排行快照
+            messages, total_pages, pending = self.bot.db.get_reaction_ranked_featured_messages(
+                self.guild_id, page, self.per_page, self.start_date, self.end_date
             )
-            
-            if not all_messages:
-                embed = discord.Embed(
-                    title="🌟 全服精選留言",
-                    description="目前沒有精選留言記錄",
-                    color=discord.Color.light_grey(),
-                    timestamp=discord.utils.utcnow()
-                )
-                return embed
-            
-            # 檢查是否有緩存的排序結果
-            cache_key = f"{self.start_date}_{self.end_date}"
-            if self._sorted_messages is None or cache_key not in self._sorted_messages:
-                # 需要重新掃描
-                messages_with_reactions = []
-                total_messages = len(all_messages)
-                progress_message = None  # 單一進度條訊息
-                
-                # 發送初始進度條訊息
-                if interaction:
-                    try:
-                        initial_embed = discord.Embed(
-                            title="🌟 全服精選留言 - 掃描中",
-                            description="正在掃描所有精選留言的表情符號數量...\n這可能需要一些時間，請稍候。",
-                            color=discord.Color.blue(),
-                            timestamp=discord.utils.utcnow()
-                        )
-                        progress_message = await interaction.followup.send(embed=initial_embed, ephemeral=True)
-                    except:
-                        pass  # 如果發送失敗，繼續執行
-                
-                for i, msg in enumerate(all_messages, 1):
-                    # 更新進度條（每10個或最後一個）
-                    if interaction and progress_message and (i % 10 == 0 or i == total_messages):
-                        progress = (i / total_messages) * 100
-                        progress_bar = self.create_progress_bar(progress)
-                        
-                        progress_embed = discord.Embed(
-                            title="🌟 全服精選留言 - 掃描中",
-                            description=f"正在掃描表情符號數量...\n{progress_bar} {progress:.1f}% ({i}/{total_messages})",
-                            color=discord.Color.blue(),
-                            timestamp=discord.utils.utcnow()
-                        )
-                        try:
-                            await progress_message.edit(embed=progress_embed)
-                        except:
-                            pass  # 如果編輯失敗，繼續執行
-                    
-                    # 獲取表情符號數量
-                    reaction_count = await self.get_message_reaction_count(msg['thread_id'], msg['message_id'])
-                    messages_with_reactions.append({
-                        **msg,
-                        'reaction_count': reaction_count
-                    })
-                    
-                    # 添加延遲以避免 Discord API 限制
-                    if i % 5 == 0:  # 每5個請求後稍作延遲
-                        await asyncio.sleep(0.1)
-                
-                # 按表情符號數量降序排序
-                all_messages_sorted = sorted(messages_with_reactions, key=lambda x: x['reaction_count'], reverse=True)
-                
-                # 緩存結果
-                if self._sorted_messages is None:
-                    self._sorted_messages = {}
-                self._sorted_messages[cache_key] = all_messages_sorted
-            else:
-                # 使用緩存的結果
-                all_messages_sorted = self._sorted_messages[cache_key]
-            
-            # 計算分頁
-            total_records = len(all_messages_sorted)
-            total_pages = (total_records + self.per_page - 1) // self.per_page
-            start_idx = (self.current_page - 1) * self.per_page
-            end_idx = min(start_idx + self.per_page, total_records)
-            messages = all_messages_sorted[start_idx:end_idx]
+            snapshot_note = self.get_snapshot_note(pending)
         else:
             # 時間排序：使用原有的分頁邏輯
             messages, total_pages = self.bot.db.get_all_featured_messages(
-                self.guild_id, self.current_page, self.per_page, 
+                self.guild_id, page, self.per_page, 
                 self.sort_mode, self.start_date, self.end_date
             )
             
-            if not messages:
-                embed = discord.Embed(
-                    title="🌟 全服精選留言",
-                    description="目前沒有精選留言記錄",
-                    color=discord.Color.light_grey(),
-                    timestamp=discord.utils.utcnow()
-                )
-                return embed
+        if not messages:
+            embed = discord.Embed(
+                title="🌟 全服精選留言",
+                description="目前沒有精選留言記錄",
+                color=discord.Color.light_grey(),
+                timestamp=discord.utils.utcnow()
+            )
+            return embed, total_pages
         
         # 根據排序模式設置標題和描述
         if self.sort_mode == "reactions":
             title = "🌟 全服精選留言 (按讚數排序)"
-            description = f"共 {len(messages)} 条精选记录 • 第 {self.current_page} 页，共 {total_pages} 页 • 按讚數排序"
+            description = f"共 {len(messages)} 条精选记录 • 第 {page} 页，共 {total_pages} 页 • 按讚數排序"
         else:
             title = "🌟 全服精選留言 (按時間排序)"
-            description = f"共 {len(messages)} 条精选记录 • 第 {self.current_page} 页，共 {total_pages} 页 • 按精選時間排序"
+            description = f"共 {len(messages)} 条精选记录 • 第 {page} 页，共 {total_pages} 页 • 按精選時間排序"
         
         # 添加時間範圍信息
         if self.start_date or self.end_date:
@@ -352,6 +279,9 @@ class AllFeaturedMessagesView(discord.ui.View):
             elif self.end_date:
                 time_range += f"開始至 {self.end_date}"
             description += f"\n{time_range}"
+
+        if snapshot_note:
+            description += f"\n{snapshot_note}"
         
         embed = discord.Embed(
             title=title,
@@ -360,6 +290,9 @@ class AllFeaturedMessagesView(discord.ui.View):
             timestamp=discord.utils.utcnow()
         )
         
+        # 一次查詢預載本頁帖子的元數據
+        self.bot.thread_metadata.prefetch(msg['thread_id'] for msg in messages)
+
         for i, msg in enumerate(messages, 1):
             # 格式化時間
             try:
@@ -380,7 +313,7 @@ class AllFeaturedMessagesView(discord.ui.View):
             record_content += f"**時間**: {formatted_time}\n"
             
             # 添加表情符號統計（如果是讚數排序模式）
-            if self.sort_mode == "reactions" and 'reaction_count' in msg:
+            if self.sort_mode == "reactions" and msg.get('reaction_count') is not None:
                 record_content += f"**👍 最高表情數**: {msg['reaction_count']}\n"
             
             # 如果有精选原因，添加到内容中
@@ -401,18 +334,41 @@ class AllFeaturedMessagesView(discord.ui.View):
         
         # 計算並記錄處理時間
         processing_time = (datetime.now() - start_time).total_seconds()
-        logger.info(f"🌟 全服精選留言處理完成 - 頁面 {self.current_page}, 排序模式: {self.sort_mode}, 處理 {len(messages)} 條記錄, 耗時 {processing_time:.2f}秒")
-        
-        # 更新按鈕狀態
-        self.update_buttons(total_pages)
+        logger.info(
+            "🌟 全服精選留言處理完成 - 頁面 %s, 排序模式: %s, 處理 %s 條記錄, 耗時 %.2f秒",
+            page, self.sort_mode, len(messages), processing_time,
+            extra={'log_category': 'page_timing', 'fields': {'view': 'all_featured', 'page': page, 'seconds': processing_time}}
+        )
         
-        return embed
+        return embed, total_pages
+    
+    def get_snapshot_note(self, pending: int) -> str:
+        """讚數排行快照的計算時間說明；從未計算過或有未統計留言時通知後台計算（同一伺服器有冷卻時間）"""
+        refreshed_at = self.bot.db.get_reaction_ranking_refreshed_at(self.guild_id)
+        ranking_job = self.bot.get_cog("ReactionRankingJob")
+        if ranking_job and (refreshed_at is None or pending):
+            ranking_job.request_refresh(self.guild_id)
+
+        if refreshed_at is None:
+            return "⏳ 讚數排行正在後台計算，請稍後再查看"
+
+        try:
+            # 使用 Discord 相對時間標記，緩存的頁面也會在客戶端顯示正確的「N 分鐘前」
+            computed_at = datetime.strptime(refreshed_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+            note = f"🕒 讚數排行計算於 {discord.utils.format_dt(computed_at, 'R')}"
+        except ValueError:
+            note = f"🕒 讚數排行計算於 {refreshed_at} (UTC)"
+
+        if pending:
+            note += f"（另有 {pending} 條尚待統計，暫列於最後）"
+        return note
     
-    def create_progress_bar(self, percentage: float, width: int = 20) -> str:
-        """創建進度條字符串"""
-        filled = int(width * percentage / 100)
-        empty = width - filled
-        return "█" * filled + "░" * empty
+    def schedule_prefetch(self):
+        """在後台預取相鄰頁面，下一次翻頁直接命中渲染緩存"""
+        self.bot.page_prefetcher.schedule(self, self._cache_key, self._render_page, self.current_page, self.total_pages)
+
+    async def on_timeout(self):
+        self.bot.page_prefetcher.cancel(self)
     
     def update_buttons(self, total_pages: int):
         """更新按鈕狀態"""
@@ -430,6 +386,7 @@ class AllFeaturedMessagesView(discord.ui.View):
         self.current_page = 1
         embed = await self.get_messages_embed(interaction)
         await interaction.response.edit_message(embed=embed, view=self)
+        self.schedule_prefetch()
     
     @discord.ui.button(label="上一頁", style=discord.ButtonStyle.primary, emoji="◀️")
     async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -437,156 +394,51 @@ class AllFeaturedMessagesView(discord.ui.View):
             self.current_page -= 1
             embed = await self.get_messages_embed(interaction)
             await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
     
     @discord.ui.button(label="下一頁", style=discord.ButtonStyle.primary, emoji="▶️")
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # 獲取總頁數
-        if self.sort_mode == "reactions":
-            # 讚數排序：需要重新計算總頁數
-            all_messages, _ = self.bot.db.get_all_featured_messages(
-                self.guild_id, 1, 10000, "time", self.start_date, self.end_date
-            )
-            total_pages = (len(all_messages) + self.per_page - 1) // self.per_page
-        else:
-            # 時間排序：使用數據庫查詢
-            messages, total_pages = self.bot.db.get_all_featured_messages(
-                self.guild_id, self.current_page, self.per_page, 
-                self.sort_mode, self.start_date, self.end_date
-            )
-        
-        if self.current_page < total_pages:
-            # 如果是讚數排序，先回應交互避免超時
-            if self.sort_mode == "reactions":
-                await interaction.response.defer()
-            
+        # 總頁數沿用上次渲染結果，數據變化時渲染緩存會失效並重新計算
+        if self.current_page < self.total_pages:
             self.current_page += 1
             embed = await self.get_messages_embed(interaction)
-            
-            if self.sort_mode == "reactions":
-                # 使用 followup 更新訊息
-                try:
-                    await interaction.followup.edit_message(interaction.message.id, embed=embed, view=self)
-                except:
-                    await interaction.followup.send(embed=embed, view=self)
-            else:
-                await interaction.response.edit_message(embed=embed, view=self)
+            await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
     
     @discord.ui.button(label="最後一頁", style=discord.ButtonStyle.gray, emoji="⏭️")
     async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # 獲取總頁數
-        if self.sort_mode == "reactions":
-            # 讚數排序：需要重新計算總頁數
-            all_messages, _ = self.bot.db.get_all_featured_messages(
-                self.guild_id, 1, 10000, "time", self.start_date, self.end_date
-            )
-            total_pages = (len(all_messages) + self.per_page - 1) // self.per_page
-        else:
-            # 時間排序：使用數據庫查詢
-            messages, total_pages = self.bot.db.get_all_featured_messages(
-                self.guild_id, self.current_page, self.per_page, 
-                self.sort_mode, self.start_date, self.end_date
-            )
-        
-        # 如果是讚數排序，先回應交互避免超時
-        if self.sort_mode == "reactions":
-            await interaction.response.defer()
-        
-        self.current_page = total_pages
+        self.current_page = max(self.total_pages, 1)
         embed = await self.get_messages_embed(interaction)
-        
-        if self.sort_mode == "reactions":
-            # 使用 followup 更新訊息
-            try:
-                await interaction.followup.edit_message(interaction.message.id, embed=embed, view=self)
-            except:
-                await interaction.followup.send(embed=embed, view=self)
-        else:
-            await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.response.edit_message(embed=embed, view=self)
+        self.schedule_prefetch()
     
     @discord.ui.button(label="時間排序", style=discord.ButtonStyle.success, emoji="⏰")
     async def sort_by_time(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.sort_mode != "time":
-            # 先回應交互，避免超時
-            await interaction.response.defer()
-            
             self.sort_mode = "time"
             self.current_page = 1  # 重置到第一頁
             embed = await self.get_messages_embed(interaction)
-            
-            # 使用 followup 更新訊息
-            try:
-                await interaction.followup.edit_message(interaction.message.id, embed=embed, view=self)
-            except:
-                # 如果 followup 失敗，嘗試發送新訊息
-                await interaction.followup.send(embed=embed, view=self)
+            await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
         else:
             await interaction.response.send_message("✅ 當前已是時間排序模式", ephemeral=True)
     
     @discord.ui.button(label="讚數排序", style=discord.ButtonStyle.success, emoji="👍")
     async def sort_by_reactions(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.sort_mode != "reactions":
-            # 先回應交互，避免超時
-            await interaction.response.defer()
-            
+            # 讀取後台預先計算的排行快照，無需先 defer
             self.sort_mode = "reactions"
             self.current_page = 1  # 重置到第一頁
             embed = await self.get_messages_embed(interaction)
-            
-            # 使用 followup 更新訊息
-            try:
-                await interaction.followup.edit_message(interaction.message.id, embed=embed, view=self)
-            except:
-                # 如果 followup 失敗，嘗試發送新訊息
-                await interaction.followup.send(embed=embed, view=self)
+            await interaction.response.edit_message(embed=embed, view=self)
+            self.schedule_prefetch()
         else:
             await interaction.response.send_message("✅ 當前已是讚數排序模式", ephemeral=True)
     
-    async def get_message_reaction_count(self, thread_id: int, message_id: int) -> int:
-        """獲取消息的最高表情符號數量（帶緩存）"""
-        # 簡單的內存緩存，避免短時間內重複請求
-        cache_key = f"{thread_id}_{message_id}"
-        if hasattr(self, '_reaction_cache') and cache_key in self._reaction_cache:
-            cache_time, count = self._reaction_cache[cache_key]
-            # 使用配置的緩存時間
-            if (datetime.now() - cache_time).total_seconds() < config.REACTION_CACHE_DURATION:
-                return count
-        
-        try:
-            # 獲取消息對象
-            message = await self.bot.get_channel(thread_id).fetch_message(message_id)
-            
-            if not message or not message.reactions:
-                return 0
-            
-            # 計算所有表情符號中的最高數量
-            max_count = 0
-            for reaction in message.reactions:
-                if reaction.count > max_count:
-                    max_count = reaction.count
-            
-            # 緩存結果
-            if not hasattr(self, '_reaction_cache'):
-                self._reaction_cache = {}
-            self._reaction_cache[cache_key] = (datetime.now(), max_count)
-            
-            return max_count
-            
-        except Exception as e:
-            # 如果無法獲取消息或表情符號，返回 0
-            logger.debug(f"無法獲取消息 {message_id} 的表情符號: {e}")
-            return 0
-    
     async def get_thread_title(self, thread_id: int) -> str:
-        """獲取帖子標題"""
+        """獲取帖子標題（歸檔帖從帖子元數據表讀取，不發 REST 請求）"""
         try:
-            # 嘗試獲取頻道
-            channel = self.bot.get_channel(thread_id)
-            if not channel or not hasattr(channel, 'name'):
-                return None
-            
-            # 返回帖子標題
-            return channel.name
-            
+            return self.bot.thread_metadata.get_title(thread_id)
         except Exception:
             # 如果無法獲取帖子標題，返回 None
             return None
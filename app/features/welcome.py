@@ -1,15 +1,109 @@
+import asyncio
 import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import config
+from app.bot.request_scheduler import PRIORITY_NORMAL, request_priority
 from app.utils.permissions import has_admin_permission
 
 logger = logging.getLogger(__name__)
 
 
+class _GuildWelcomeQueue:
+    __slots__ = ('members', 'task')
+
+    def __init__(self):
+        self.members: deque = deque()
+        self.task: Optional[asyncio.Task] = None
+
+
+class WelcomeDispatcher:
+    """每服一个发送协程：空闲时加入立即单独欢迎，发送后的时间窗内加入的成员合并到下一条。
+
+    send(guild_id, members) 返回是否发送成功；同一服务器同时只有一条欢迎消息在发送，
+    限流等待期间继续加入的成员留在队列里合并，队列满时丢弃并计数。
+    """
+
+    def __init__(self, send: Callable[[int, List[discord.Member]], Awaitable[bool]],
+                 window: float = None, batch_max: int = None, queue_max: int = None, metrics=None):
+        self._send = send
+        self.window = config.WELCOME_COALESCE_SECONDS if window is None else window
+        self.batch_max = max(1, config.WELCOME_BATCH_MAX if batch_max is None else batch_max)
+        self.queue_max = config.WELCOME_QUEUE_MAX if queue_max is None else queue_max
+        self.metrics = metrics
+        self._guilds: Dict[int, _GuildWelcomeQueue] = {}
+        self.messages = 0
+        self.welcomed = 0
+        self.dropped = 0
+
+    def submit(self, member: discord.Member) -> bool:
+        guild_id = member.guild.id
+        queue = self._guilds.get(guild_id)
+        if queue is None:
+            queue = self._guilds[guild_id] = _GuildWelcomeQueue()
+        if len(queue.members) >= self.queue_max:
+            self._drop(1, 'queue_full')
+            return False
+        queue.members.append(member)
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._drain(guild_id, queue))
+        return True
+
+    async def _drain(self, guild_id: int, queue: _GuildWelcomeQueue):
+        try:
+            while queue.members:
+                batch = [queue.members.popleft() for _ in range(min(self.batch_max, len(queue.members)))]
+                try:
+                    # 欢迎消息不是交互回应，REST 请求排在其后
+                    with request_priority(PRIORITY_NORMAL):
+                        sent = await self._send(guild_id, batch)
+                except Exception as e:
+                    logger.error(f"❌ 欢迎消息发送失败（guild={guild_id}）: {e}")
+                    sent = False
+                if sent:
+                    self.messages += 1
+                    self.welcomed += len(batch)
+                    if self.metrics is not None:
+                        self.metrics.inc('bot_welcome_messages_total', mode='batch' if len(batch) > 1 else 'single')
+                else:
+                    self._drop(len(batch), 'send_failed')
+                # 等一个时间窗，期间加入的成员合并到下一条
+                await asyncio.sleep(self.window)
+        finally:
+            queue.task = None
+            if not queue.members and self._guilds.get(guild_id) is queue:
+                del self._guilds[guild_id]
+
+    def _drop(self, count: int, reason: str):
+        self.dropped += count
+        if self.metrics is not None:
+            self.metrics.inc('bot_welcome_dropped_total', count, reason=reason)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue.members) for queue in self._guilds.values())
+
+    def close(self):
+        for queue in self._guilds.values():
+            if queue.task is not None:
+                queue.task.cancel()
+        self._guilds.clear()
+
+    def stats(self) -> dict:
+        return {
+            'queued': self.queue_depth,
+            'active_guilds': len(self._guilds),
+            'messages': self.messages,
+            'welcomed': self.welcomed,
+            'dropped': self.dropped,
+        }
+
+
 class WelcomeCommands(commands.Cog):
     """新成员欢迎消息模块"""
 
@@ -18,35 +112,59 @@ class WelcomeCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.dispatcher = WelcomeDispatcher(self._send_welcome, metrics=bot.metrics)
+
+    async def cog_unload(self):
+        self.dispatcher.close()
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        """新成员加入时，若本服已设置欢迎频道则发送欢迎消息。"""
-        channel_id = self.db.get_welcome_channel(member.guild.id)
-        if not channel_id:
+        """新成员加入时，若本服已设置欢迎频道则交给发送队列（短时间内大量加入会合并为一条）。"""
+        if not self.bot.guild_settings.welcome_channel(member.guild.id):
             return
+        self.dispatcher.submit(member)
+
+    async def _send_welcome(self, guild_id: int, members: List[discord.Member]) -> bool:
+        # 发送时再读一次设置：排队期间可能已关闭或改了频道
+        channel_id = self.bot.guild_settings.welcome_channel(guild_id)
+        if not channel_id:
+            return False
 
-        channel = member.guild.get_channel(channel_id) or self.bot.get_channel(channel_id)
+        guild = members[0].guild
+        channel = guild.get_channel(channel_id) or self.bot.get_channel(channel_id)
         if channel is None:
             try:
                 channel = await self.bot.fetch_channel(channel_id)
             except Exception as e:
-                logger.warning(f"欢迎频道获取失败（guild={member.guild.id}, channel={channel_id}）: {e}")
-                return
-
-        embed = discord.Embed(
-            title="👋 欢迎加入！",
-            description=f"欢迎 {member.mention} 加入 **{member.guild.name}**！",
-            color=discord.Color.blurple(),
-        )
-        embed.set_thumbnail(url=member.display_avatar.url)
+                logger.warning(f"欢迎频道获取失败（guild={guild_id}, channel={channel_id}）: {e}")
+                return False
+
+        if len(members) == 1:
+            embed = discord.Embed(
+                title="👋 欢迎加入！",
+                description=f"欢迎 {members[0].mention} 加入 **{guild.name}**！",
+                color=discord.Color.blurple(),
+            )
+            embed.set_thumbnail(url=members[0].display_avatar.url)
+        else:
+            mentions = "、".join(member.mention for member in members)
+            embed = discord.Embed(
+                title="👋 欢迎新成员！",
+                description=f"欢迎 {mentions} 等 {len(members)} 位新成员加入 **{guild.name}**！",
+                color=discord.Color.blurple(),
+            )
+            if guild.icon:
+                embed.set_thumbnail(url=guild.icon.url)
 
         try:
             await channel.send(embed=embed)
         except discord.Forbidden:
-            logger.warning(f"欢迎消息发送失败，无频道权限（guild={member.guild.id}, channel={channel_id}）")
+            logger.warning(f"欢迎消息发送失败，无频道权限（guild={guild_id}, channel={channel_id}）")
+            return False
         except Exception as e:
             logger.error(f"欢迎消息发送失败: {e}")
+            return False
+        return True
 
     @welcome_group.command(name="设置频道", description="设置新成员加入时发送欢迎消息的频道（管理组）")
     async def set_welcome_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
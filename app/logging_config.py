@@ -1,14 +1,104 @@
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+from typing import Dict, Optional
 
 import config
 
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行 JSON；extra={'log_category': ..., 'fields': {...}} 会作为结构化字段输出。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        category = getattr(record, 'log_category', None)
+        if category:
+            entry['category'] = category
+        fields = getattr(record, 'fields', None)
+        if isinstance(fields, dict):
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """按日志类别（extra 中的 log_category）抽样；WARNING 及以上与未分类日志全部保留。"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'log_category', None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+def _log_file() -> str:
+    """集群模式下每个进程写自己的文件，避免多进程同时轮转同一个文件。"""
+    if config.CLUSTER_ID is None:
+        return config.LOG_FILE
+    root, ext = os.path.splitext(config.LOG_FILE)
+    return f'{root}.cluster{config.CLUSTER_ID}{ext}'
+
+
+def _build_handlers() -> list:
+    formatter = JsonFormatter() if config.LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [
+        logging.handlers.RotatingFileHandler(
+            _log_file(),
+            maxBytes=config.LOG_MAX_BYTES,
+            backupCount=config.LOG_BACKUP_COUNT,
+            encoding='utf-8',
+        )
+    ]
+    if config.LOG_TO_CONSOLE:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
 
 def setup_logging() -> None:
-    logging.basicConfig(
-        level=getattr(logging, config.LOG_LEVEL),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(config.LOG_FILE, encoding='utf-8'),
-            logging.StreamHandler() if config.LOG_TO_CONSOLE else logging.NullHandler(),
-        ],
-    )
+    """日志经由队列交给后台线程写入，事件循环内只做入队。"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(config.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, config.LOG_LEVEL))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *_build_handlers(), respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """停止后台写日志线程，写完队列中剩余的日志。"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -2,8 +2,8 @@ import asyncio
 import logging
 
 import config
-from app.bot.client import FeaturedMessageBot
-from app.logging_config import setup_logging
+from app.bot.client import create_bot
+from app.logging_config import setup_logging, shutdown_logging
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +11,7 @@ logger = logging.getLogger(__name__)
 async def main():
     """主函数"""
     setup_logging()
-    bot = FeaturedMessageBot()
+    bot = create_bot()
 
     try:
         await bot.start(config.DISCORD_TOKEN)
@@ -21,6 +21,7 @@ async def main():
         logger.error(f"❌ 机器人运行时发生错误: {e}")
     finally:
         await bot.close()
+        shutdown_logging()
 
 
 def start_bot():
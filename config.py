@@ -55,8 +55,39 @@ RANKING_PER_PAGE = 20          # 排行榜每页显示数
 THREAD_STATS_PER_PAGE = 5      # 帖子统计每页显示数
 RECORDS_PER_PAGE = 10          # 全服精选列表每页显示数
 
-# 表情符号缓存时间（秒）
-REACTION_CACHE_DURATION = 5
+# 表情符号缓存时间（秒）；表情 gateway 事件会主动让缓存失效，因此可以放宽
+REACTION_CACHE_DURATION = 300
+
+# 表情符号缓存最大条目数（全 bot 共享，超出按最久未使用淘汰）
+REACTION_CACHE_MAX_ENTRIES = 5000
+
+# 帖子元数据（标题/楼主/父论坛）内存缓存条目数；完整数据持久化在数据库 thread_metadata 表
+THREAD_METADATA_CACHE_MAX_ENTRIES = 5000
+
+# 翻页界面已渲染 embed 缓存（数据库写入时自动失效；TTL 兜底用户名/头像等外部变化）
+RENDER_CACHE_MAX_ENTRIES = 500
+RENDER_CACHE_TTL = 600
+
+# 翻页预取：发送某页后在后台渲染相邻页，下一次翻页直接命中缓存
+PAGE_PREFETCH_ENABLED = True
+PAGE_PREFETCH_MAX_CONCURRENCY = 4  # 全 bot 同时进行的预取上限，用尽时跳过
+
+# 全服精选「讚數排序」的后台预计算（结果存入 reaction_ranking_snapshots）
+REACTION_RANKING_REFRESH_INTERVAL = 300  # 后台增量计算间隔（秒）
+REACTION_RANKING_BATCH_SIZE = 500        # 每个服务器每轮最多计算的留言数
+REACTION_RANKING_STALE_HOURS = 24        # 无表情变化的快照多久后重新核对（小时）
+REACTION_RANKING_DIRTY_MAX = 20000       # 内存中待重算标记上限
+REACTION_RANKING_RETRY_MINUTES = 30      # 获取失败的留言首次重试间隔（分钟），之后翻倍，最多 STALE_HOURS
+REACTION_RANKING_REQUEST_COOLDOWN = 60   # 翻页触发的按需计算，同一服务器的最短间隔（秒）
+
+# 慢交互自动 defer：按处理器记录最近耗时，预计超过阈值时先 defer；超过期限仍未回应时由定时器 defer
+AUTO_DEFER_THRESHOLD = 1.5               # 预计耗时（秒，含派发延迟）超过此值时进入处理前先 defer
+AUTO_DEFER_DEADLINE = 2.5                # 交互创建后多少秒仍未回应时自动 defer（Discord 期限为 3 秒）
+AUTO_DEFER_HISTORY = 20                  # 每个处理器保留的耗时样本数
+
+# 出站 REST 请求优先级调度：交互回应从不排队，后台请求（欢迎、发布接口、排行计算、预取等）按路由桶排队
+REST_BACKGROUND_PER_BUCKET = 1           # 每个路由桶同时进行的后台请求上限
+REST_BACKGROUND_MAX_CONCURRENCY = 4      # 全 bot 同时进行的后台请求上限
 
 # ==================== 日志配置 ====================
 # 日志级别
@@ -65,6 +96,20 @@ LOG_LEVEL = 'INFO'  # DEBUG, INFO, WARNING, ERROR, CRITICAL
 # 是否输出到控制台
 LOG_TO_CONSOLE = True
 
+# 日志文件按大小轮转：单个文件上限（字节）与保留的旧文件数
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# 日志格式：'text'（可读文本）或 'json'（每行一条 JSON，便于日志平台检索）
+LOG_FORMAT = 'text'
+
+# 高频日志按类别抽样（0~1，1 为全部保留；WARNING 及以上始终保留）
+# interaction: on_interaction 的每次交互记录；page_timing: 翻页界面渲染耗时
+LOG_SAMPLE_RATES = {
+    'interaction': 1.0,
+    'page_timing': 1.0,
+}
+
 # ==================== 书单网页版整合 ====================
 # 书单网页版地址；当某服开启「网页接管」后，bot 的书单指令会引导用户前往此地址
 BOOKLIST_WEBPAGE_URL = os.getenv('BOOKLIST_WEBPAGE_URL', 'https://odysseia-forum-webpage.pages.dev/booklists')
@@ -81,6 +126,58 @@ BOOKLIST_API_PORT = int(os.getenv('BOOKLIST_API_PORT', '10820'))
 BOOKLIST_API_SECRET = os.getenv('BOOKLIST_API_SECRET', '')
 # 单条 embed 最多渲染的书单条目数（其余以「更多见网页」提示）
 BOOKLIST_API_MAX_ENTRIES = int(os.getenv('BOOKLIST_API_MAX_ENTRIES', '20'))
+# 批量发布（POST /booklist/publish/batch）单次最多书单数，以及同时处理的目标帖数
+BOOKLIST_API_BATCH_MAX = int(os.getenv('BOOKLIST_API_BATCH_MAX', '100'))
+BOOKLIST_API_BATCH_CONCURRENCY = int(os.getenv('BOOKLIST_API_BATCH_CONCURRENCY', '4'))
+# 撤除（POST /booklist/unpublish）时同时进行的消息删除数
+BOOKLIST_API_UNPUBLISH_CONCURRENCY = int(os.getenv('BOOKLIST_API_UNPUBLISH_CONCURRENCY', '5'))
+# 已通过校验的 (帖子, 发布者) 缓存秒数：期间重复更新不再查询帖子元数据
+BOOKLIST_API_THREAD_CHECK_TTL = int(os.getenv('BOOKLIST_API_THREAD_CHECK_TTL', '600'))
+# async 模式（?async=1）任务：后台 worker 数、最多尝试次数、退避基数/上限（秒）与已结束任务保留天数
+BOOKLIST_API_JOB_WORKERS = int(os.getenv('BOOKLIST_API_JOB_WORKERS', '2'))
+BOOKLIST_API_JOB_MAX_ATTEMPTS = int(os.getenv('BOOKLIST_API_JOB_MAX_ATTEMPTS', '5'))
+BOOKLIST_API_JOB_RETRY_BASE = float(os.getenv('BOOKLIST_API_JOB_RETRY_BASE', '5'))
+BOOKLIST_API_JOB_RETRY_MAX = float(os.getenv('BOOKLIST_API_JOB_RETRY_MAX', '300'))
+BOOKLIST_API_JOB_RETENTION_DAYS = int(os.getenv('BOOKLIST_API_JOB_RETENTION_DAYS', '7'))
+
+# Prometheus 指标接口（GET /metrics）：书单发布接口运行时挂在其上，否则单独监听下列地址
+METRICS_ENABLED = _env_bool('METRICS_ENABLED', False)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '10821'))
+
+# ==================== 内存 / 缓存档案 ====================
+# discord.py 成员与消息缓存档案：full（默认，缓存全部成员并在启动时拉取）、
+# balanced（只缓存运行期间新加入的成员，消息缓存 200 条）、minimal（不缓存成员与消息）
+CACHE_PROFILE = os.getenv('CACHE_PROFILE', 'full').strip().lower()
+
+# ==================== 分片 ====================
+# 服务器数量较多时启用 AutoShardedBot：每个分片一条 gateway 连接
+SHARDING_ENABLED = _env_bool('SHARDING_ENABLED', False)
+# 分片数；留空使用 Discord 推荐值
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+
+# 多进程集群（python -m app.cluster）：launcher 为每个进程设置 CLUSTER_ID 与 CLUSTER_SHARD_IDS，
+# 进程间经本机 IPC 同步缓存失效并转发跨分片操作；单进程运行时保持留空
+CLUSTER_ID = int(os.getenv('CLUSTER_ID')) if os.getenv('CLUSTER_ID') else None
+CLUSTER_COUNT = int(os.getenv('CLUSTER_COUNT', '2'))
+CLUSTER_SHARD_IDS = [int(x) for x in os.getenv('CLUSTER_SHARD_IDS', '').split(',') if x.strip()]
+CLUSTER_IPC_HOST = os.getenv('CLUSTER_IPC_HOST', '127.0.0.1')
+CLUSTER_IPC_PORT = int(os.getenv('CLUSTER_IPC_PORT', '10830'))
+
+# ==================== 指令同步 ====================
+# 启动时只在指令树（斜杠指令组 + 右键菜单）的哈希变化时才同步到 Discord
+# 设为 true 时本次启动无视哈希强制同步
+COMMAND_SYNC_FORCE = _env_bool('COMMAND_SYNC_FORCE', False)
+# 开发用：逗号分隔的服务器 ID，非空时只同步到这些服务器（即时生效），不做全局同步
+COMMAND_SYNC_GUILD_IDS = [int(x) for x in os.getenv('COMMAND_SYNC_GUILD_IDS', '').split(',') if x.strip()]
+
+# ==================== 新成员欢迎 ====================
+# 每服发送一条欢迎消息后，此时间窗（秒）内加入的成员合并到下一条消息；空闲时加入立即单独欢迎
+WELCOME_COALESCE_SECONDS = float(os.getenv('WELCOME_COALESCE_SECONDS', '3'))
+# 一条合并欢迎消息最多提及的成员数
+WELCOME_BATCH_MAX = int(os.getenv('WELCOME_BATCH_MAX', '20'))
+# 每服待欢迎队列上限，超出的加入不再欢迎（计入丢弃数）
+WELCOME_QUEUE_MAX = int(os.getenv('WELCOME_QUEUE_MAX', '200'))
 
 # ==================== 功能开关 ====================
 # 是否启用表情符号统计
@@ -99,6 +196,16 @@ MIN_MESSAGE_LENGTH = 10
 # 精选留言最大字符数（0表示无限制）
 MAX_MESSAGE_LENGTH = 0
 
+# 是否拒绝只含表情符号的留言
+QUALITY_REJECT_EMOJI_ONLY = True
+
+# 去掉表情后不同字符数不超过此值（且长度大于 5）视为重复内容；0 表示不检查
+QUALITY_REPEAT_MAX_DISTINCT = 2
+# 以上四项是默认值，各服务器可用 /留言 精选标准 覆盖（即时生效）
+
+# /留言 批量精选 扫描的近期留言数（单次 REST 请求上限 100）
+BULK_FEATURE_SCAN_LIMIT = 50
+
 # 是否允许精选包含附件的消息
 ALLOW_ATTACHMENTS = True
 
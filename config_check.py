@@ -102,10 +102,29 @@ def show_config_summary():
             ("帖子统计每页", f"{config.THREAD_STATS_PER_PAGE} 条"),
             ("全服精选每页", f"{config.RECORDS_PER_PAGE} 条"),
             ("表情缓存时间", f"{config.REACTION_CACHE_DURATION} 秒"),
+            ("表情缓存容量", f"{config.REACTION_CACHE_MAX_ENTRIES} 条"),
+            ("帖子元数据缓存容量", f"{config.THREAD_METADATA_CACHE_MAX_ENTRIES} 条"),
+            ("翻页渲染缓存", f"{config.RENDER_CACHE_MAX_ENTRIES} 条 / {config.RENDER_CACHE_TTL} 秒"),
+            ("自动 defer", f"预计 > {config.AUTO_DEFER_THRESHOLD:g} 秒，或 {config.AUTO_DEFER_DEADLINE:g} 秒未回应"),
+            ("后台 REST 并发", f"每桶 {config.REST_BACKGROUND_PER_BUCKET}，全局 {config.REST_BACKGROUND_MAX_CONCURRENCY}"),
+            ("翻页预取", f"并发 {config.PAGE_PREFETCH_MAX_CONCURRENCY}" if config.PAGE_PREFETCH_ENABLED else "关闭"),
+            ("讚數排行计算间隔", f"{config.REACTION_RANKING_REFRESH_INTERVAL} 秒"),
+            ("讚數排行每轮上限", f"{config.REACTION_RANKING_BATCH_SIZE} 条"),
             ("日志级别", config.LOG_LEVEL),
             ("日志输出到控制台", "是" if config.LOG_TO_CONSOLE else "否"),
+            ("日志格式", config.LOG_FORMAT),
+            ("日志轮转", f"{config.LOG_MAX_BYTES // (1024 * 1024)} MB × {config.LOG_BACKUP_COUNT}"),
+            ("指标接口", f"{config.METRICS_HOST}:{config.METRICS_PORT}/metrics" if config.METRICS_ENABLED else "关闭"),
+            ("指令同步", f"仅服务器 {', '.join(map(str, config.COMMAND_SYNC_GUILD_IDS))}" if config.COMMAND_SYNC_GUILD_IDS else ("全局（强制）" if config.COMMAND_SYNC_FORCE else "全局（哈希变化时）")),
+            ("缓存档案", config.CACHE_PROFILE),
+            ("欢迎合并", f"{config.WELCOME_COALESCE_SECONDS:g} 秒内合并，每条最多 {config.WELCOME_BATCH_MAX} 人，队列上限 {config.WELCOME_QUEUE_MAX}"),
+            ("分片", (f"{config.SHARD_COUNT} 个" if config.SHARD_COUNT else "自动（Discord 推荐值）") if config.SHARDING_ENABLED else "关闭"),
+            ("日志抽样", ", ".join(f"{k}={v}" for k, v in config.LOG_SAMPLE_RATES.items())),
             ("最小消息长度", f"{config.MIN_MESSAGE_LENGTH} 字符"),
             ("最大消息长度", f"{config.MAX_MESSAGE_LENGTH} 字符" if config.MAX_MESSAGE_LENGTH > 0 else "无限制"),
+            ("拒绝只含表情", "是" if config.QUALITY_REJECT_EMOJI_ONLY else "否"),
+            ("批量精选扫描留言数", f"{config.BULK_FEATURE_SCAN_LIMIT} 条"),
+            ("重复内容判定", f"不同字符 ≤ {config.QUALITY_REPEAT_MAX_DISTINCT}" if config.QUALITY_REPEAT_MAX_DISTINCT else "不检查"),
             ("鉴赏家角色", config.APPRECIATOR_ROLE_NAME),
             ("鉴赏家最低被引荐", f"{config.APPRECIATOR_MIN_FEATURED} 次"),
             ("鉴赏家最低引荐", f"{config.APPRECIATOR_MIN_REFERRALS} 人"),
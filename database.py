@@ -1,18 +1,58 @@
 import sqlite3
 import json
+import logging
 import re
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 集群模式下多个进程共用同一数据库文件：写锁被占用时最多等待这么久，而不是立即报 database is locked
+BUSY_TIMEOUT_SECONDS = 30.0
 
 class DatabaseManager:
     def __init__(self, db_file: str):
         self.db_file = db_file
+        self._write_listeners: List[Callable[[str, Dict], None]] = []
         self.init_database()
+
+    def add_write_listener(self, callback: Callable[[str, Dict], None]):
+        """注册写入事件监听：callback(event, payload)，在写入提交后同步调用。
+
+        事件：featured_added / featured_removed / booklist_entries / booklist_link /
+        guild_settings / reaction_snapshot / message_quality。用于让上层缓存失效；
+        guild_settings 带 setting/value，GuildSettingsCache 直接写入新值。
+        另有 resync（无负载，集群 IPC 重连后派发）：可能错过了写入事件，缓存应整体重建。
+        """
+        self._write_listeners.append(callback)
+
+    def remove_write_listener(self, callback: Callable[[str, Dict], None]):
+        """移除写入事件监听（如 Cog 卸载时）；未注册时忽略。"""
+        try:
+            self._write_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def apply_external_write(self, event: str, payload: Dict):
+        """其他集群进程的写入事件：按本进程写入同样通知监听者，使本地缓存失效。"""
+        self._emit_write(event, **payload)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT_SECONDS)
+
+    def _emit_write(self, event: str, **payload):
+        for callback in self._write_listeners:
+            try:
+                callback(event, payload)
+            except Exception as e:
+                logger.warning(f"写入事件监听处理失败 event={event}: {e}")
     
     def init_database(self):
         """初始化数据库表"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
+        # WAL：读不阻塞写，多进程并发时锁冲突更少（设置持久保存在数据库文件中）
+        cursor.execute('PRAGMA journal_mode=WAL')
         
         # 创建精選记录表 (支持多群组)
         cursor.execute('''
@@ -159,10 +199,15 @@ class DatabaseManager:
                 published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 is_active INTEGER DEFAULT 1,
+                content_hash TEXT,
                 UNIQUE(webpage_booklist_id, channel_id)
             )
         ''')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_webpage_published_active ON webpage_published_booklists(message_id, is_active)')
+        # 迁移：已发布内容的哈希（内容未变化时跳过编辑）
+        cursor.execute('PRAGMA table_info(webpage_published_booklists)')
+        if 'content_hash' not in {column[1] for column in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE webpage_published_booklists ADD COLUMN content_hash TEXT')
 
         # 公开书单最小索引（不存快照，仅用于重启恢复分页按钮）
         cursor.execute('''
@@ -188,12 +233,91 @@ class DatabaseManager:
             )
         ''')
 
+        # 帖子元数据（标题/父论坛/楼主/归档状态），供列表渲染与校验时免去 REST 请求；
+        # 归档帖不在 gateway 缓存中，靠这里保留最近一次已知的信息
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS thread_metadata (
+                thread_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                parent_id INTEGER,
+                parent_is_forum INTEGER NOT NULL DEFAULT 0,
+                owner_id INTEGER,
+                archived INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 全服精选表情排行快照：由后台任务逐步计算，dirty 表示近期有表情变化待重算；
+        # 获取失败（留言已删除、频道无权限等）时记下失败次数，retry_after 之前不再重试
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reaction_ranking_snapshots (
+                thread_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                guild_id INTEGER NOT NULL,
+                reaction_count INTEGER NOT NULL DEFAULT 0,
+                dirty INTEGER NOT NULL DEFAULT 0,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                failures INTEGER NOT NULL DEFAULT 0,
+                retry_after TIMESTAMP,
+                PRIMARY KEY (thread_id, message_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reaction_snapshots_guild_count
+            ON reaction_ranking_snapshots (guild_id, reaction_count DESC)
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reaction_ranking_state (
+                guild_id INTEGER PRIMARY KEY,
+                refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 每服留言质量规则（NULL 表示沿用 config 默认值）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS message_quality_settings (
+                guild_id INTEGER PRIMARY KEY,
+                min_length INTEGER,
+                max_length INTEGER,
+                reject_emoji_only INTEGER,
+                repeat_max_distinct INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 书单发布接口的异步任务（async 模式）；未完成的任务重启后继续执行
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS booklist_api_jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TIMESTAMP,
+                result_status INTEGER,
+                result TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_booklist_api_jobs_status ON booklist_api_jobs(status, created_at)')
+
+        # 进程级键值状态（如已同步的指令树哈希）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bot_state (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
         conn.commit()
         conn.close()
     
     def is_already_featured(self, thread_id: int, message_id: int) -> bool:
         """检查指定留言在该帖中是否已经被精選过（同一则留言不可重复精选）"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -208,7 +332,7 @@ class DatabaseManager:
 
     def get_featured_message_by_id(self, message_id: int, thread_id: int) -> Dict:
         """根据留言ID和帖子ID获取精選记录"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -235,7 +359,7 @@ class DatabaseManager:
     def remove_featured_message(self, message_id: int, thread_id: int) -> bool:
         """移除精選记录并清理相关数据"""
         try:
-            conn = sqlite3.connect(self.db_file)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # 获取精選记录信息
@@ -253,10 +377,24 @@ class DatabaseManager:
                     DELETE FROM featured_messages 
                     WHERE message_id = ? AND thread_id = ?
                 ''', (message_id, thread_id))
+
+                # 2. 删除表情排行快照
+                cursor.execute('''
+                    DELETE FROM reaction_ranking_snapshots
+                    WHERE message_id = ? AND thread_id = ?
+                ''', (message_id, thread_id))
                 
                 # 提交事务
                 cursor.execute('COMMIT')
                 conn.close()
+                self._emit_write(
+                    'featured_removed',
+                    guild_id=featured_info['guild_id'],
+                    thread_id=thread_id,
+                    message_id=message_id,
+                    author_id=featured_info['author_id'],
+                    featured_by_id=featured_info['featured_by_id'],
+                )
                 return True
                 
             except Exception as e:
@@ -275,7 +413,7 @@ class DatabaseManager:
                            featured_by_id: int, featured_by_name: str, reason: str = None, bot_message_id: int = None) -> bool:
         """添加精選记录"""
         try:
-            conn = sqlite3.connect(self.db_file)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -286,15 +424,97 @@ class DatabaseManager:
             
             conn.commit()
             conn.close()
+            self._emit_write(
+                'featured_added',
+                guild_id=guild_id,
+                thread_id=thread_id,
+                message_id=message_id,
+                author_id=author_id,
+                featured_by_id=featured_by_id,
+            )
             return True
         except sqlite3.IntegrityError:
             # 违反唯一约束，说明已经精選过
             conn.close()
             return False
     
+    def set_featured_bot_message_id(self, thread_id: int, message_id: int, bot_message_id: int) -> bool:
+        """回填精選通知消息 ID（精選記錄先於通知寫入時使用）"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE featured_messages SET bot_message_id = ? WHERE thread_id = ? AND message_id = ?',
+            (bot_message_id, thread_id, message_id)
+        )
+        updated = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return updated
+    
+    def get_all_featured_keys(self) -> List[Tuple[int, int]]:
+        """返回全部精選记录的 (thread_id, message_id)，供启动时建立内存索引"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT thread_id, message_id FROM featured_messages')
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def add_featured_messages_bulk(self, guild_id: int, thread_id: int, featured_by_id: int,
+                                   featured_by_name: str, records: List[Dict], reason: str = None) -> List[int]:
+        """在一个事务中批量添加同一帖的精選记录。
+
+        records 每项含 message_id / author_id / author_name；已精選的留言跳过，返回实际写入的 message_id。
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        inserted = []
+        for record in records:
+            cursor.execute('''
+                INSERT OR IGNORE INTO featured_messages
+                (guild_id, thread_id, message_id, author_id, author_name, featured_by_id, featured_by_name, reason)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (guild_id, thread_id, record['message_id'], record['author_id'], record['author_name'],
+                  featured_by_id, featured_by_name, reason))
+            if cursor.rowcount:
+                inserted.append(record)
+        conn.commit()
+        conn.close()
+
+        for record in inserted:
+            self._emit_write(
+                'featured_added',
+                guild_id=guild_id,
+                thread_id=thread_id,
+                message_id=record['message_id'],
+                author_id=record['author_id'],
+                featured_by_id=featured_by_id,
+            )
+        return [record['message_id'] for record in inserted]
+
+    def set_featured_bot_message_ids(self, thread_id: int, message_ids: List[int], bot_message_id: int):
+        """批量回填精選通知消息 ID（多则精選共用一条合并通知）"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany(
+            'UPDATE featured_messages SET bot_message_id = ? WHERE thread_id = ? AND message_id = ?',
+            [(bot_message_id, thread_id, message_id) for message_id in message_ids]
+        )
+        conn.commit()
+        conn.close()
+
+    def count_featured_by_bot_message(self, bot_message_id: int) -> int:
+        """统计引用同一条精選通知的记录数（合并通知需全部取消后才删除）"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM featured_messages WHERE bot_message_id = ?', (bot_message_id,))
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
     def get_user_stats(self, user_id: int, guild_id: int, include_all_guilds: bool = False) -> Dict:
         """获取用户统计信息（默认指定群组，可选跨群组汇总）"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         if include_all_guilds:
@@ -347,9 +567,26 @@ class DatabaseManager:
             'featuring_count': featuring_count
         }
     
+    def get_appreciator_stats(self, guild_id: Optional[int] = None) -> Dict[int, Tuple[int, int]]:
+        """一次汇总全部用户的 (被精選次数, 引荐人数)，口径同 get_user_stats；guild_id 为 None 时跨群组。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        where, params = ('WHERE guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+
+        cursor.execute(f'SELECT author_id, COUNT(*) FROM featured_messages {where} GROUP BY author_id', params)
+        stats = {user_id: (count, 0) for user_id, count in cursor.fetchall()}
+        cursor.execute(f'''
+            SELECT featured_by_id, COUNT(DISTINCT author_id) FROM featured_messages {where} GROUP BY featured_by_id
+        ''', params)
+        for user_id, count in cursor.fetchall():
+            stats[user_id] = (stats.get(user_id, (0, 0))[0], count)
+
+        conn.close()
+        return stats
+
     def get_thread_stats(self, thread_id: int) -> List[Dict]:
         """获取帖子精選统计"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -375,7 +612,7 @@ class DatabaseManager:
     
     def get_user_featured_records(self, user_id: int, guild_id: int, page: int = 1, per_page: int = 5) -> Tuple[List[Dict], int]:
         """获取用户在指定群组被精選的记录（分页）"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # 获取总记录数
@@ -418,7 +655,7 @@ class DatabaseManager:
 
     def get_user_referral_records(self, user_id: int, guild_id: int, page: int = 1, per_page: int = 5) -> Tuple[List[Dict], int]:
         """获取用户在指定群组精選別人的记录（分页）"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # 获取总记录数
@@ -469,7 +706,7 @@ class DatabaseManager:
 
     def get_referral_ranking(self, guild_id: int, page: int = 1, per_page: int = 20, start_date: str = None, end_date: str = None) -> Tuple[List[Dict], int]:
         """获取指定群组的引荐人数排行榜（分页，支持时间范围）"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # 构建查询条件
@@ -538,7 +775,7 @@ class DatabaseManager:
     def get_all_featured_messages(self, guild_id: int, page: int = 1, per_page: int = 10, 
                                  sort_by: str = "time", start_date: str = None, end_date: str = None) -> Tuple[List[Dict], int]:
         """获取全服精選留言数据（分页，支持时间范围和时间/讚数排序）"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # 构建查询条件
@@ -606,7 +843,7 @@ class DatabaseManager:
     # ==================== 书单 2.0 ====================
     def ensure_user_booklists(self, user_id: int):
         """确保用户拥有 0~9 共 10 张书单。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         for list_id in range(10):
@@ -622,7 +859,7 @@ class DatabaseManager:
         """获取用户 10 张书单概览（标题 + 帖子数）。"""
         self.ensure_user_booklists(user_id)
 
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT
@@ -649,7 +886,7 @@ class DatabaseManager:
         """获取单张书单详情。"""
         self.ensure_user_booklists(user_id)
 
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT title FROM user_booklists
@@ -690,7 +927,7 @@ class DatabaseManager:
         """重命名书单标题。"""
         self.ensure_user_booklists(user_id)
 
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             UPDATE user_booklists
@@ -708,7 +945,7 @@ class DatabaseManager:
 
         self.ensure_user_booklists(user_id)
 
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -738,6 +975,7 @@ class DatabaseManager:
             ''', (user_id, list_id, thread_guild_id, thread_id, thread_title, thread_url, review))
             conn.commit()
             conn.close()
+            self._emit_write('booklist_entries', user_id=user_id, guild_id=thread_guild_id)
             return True, "已成功添加到书单。"
         except sqlite3.IntegrityError:
             conn.close()
@@ -758,7 +996,7 @@ class DatabaseManager:
 
     def remove_booklist_entry_by_index(self, user_id: int, list_id: int, entry_index: int) -> Tuple[bool, str]:
         """按当前书单展示顺序删除第 N 条。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         entry = self._get_entry_by_index(cursor, user_id, list_id, entry_index)
@@ -769,6 +1007,7 @@ class DatabaseManager:
         cursor.execute('DELETE FROM user_booklist_entries WHERE id = ?', (entry[0],))
         conn.commit()
         conn.close()
+        self._emit_write('booklist_entries', user_id=user_id, guild_id=None)
         return True, f"已删除帖子：{entry[2]}"
 
     def move_booklist_entry_by_index(self, user_id: int, from_list_id: int, entry_index: int, to_list_id: int) -> Tuple[bool, str]:
@@ -780,7 +1019,7 @@ class DatabaseManager:
 
         self.ensure_user_booklists(user_id)
 
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         entry = self._get_entry_by_index(cursor, user_id, from_list_id, entry_index)
@@ -817,11 +1056,12 @@ class DatabaseManager:
         ''', (to_list_id, entry[0]))
         conn.commit()
         conn.close()
+        self._emit_write('booklist_entries', user_id=user_id, guild_id=None)
         return True, f"已将《{thread_title}》搬移到书单 {to_list_id}。"
 
     def update_booklist_entry_review_by_index(self, user_id: int, list_id: int, entry_index: int, new_review: str) -> Tuple[bool, str]:
         """按序号更新帖子评价。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         entry = self._get_entry_by_index(cursor, user_id, list_id, entry_index)
@@ -841,7 +1081,7 @@ class DatabaseManager:
     def create_public_booklist_record(self, user_id: int, list_id: int, guild_id: int,
                                       channel_id: int, message_id: int, intro: str):
         """记录公开书单消息，便于追踪/下架。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO public_booklists
@@ -853,7 +1093,7 @@ class DatabaseManager:
 
     def deactivate_public_booklist(self, user_id: int, message_id: int) -> bool:
         """下架公开书单（仅发布者）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             UPDATE public_booklists
@@ -867,7 +1107,7 @@ class DatabaseManager:
 
     def set_user_booklist_thread_url(self, user_id: int, guild_id: int, thread_url: str):
         """设置或更新用户书单帖链接；空值视为删除。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         if not thread_url or not thread_url.strip():
@@ -877,6 +1117,7 @@ class DatabaseManager:
             ''', (user_id, guild_id))
             conn.commit()
             conn.close()
+            self._emit_write('booklist_link', user_id=user_id, guild_id=guild_id)
             return
 
         cursor.execute('''
@@ -889,11 +1130,12 @@ class DatabaseManager:
 
         conn.commit()
         conn.close()
+        self._emit_write('booklist_link', user_id=user_id, guild_id=guild_id)
 
     def get_user_booklist_thread_url(self, user_id: int, guild_id: Optional[int] = None,
                                      fallback_any_guild: bool = True) -> Optional[str]:
         """获取用户书单帖链接；优先当前群组，必要时可回退到该用户任一已绑定链接。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         row = None
@@ -918,9 +1160,18 @@ class DatabaseManager:
         conn.close()
         return row[0] if row else None
 
+    def get_booklist_linked_user_ids(self) -> set:
+        """已在任一群组绑定书单帖链接的用户ID。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT user_id FROM user_booklist_thread_links')
+        rows = cursor.fetchall()
+        conn.close()
+        return {row[0] for row in rows}
+
     def get_booklist_thread_owner(self, guild_id: int, thread_id: int) -> Optional[int]:
         """根据群组+帖子ID查找书单帖绑定人（楼主）。没有则返回 None。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT user_id, thread_url
@@ -945,7 +1196,7 @@ class DatabaseManager:
     def add_public_booklist_index(self, message_id: int, publisher_user_id: int, list_id: int,
                                   guild_id: int, channel_id: int):
         """保存公开书单最小索引。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO public_booklist_indexes
@@ -963,7 +1214,7 @@ class DatabaseManager:
 
     def get_active_public_booklist_indexes(self) -> List[Dict]:
         """获取所有仍激活的公开书单索引。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT message_id, publisher_user_id, list_id, guild_id, channel_id
@@ -986,7 +1237,7 @@ class DatabaseManager:
 
     def deactivate_public_booklist_index(self, message_id: int):
         """移除公开书单索引（消息被删除或不可访问时）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             DELETE FROM public_booklist_indexes
@@ -997,7 +1248,7 @@ class DatabaseManager:
 
     def get_guild_booklist_summary(self, guild_id: int, page: int = 1, per_page: int = 10) -> Tuple[List[Dict], int]:
         """获取本服书单概览：至少有 1 帖书单内容的用户。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -1037,7 +1288,7 @@ class DatabaseManager:
 
     def set_booklist_thread_whitelist(self, guild_id: int, forum_channel_id: int):
         """设置本服书单帖白名单论坛频道。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO booklist_thread_whitelist (guild_id, forum_channel_id, updated_at)
@@ -1048,10 +1299,11 @@ class DatabaseManager:
         ''', (guild_id, forum_channel_id))
         conn.commit()
         conn.close()
+        self._emit_write('guild_settings', guild_id=guild_id, setting='booklist_whitelist', value=forum_channel_id)
 
     def get_booklist_thread_whitelist(self, guild_id: int) -> Optional[int]:
         """获取本服书单帖白名单论坛频道ID。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT forum_channel_id
@@ -1064,7 +1316,7 @@ class DatabaseManager:
 
     def set_booklist_webpage_takeover(self, guild_id: int, enabled: bool):
         """设置本服书单是否由网页版接管（启用后 bot 自家书单指令让位）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO booklist_webpage_takeover (guild_id, enabled, updated_at)
@@ -1075,10 +1327,11 @@ class DatabaseManager:
         ''', (guild_id, 1 if enabled else 0))
         conn.commit()
         conn.close()
+        self._emit_write('guild_settings', guild_id=guild_id, setting='webpage_takeover', value=bool(enabled))
 
     def is_booklist_webpage_takeover(self, guild_id: int) -> bool:
         """查询本服书单是否已由网页版接管（默认 False）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT enabled
@@ -1091,7 +1344,7 @@ class DatabaseManager:
 
     def set_welcome_channel(self, guild_id: int, channel_id: int):
         """设置本服新成员欢迎频道并启用。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO welcome_settings (guild_id, channel_id, enabled, updated_at)
@@ -1103,10 +1356,11 @@ class DatabaseManager:
         ''', (guild_id, channel_id))
         conn.commit()
         conn.close()
+        self._emit_write('guild_settings', guild_id=guild_id, setting='welcome_channel', value=channel_id)
 
     def disable_welcome(self, guild_id: int):
         """关闭本服新成员欢迎消息（保留已设置的频道记录）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             UPDATE welcome_settings SET enabled = 0, updated_at = CURRENT_TIMESTAMP
@@ -1114,10 +1368,29 @@ class DatabaseManager:
         ''', (guild_id,))
         conn.commit()
         conn.close()
+        self._emit_write('guild_settings', guild_id=guild_id, setting='welcome_channel', value=None)
+
+    def get_all_guild_settings(self) -> Dict[str, Dict[int, object]]:
+        """一次读出全部服务器的小型设置（启动时载入 GuildSettingsCache 用）。
+
+        返回 {'welcome_channel': {guild_id: channel_id}（仅已启用）,
+              'webpage_takeover': {guild_id: True}（仅已开启）,
+              'booklist_whitelist': {guild_id: forum_channel_id}}
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT guild_id, channel_id FROM welcome_settings WHERE enabled = 1 AND channel_id IS NOT NULL')
+        welcome = dict(cursor.fetchall())
+        cursor.execute('SELECT guild_id FROM booklist_webpage_takeover WHERE enabled = 1')
+        takeover = {row[0]: True for row in cursor.fetchall()}
+        cursor.execute('SELECT guild_id, forum_channel_id FROM booklist_thread_whitelist')
+        whitelist = dict(cursor.fetchall())
+        conn.close()
+        return {'welcome_channel': welcome, 'webpage_takeover': takeover, 'booklist_whitelist': whitelist}
 
     def get_welcome_channel(self, guild_id: int) -> Optional[int]:
         """获取本服已启用的欢迎频道ID；未设置或已关闭则返回 None。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT channel_id, enabled
@@ -1132,30 +1405,32 @@ class DatabaseManager:
 
     def upsert_webpage_published_booklist(self, webpage_booklist_id: int, guild_id: int,
                                           channel_id: int, message_id: int,
-                                          publisher_user_id: int):
+                                          publisher_user_id: int,
+                                          content_hash: Optional[str] = None):
         """记录/更新网页书单在某频道的发布消息映射（同一书单+频道唯一）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO webpage_published_booklists
-                (webpage_booklist_id, guild_id, channel_id, message_id, publisher_user_id, updated_at, is_active)
-            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, 1)
+                (webpage_booklist_id, guild_id, channel_id, message_id, publisher_user_id, updated_at, is_active, content_hash)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, 1, ?)
             ON CONFLICT(webpage_booklist_id, channel_id) DO UPDATE SET
                 message_id = excluded.message_id,
                 publisher_user_id = excluded.publisher_user_id,
                 guild_id = excluded.guild_id,
                 updated_at = CURRENT_TIMESTAMP,
-                is_active = 1
-        ''', (webpage_booklist_id, guild_id, channel_id, message_id, publisher_user_id))
+                is_active = 1,
+                content_hash = excluded.content_hash
+        ''', (webpage_booklist_id, guild_id, channel_id, message_id, publisher_user_id, content_hash))
         conn.commit()
         conn.close()
 
     def get_webpage_published_booklist(self, webpage_booklist_id: int, channel_id: int) -> Optional[Dict]:
         """获取网页书单在某频道的有效发布记录（无则返回 None）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT message_id, guild_id, channel_id, publisher_user_id
+            SELECT message_id, guild_id, channel_id, publisher_user_id, content_hash
             FROM webpage_published_booklists
             WHERE webpage_booklist_id = ? AND channel_id = ? AND is_active = 1
         ''', (webpage_booklist_id, channel_id))
@@ -1168,11 +1443,12 @@ class DatabaseManager:
             'guild_id': row[1],
             'channel_id': row[2],
             'publisher_user_id': row[3],
+            'content_hash': row[4],
         }
 
     def deactivate_webpage_published_booklist(self, message_id: int):
         """消息被删除时停用对应的网页书单发布记录。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             UPDATE webpage_published_booklists
@@ -1182,9 +1458,25 @@ class DatabaseManager:
         conn.commit()
         conn.close()
 
+    def deactivate_webpage_published_booklists(self, message_ids: List[int]) -> int:
+        """批量停用发布记录（一次事务），返回实际停用的条数。"""
+        if not message_ids:
+            return 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany('''
+            UPDATE webpage_published_booklists
+            SET is_active = 0, updated_at = CURRENT_TIMESTAMP
+            WHERE message_id = ? AND is_active = 1
+        ''', [(message_id,) for message_id in message_ids])
+        deactivated = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return deactivated
+
     def get_active_webpage_published_by_booklist(self, webpage_booklist_id: int) -> List[Dict]:
         """列出某网页书单当前所有有效的发布记录（可能发布到多个帖）。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT message_id, channel_id, guild_id
@@ -1198,9 +1490,99 @@ class DatabaseManager:
             for r in rows
         ]
 
+    def create_booklist_api_job(self, job_id: str, kind: str, payload: Dict):
+        """新建一条待执行的书单接口异步任务。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO booklist_api_jobs (job_id, kind, payload)
+            VALUES (?, ?, ?)
+        ''', (job_id, kind, json.dumps(payload, ensure_ascii=False)))
+        conn.commit()
+        conn.close()
+
+    def get_booklist_api_job(self, job_id: str) -> Optional[Dict]:
+        """读取异步任务（payload/result 已解码）；不存在返回 None。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT job_id, kind, payload, status, attempts, next_attempt_at,
+                   result_status, result, created_at, updated_at
+            FROM booklist_api_jobs
+            WHERE job_id = ?
+        ''', (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if not row:
+            return None
+        return {
+            'job_id': row[0],
+            'kind': row[1],
+            'payload': json.loads(row[2]),
+            'status': row[3],
+            'attempts': row[4],
+            'next_attempt_at': row[5],
+            'result_status': row[6],
+            'result': json.loads(row[7]) if row[7] is not None else None,
+            'created_at': row[8],
+            'updated_at': row[9],
+        }
+
+    def update_booklist_api_job(self, job_id: str, status: str, attempts: int,
+                                retry_in: Optional[float] = None,
+                                result_status: Optional[int] = None,
+                                result: Optional[Dict] = None):
+        """更新异步任务的状态、尝试次数与最近一次结果；retry_in 为距下次重试的秒数（None 表示无需重试）。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE booklist_api_jobs
+            SET status = ?, attempts = ?,
+                next_attempt_at = CASE WHEN ? IS NULL THEN NULL ELSE datetime('now', '+' || ? || ' seconds') END,
+                result_status = COALESCE(?, result_status),
+                result = COALESCE(?, result),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE job_id = ?
+        ''', (
+            status, attempts, retry_in, retry_in, result_status,
+            json.dumps(result, ensure_ascii=False) if result is not None else None,
+            job_id,
+        ))
+        conn.commit()
+        conn.close()
+
+    def get_unfinished_booklist_api_jobs(self) -> List[Dict]:
+        """列出未完成（pending/running）的异步任务，按创建顺序；retry_in 为距下次尝试的秒数。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT job_id, payload,
+                   MAX(0, COALESCE((julianday(next_attempt_at) - julianday('now')) * 86400, 0))
+            FROM booklist_api_jobs
+            WHERE status IN ('pending', 'running')
+            ORDER BY created_at, rowid
+        ''')
+        rows = cursor.fetchall()
+        conn.close()
+        return [{'job_id': r[0], 'payload': json.loads(r[1]), 'retry_in': r[2]} for r in rows]
+
+    def delete_finished_booklist_api_jobs(self, older_than_days: int) -> int:
+        """删除早于指定天数的已完成/已失败任务，返回删除条数。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM booklist_api_jobs
+            WHERE status IN ('done', 'failed')
+              AND updated_at < datetime('now', ?)
+        ''', (f'-{int(older_than_days)} days',))
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return deleted
+
     def clear_booklist_thread_whitelist(self, guild_id: int):
         """清除本服书单帖白名单。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             DELETE FROM booklist_thread_whitelist
@@ -1208,10 +1590,11 @@ class DatabaseManager:
         ''', (guild_id,))
         conn.commit()
         conn.close()
+        self._emit_write('guild_settings', guild_id=guild_id, setting='booklist_whitelist', value=None)
 
     def clear_all_booklist_thread_links_in_guild(self, guild_id: int) -> int:
         """清除本服所有用户书单帖链接绑定，返回清除条数。"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             DELETE FROM user_booklist_thread_links
@@ -1220,4 +1603,311 @@ class DatabaseManager:
         affected = cursor.rowcount if cursor.rowcount is not None else 0
         conn.commit()
         conn.close()
+        self._emit_write('booklist_link', user_id=None, guild_id=guild_id)
+        return affected
+
+    # ==================== 帖子元数据 ====================
+    def upsert_thread_metadata(self, thread_id: int, guild_id: int, title: str, parent_id: Optional[int],
+                               parent_is_forum: bool, owner_id: Optional[int], archived: bool):
+        """记录/更新帖子元数据。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO thread_metadata
+                (thread_id, guild_id, title, parent_id, parent_is_forum, owner_id, archived, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thread_id) DO UPDATE SET
+                guild_id = excluded.guild_id,
+                title = excluded.title,
+                parent_id = excluded.parent_id,
+                parent_is_forum = excluded.parent_is_forum,
+                owner_id = excluded.owner_id,
+                archived = excluded.archived,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (thread_id, guild_id, title, parent_id, 1 if parent_is_forum else 0, owner_id, 1 if archived else 0))
+        conn.commit()
+        conn.close()
+
+    def get_thread_metadata_bulk(self, thread_ids: List[int]) -> Dict[int, Dict]:
+        """批量获取帖子元数据，返回 {thread_id: 元数据}；不存在的帖子不会出现在结果中。"""
+        ids = list(dict.fromkeys(thread_ids))
+        if not ids:
+            return {}
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        placeholders = ",".join("?" for _ in ids)
+        cursor.execute(f'''
+            SELECT thread_id, guild_id, title, parent_id, parent_is_forum, owner_id, archived
+            FROM thread_metadata
+            WHERE thread_id IN ({placeholders})
+        ''', ids)
+        rows = cursor.fetchall()
+        conn.close()
+        return {
+            row[0]: {
+                'thread_id': row[0],
+                'guild_id': row[1],
+                'title': row[2],
+                'parent_id': row[3],
+                'parent_is_forum': bool(row[4]),
+                'owner_id': row[5],
+                'archived': bool(row[6]),
+            }
+            for row in rows
+        }
+
+    def get_thread_metadata(self, thread_id: int) -> Optional[Dict]:
+        """获取单个帖子的元数据（无则返回 None）。"""
+        return self.get_thread_metadata_bulk([thread_id]).get(thread_id)
+
+    def delete_thread_metadata(self, thread_id: int):
+        """帖子被删除时移除元数据。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM thread_metadata WHERE thread_id = ?', (thread_id,))
+        conn.commit()
+        conn.close()
+
+    # ==================== 表情排行快照 ====================
+    def get_featured_guild_ids(self) -> List[int]:
+        """获取有精选记录的服务器 ID 列表。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT guild_id FROM featured_messages')
+        rows = cursor.fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def mark_reaction_snapshots_dirty(self, keys: List[Tuple[int, int]]) -> int:
+        """把 (thread_id, message_id) 标记为待重算；非精选留言没有快照行，不受影响。"""
+        if not keys:
+            return 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany('''
+            UPDATE reaction_ranking_snapshots SET dirty = 1
+            WHERE thread_id = ? AND message_id = ?
+        ''', keys)
+        affected = cursor.rowcount
+        conn.commit()
+        conn.close()
         return affected
+
+    def get_reaction_snapshot_work(self, guild_id: int, stale_before: str, limit: int) -> List[Dict]:
+        """获取需要（重新）计算表情数的精选留言：尚无快照、被标记 dirty、或快照早于 stale_before。
+
+        尚无快照的排在最前，其次按快照时间从旧到新；获取失败后仍在退避期（retry_after）的不返回。
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT f.thread_id, f.message_id
+            FROM featured_messages f
+            LEFT JOIN reaction_ranking_snapshots s
+                ON s.thread_id = f.thread_id AND s.message_id = f.message_id
+            WHERE f.guild_id = ?
+              AND (s.message_id IS NULL OR s.dirty = 1 OR s.computed_at < ?)
+              AND (s.retry_after IS NULL OR s.retry_after <= CURRENT_TIMESTAMP)
+            ORDER BY s.message_id IS NOT NULL, s.computed_at
+            LIMIT ?
+        ''', (guild_id, stale_before, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        return [{'thread_id': row[0], 'message_id': row[1]} for row in rows]
+
+    def save_reaction_snapshots(self, guild_id: int, counts: List[Tuple[int, int, int]]):
+        """写入一批 (thread_id, message_id, reaction_count) 快照，并刷新该服的计算时间。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO reaction_ranking_snapshots
+                (thread_id, message_id, guild_id, reaction_count, dirty, computed_at)
+            VALUES (?, ?, ?, ?, 0, CURRENT_TIMESTAMP)
+            ON CONFLICT(thread_id, message_id) DO UPDATE SET
+                reaction_count = excluded.reaction_count,
+                dirty = 0,
+                computed_at = CURRENT_TIMESTAMP,
+                failures = 0,
+                retry_after = NULL
+        ''', [(thread_id, message_id, guild_id, count) for thread_id, message_id, count in counts])
+        cursor.execute('''
+            INSERT INTO reaction_ranking_state (guild_id, refreshed_at)
+            VALUES (?, CURRENT_TIMESTAMP)
+            ON CONFLICT(guild_id) DO UPDATE SET refreshed_at = CURRENT_TIMESTAMP
+        ''', (guild_id,))
+        conn.commit()
+        conn.close()
+        self._emit_write('reaction_snapshot', guild_id=guild_id)
+
+    def save_reaction_snapshot_failures(self, guild_id: int, keys: List[Tuple[int, int]],
+                                        retry_minutes: int, max_retry_minutes: int):
+        """记录获取失败的 (thread_id, message_id)：retry_after 之前不再重试，退避按失败次数翻倍。
+
+        从未计算过的留言写入表情数为 0 的占位快照，既有快照保留原表情数并保持待重算。
+        """
+        if not keys:
+            return
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO reaction_ranking_snapshots
+                (thread_id, message_id, guild_id, reaction_count, dirty, computed_at, failures, retry_after)
+            VALUES (?, ?, ?, 0, 1, CURRENT_TIMESTAMP, 1, datetime('now', '+' || ? || ' minutes'))
+            ON CONFLICT(thread_id, message_id) DO UPDATE SET
+                dirty = 1,
+                failures = failures + 1,
+                retry_after = datetime('now', '+' || MIN(?, ? * (1 << MIN(failures, 16))) || ' minutes')
+        ''', [
+            (thread_id, message_id, guild_id, min(retry_minutes, max_retry_minutes), max_retry_minutes, retry_minutes)
+            for thread_id, message_id in keys
+        ])
+        conn.commit()
+        conn.close()
+        self._emit_write('reaction_snapshot', guild_id=guild_id)
+
+    def get_reaction_ranking_refreshed_at(self, guild_id: int) -> Optional[str]:
+        """获取该服表情排行最近一次计算时间（UTC 字符串），从未计算过返回 None。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT refreshed_at FROM reaction_ranking_state WHERE guild_id = ?', (guild_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def get_reaction_ranked_featured_messages(self, guild_id: int, page: int = 1, per_page: int = 10,
+                                              start_date: str = None, end_date: str = None) -> Tuple[List[Dict], int, int]:
+        """按快照表情数排序的全服精选留言（分页）。
+
+        返回 (当前页留言, 总页数, 尚未计算表情数的留言数)；未计算的留言排在最后。
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        where_conditions = ["f.guild_id = ?"]
+        params = [guild_id]
+        if start_date:
+            where_conditions.append("f.featured_at >= ?")
+            params.append(start_date)
+        if end_date:
+            where_conditions.append("f.featured_at <= ?")
+            params.append(end_date)
+        where_clause = " AND ".join(where_conditions)
+
+        cursor.execute(f'''
+            SELECT COUNT(*), SUM(CASE WHEN s.message_id IS NULL THEN 1 ELSE 0 END)
+            FROM featured_messages f
+            LEFT JOIN reaction_ranking_snapshots s
+                ON s.thread_id = f.thread_id AND s.message_id = f.message_id
+            WHERE {where_clause}
+        ''', params)
+        total_records, pending = cursor.fetchone()
+        total_pages = (total_records + per_page - 1) // per_page
+
+        offset = (page - 1) * per_page
+        cursor.execute(f'''
+            SELECT
+                f.id, f.thread_id, f.message_id, f.author_id, f.author_name,
+                f.featured_by_id, f.featured_by_name, f.featured_at, f.reason, s.reaction_count
+            FROM featured_messages f
+            LEFT JOIN reaction_ranking_snapshots s
+                ON s.thread_id = f.thread_id AND s.message_id = f.message_id
+            WHERE {where_clause}
+            ORDER BY s.reaction_count IS NULL, s.reaction_count DESC, f.featured_at DESC
+            LIMIT ? OFFSET ?
+        ''', params + [per_page, offset])
+        rows = cursor.fetchall()
+        conn.close()
+
+        messages = [
+            {
+                'id': row[0],
+                'thread_id': row[1],
+                'message_id': row[2],
+                'author_id': row[3],
+                'author_name': row[4],
+                'featured_by_id': row[5],
+                'featured_by_name': row[6],
+                'featured_at': row[7],
+                'reason': row[8],
+                'reaction_count': row[9],
+            }
+            for row in rows
+        ]
+        return messages, total_pages, pending or 0
+
+    def get_message_quality_settings(self, guild_id: int) -> Dict:
+        """获取本服留言质量规则覆盖值；未设置的项为 None。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT min_length, max_length, reject_emoji_only, repeat_max_distinct
+            FROM message_quality_settings
+            WHERE guild_id = ?
+        ''', (guild_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if not row:
+            return {'min_length': None, 'max_length': None, 'reject_emoji_only': None, 'repeat_max_distinct': None}
+        return {
+            'min_length': row[0],
+            'max_length': row[1],
+            'reject_emoji_only': None if row[2] is None else bool(row[2]),
+            'repeat_max_distinct': row[3],
+        }
+
+    def set_message_quality_settings(self, guild_id: int, **settings):
+        """更新本服留言质量规则；只修改传入且不为 None 的项。"""
+        allowed = ('min_length', 'max_length', 'reject_emoji_only', 'repeat_max_distinct')
+        updates = {key: value for key, value in settings.items() if key in allowed and value is not None}
+        if 'reject_emoji_only' in updates:
+            updates['reject_emoji_only'] = 1 if updates['reject_emoji_only'] else 0
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT OR IGNORE INTO message_quality_settings (guild_id) VALUES (?)',
+            (guild_id,)
+        )
+        if updates:
+            assignments = ', '.join(f'{key} = ?' for key in updates)
+            cursor.execute(
+                f'UPDATE message_quality_settings SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE guild_id = ?',
+                list(updates.values()) + [guild_id]
+            )
+        conn.commit()
+        conn.close()
+        self._emit_write('message_quality', guild_id=guild_id)
+
+    def reset_message_quality_settings(self, guild_id: int):
+        """清除本服留言质量规则，恢复 config 默认值。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM message_quality_settings WHERE guild_id = ?', (guild_id,))
+        conn.commit()
+        conn.close()
+        self._emit_write('message_quality', guild_id=guild_id)
+
+    def get_bot_state(self, key: str) -> Optional[str]:
+        """读取键值状态，不存在返回 None。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT value FROM bot_state WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def set_bot_state(self, key: str, value: Optional[str]):
+        """写入键值状态；value 为 None 时删除该键。"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        if value is None:
+            cursor.execute('DELETE FROM bot_state WHERE key = ?', (key,))
+        else:
+            cursor.execute('''
+                INSERT INTO bot_state (key, value, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP
+            ''', (key, value))
+        conn.commit()
+        conn.close()
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+import discord
+
+from app.bot.auto_defer import HandlerLatency, auto_defer, respond
+from app.bot.metrics import MetricsRegistry
+
+
+class FakeResponse:
+    def __init__(self, calls):
+        self.calls = calls
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def defer(self, *, ephemeral=False, thinking=False):
+        await asyncio.sleep(0)
+        self.calls.append(("defer", ephemeral, thinking))
+        self.done = True
+
+    async def send_message(self, content=None, **kwargs):
+        await asyncio.sleep(0)
+        self.calls.append(("send_message", content))
+        self.done = True
+
+
+class FakeFollowup:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def send(self, content=None, **kwargs):
+        self.calls.append(("followup", content))
+
+
+class FakeInteraction(discord.Interaction):
+    # 覆盖基类的 slot/property，测试中直接赋值
+    id = client = created_at = response = followup = None
+
+    def __init__(self, client, interaction_id=1, age=0.0):
+        self.calls = []
+        self.id = interaction_id
+        self.client = client
+        self.created_at = discord.utils.utcnow() - timedelta(seconds=age)
+        self.response = FakeResponse(self.calls)
+        self.followup = FakeFollowup(self.calls)
+
+
+def make_client():
+    metrics = MetricsRegistry()
+    metrics.counter("bot_auto_defer_total", "")
+    return SimpleNamespace(handler_latency=HandlerLatency(window=5), metrics=metrics)
+
+
+class AutoDeferTest(unittest.IsolatedAsyncioTestCase):
+    def test_expected_latency_uses_recent_high_quantile(self):
+        history = HandlerLatency(window=5, quantile=0.8)
+        self.assertIsNone(history.expected("h"))
+        for seconds in (9.0, 0.1, 0.2, 0.3, 0.4, 2.0):
+            history.record("h", seconds)
+        self.assertEqual(history.expected("h"), 2.0)
+        self.assertEqual(history.stats()["h"]["samples"], 5)
+
+    async def test_fast_handler_responds_directly(self):
+        client = make_client()
+
+        @auto_defer()
+        async def handler(interaction):
+            await respond(interaction, "ok", ephemeral=True)
+
+        interaction = FakeInteraction(client)
+        await handler(interaction)
+        self.assertEqual(interaction.calls, [("send_message", "ok")])
+        self.assertIsNotNone(client.handler_latency.expected(handler.__qualname__))
+
+    async def test_slow_history_defers_before_running(self):
+        client = make_client()
+        client.handler_latency.record("slow", 2.0)
+
+        @auto_defer(name="slow")
+        async def handler(interaction):
+            await respond(interaction, "done")
+
+        interaction = FakeInteraction(client)
+        await handler(interaction)
+        self.assertEqual(interaction.calls, [("defer", True, True), ("followup", "done")])
+        self.assertEqual(client.metrics.counter_value("bot_auto_defer_total", handler="slow", reason="history"), 1)
+
+    async def test_deadline_timer_defers_unresponsive_handler_once(self):
+        client = make_client()
+
+        @auto_defer(name="first_run")
+        async def handler(interaction):
+            await asyncio.sleep(0.05)
+            await respond(interaction, "late")
+
+        with mock.patch("config.AUTO_DEFER_DEADLINE", 0.01):
+            interaction = FakeInteraction(client)
+            await handler(interaction)
+        self.assertEqual(interaction.calls, [("defer", True, True), ("followup", "late")])
+        self.assertEqual(client.metrics.counter_value("bot_auto_defer_total", handler="first_run", reason="deadline"), 1)
+
+    async def test_old_interaction_past_deadline_is_deferred_immediately(self):
+        client = make_client()
+
+        @auto_defer(name="lagged")
+        async def handler(interaction):
+            await asyncio.sleep(0.01)
+            await respond(interaction, "ok")
+
+        interaction = FakeInteraction(client, age=5.0)
+        await handler(interaction)
+        self.assertEqual(interaction.calls[0], ("defer", True, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
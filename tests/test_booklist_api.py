@@ -0,0 +1,333 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+import discord
+
+from app.booklist.api import BooklistPublishAPI
+from app.booklist.jobs import BooklistJobQueue
+from database import DatabaseManager
+
+
+def not_found():
+    return discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "unknown message")
+
+
+class FakePartialMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, embed=None, view=None):
+        if self.id not in self.channel.messages:
+            raise not_found()
+        self.channel.edited.append(self.id)
+        return self
+
+    async def delete(self):
+        if self.channel.forbidden:
+            raise discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "missing access")
+        if self.id not in self.channel.messages:
+            raise not_found()
+        self.channel.messages.discard(self.id)
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = []
+        self.edited = []
+        self.messages = set()
+        self.forbidden = False
+
+    async def send(self, embed=None, view=None):
+        self.sent.append(embed)
+        message_id = self.id * 100 + len(self.sent)
+        self.messages.add(message_id)
+        return SimpleNamespace(id=message_id)
+
+    def get_partial_message(self, message_id):
+        return FakePartialMessage(self, message_id)
+
+    async def fetch_message(self, message_id):
+        raise AssertionError("updates should edit by id without fetching")
+
+
+class FakeThreadMetadata:
+    def __init__(self, threads):
+        self.threads = threads
+        self.resolved = []
+
+    async def resolve(self, thread_id):
+        self.resolved.append(thread_id)
+        return self.threads.get(thread_id)
+
+
+class FakeDB:
+    def __init__(self):
+        self.published = {}
+
+    def get_webpage_published_booklist(self, booklist_id, channel_id):
+        return self.published.get((booklist_id, channel_id))
+
+    def upsert_webpage_published_booklist(self, webpage_booklist_id, guild_id, channel_id, message_id, publisher_user_id,
+                                          content_hash=None):
+        self.published[(webpage_booklist_id, channel_id)] = {
+            "message_id": message_id, "guild_id": guild_id, "channel_id": channel_id, "content_hash": content_hash,
+        }
+
+    def get_active_webpage_published_by_booklist(self, webpage_booklist_id):
+        return [record for (booklist_id, _), record in self.published.items() if booklist_id == webpage_booklist_id]
+
+    def deactivate_webpage_published_booklists(self, message_ids):
+        self.deactivated = list(message_ids)
+        self.published = {key: r for key, r in self.published.items() if r["message_id"] not in message_ids}
+        return len(message_ids)
+
+
+def item(booklist_id, thread_id, user_id, guild_id=1, **fields):
+    return {
+        "booklist_id": booklist_id,
+        "thread_url": f"https://discord.com/channels/{guild_id}/{thread_id}",
+        "discord_user_id": str(user_id),
+        "title": f"书单 {booklist_id}",
+        "items": [],
+        **fields,
+    }
+
+
+class BooklistPublishBatchTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.channels = {100: FakeChannel(100), 200: FakeChannel(200), 300: FakeChannel(300)}
+        self.thread_metadata = FakeThreadMetadata({
+            100: {"guild_id": 1, "owner_id": 7, "parent_is_forum": True},
+            200: {"guild_id": 1, "owner_id": 8, "parent_is_forum": True},
+        })
+        self.bot = SimpleNamespace(
+            db=FakeDB(),
+            thread_metadata=self.thread_metadata,
+            cluster=None,
+            cluster_for_guild=lambda guild_id: None,
+            is_guild_ready=lambda guild_id: True,
+            is_ready=lambda: True,
+            get_channel=self.channels.get,
+        )
+        self.api = BooklistPublishAPI(self.bot)
+
+    async def test_groups_by_thread_and_reports_each_item(self):
+        results = await self.api.publish_batch([
+            item(1, 100, 7),
+            item(2, 200, 8),
+            item(3, 100, 7),
+            {"booklist_id": 4, "thread_url": "not a url", "discord_user_id": 7, "items": []},
+            item(5, 200, 7),
+            "oops",
+        ])
+
+        self.assertEqual([r["index"] for r in results], list(range(6)))
+        self.assertEqual([r["status"] for r in results], [200, 200, 200, 400, 403, 400])
+        self.assertEqual(results[3]["error"], "invalid thread_url")
+        self.assertEqual(results[4]["error"], "publisher is not the thread owner")
+        self.assertTrue(results[0]["message_url"].startswith("https://discord.com/channels/1/100/"))
+
+        # 每个帖子只解析一次，同帖的书单都发在同一个频道
+        self.assertEqual(sorted(self.thread_metadata.resolved), [100, 200])
+        self.assertEqual(len(self.channels[100].sent), 2)
+        self.assertEqual(len(self.channels[200].sent), 1)
+        self.assertEqual(set(self.bot.db.published), {(1, 100), (2, 200), (3, 100)})
+
+    async def test_thread_error_applies_to_all_items_in_group(self):
+        results = await self.api.publish_batch([item(1, 300, 7), item(2, 300, 7)])
+        self.assertEqual([r["status"] for r in results], [403, 403])
+        self.assertEqual(self.thread_metadata.resolved, [300])
+
+    async def test_unexpected_item_error_does_not_fail_batch(self):
+        # 写库等意外异常只让该项返回 500，同批其他项照常完成
+        self.bot.db.upsert_webpage_published_booklist = self._broken_upsert_for(200)
+        results = await self.api.publish_batch([item(1, 100, 7), item(2, 200, 8), item(3, 100, 7)])
+
+        self.assertEqual([r["status"] for r in results], [200, 500, 200])
+        self.assertEqual(results[1]["error"], "internal error")
+        self.assertEqual(set(self.bot.db.published), {(1, 100), (3, 100)})
+
+    def _broken_upsert_for(self, channel_id):
+        upsert = self.bot.db.upsert_webpage_published_booklist
+
+        def broken(**fields):
+            if fields["channel_id"] == channel_id:
+                raise RuntimeError("database is locked")
+            return upsert(**fields)
+        return broken
+
+    async def test_single_publish_unchanged(self):
+        status, body = await self.api.publish(item(1, 100, 7))
+        self.assertEqual(status, 200)
+        self.assertFalse(body["updated"])
+        status, body = await self.api.publish(item(1, 100, 8))
+        self.assertEqual((status, body["error"]), (403, "publisher is not the thread owner"))
+
+    async def test_update_edits_by_id_and_reuses_thread_check(self):
+        status, first = await self.api.publish(item(1, 100, 7))
+        self.assertEqual(status, 200)
+        status, second = await self.api.publish(item(1, 100, 7, title="改名后的书单"))
+        self.assertEqual(status, 200)
+        self.assertTrue(second["updated"])
+        self.assertEqual(second["message_id"], first["message_id"])
+        self.assertEqual(self.channels[100].edited, [int(first["message_id"])])
+        self.assertEqual(self.thread_metadata.resolved, [100])
+
+        # 旧消息已被删除：编辑得到 NotFound 后改为新发
+        self.channels[100].messages.clear()
+        status, third = await self.api.publish(item(1, 100, 7, description="新简介"))
+        self.assertFalse(third["updated"])
+        self.assertNotEqual(third["message_id"], first["message_id"])
+        self.assertEqual(len(self.channels[100].sent), 2)
+
+    async def test_identical_republish_makes_no_discord_calls(self):
+        status, first = await self.api.publish(item(1, 100, 7, items=[{"title": "某帖"}]))
+        status, again = await self.api.publish(item(1, 100, 7, items=[{"title": "某帖"}]))
+        self.assertEqual(status, 200)
+        self.assertEqual((again["updated"], again["unchanged"]), (False, True))
+        self.assertEqual(again["message_id"], first["message_id"])
+        self.assertEqual((len(self.channels[100].sent), self.channels[100].edited), (1, []))
+
+        # 内容变化或 force 时照常编辑
+        status, changed = await self.api.publish(item(1, 100, 7, items=[{"title": "另一帖"}]))
+        self.assertTrue(changed["updated"])
+        status, forced = await self.api.publish(item(1, 100, 7, items=[{"title": "另一帖"}], force=True))
+        self.assertTrue(forced["updated"])
+        self.assertNotIn("unchanged", forced)
+        self.assertEqual(len(self.channels[100].edited), 2)
+
+    async def test_unpublish_fans_out_and_reports_each_target(self):
+        self.thread_metadata.threads[300] = {"guild_id": 1, "owner_id": 9, "parent_is_forum": True}
+        for thread_id, owner_id in ((100, 7), (200, 8), (300, 9)):
+            await self.api.publish(item(1, thread_id, owner_id))
+        self.channels[200].messages.clear()  # 已被手动删除
+        self.channels[300].forbidden = True
+
+        status, body = await self.api.unpublish({"booklist_id": 1})
+        self.assertEqual(status, 200)
+        self.assertEqual((body["requested"], body["deleted"]), (3, 2))
+        outcomes = {r["channel_id"]: r["outcome"] for r in body["results"]}
+        self.assertEqual(outcomes, {"100": "deleted", "200": "missing", "300": "forbidden"})
+        # 已删/已不在的一次停用，无权限的保留以便重试
+        self.assertEqual(sorted(self.bot.db.deactivated), [10001, 20001])
+        self.assertEqual(list(self.bot.db.published), [(1, 300)])
+
+
+class BooklistJobQueueTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.temp_dir.name, "test.db"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def wait_for(self, job_id, status):
+        for _ in range(200):
+            job = self.db.get_booklist_api_job(job_id)
+            if job["status"] == status:
+                return job
+            await asyncio.sleep(0.005)
+        self.fail(f"job {job_id} stuck in {job['status']}")
+
+    async def test_retries_with_backoff_then_completes(self):
+        responses = [(503, {"ok": False, "error": "bot not ready"}), (200, {"ok": True, "updated": False})]
+        calls = []
+
+        async def publish(payload):
+            calls.append(payload)
+            return responses[len(calls) - 1]
+
+        queue = BooklistJobQueue(self.db, {"publish": publish}, retry_base=0.01)
+        queue.start()
+        try:
+            job_id = queue.submit("publish", {"booklist_id": 1})
+            job = await self.wait_for(job_id, "done")
+        finally:
+            await queue.close()
+
+        self.assertEqual(calls, [{"booklist_id": 1}, {"booklist_id": 1}])
+        self.assertEqual((job["attempts"], job["result_status"], job["result"]), (2, 200, {"ok": True, "updated": False}))
+        self.assertEqual(queue.stats()["retries"], 1)
+        self.assertEqual(queue.backoff(1), 0.01)
+        self.assertEqual(queue.backoff(3), 0.04)
+
+    async def test_client_errors_fail_without_retry(self):
+        async def unpublish(payload):
+            return 400, {"ok": False, "error": "invalid thread_url"}
+
+        queue = BooklistJobQueue(self.db, {"unpublish": unpublish}, retry_base=0.01)
+        queue.start()
+        try:
+            job = await self.wait_for(queue.submit("unpublish", {"booklist_id": 1}), "failed")
+        finally:
+            await queue.close()
+        self.assertEqual((job["attempts"], job["result_status"]), (1, 400))
+
+    async def test_same_booklist_jobs_run_in_submit_order(self):
+        calls = []
+        publish_results = [(503, {"ok": False, "error": "bot not ready"}), (200, {"ok": True})]
+
+        async def publish(payload):
+            calls.append(("publish", payload["booklist_id"]))
+            return publish_results[len([c for c in calls if c[0] == "publish"]) - 1]
+
+        async def unpublish(payload):
+            calls.append(("unpublish", payload["booklist_id"]))
+            return 200, {"ok": True}
+
+        queue = BooklistJobQueue(self.db, {"publish": publish, "unpublish": unpublish}, retry_base=0.05)
+        queue.start()
+        try:
+            publish_id = queue.submit("publish", {"booklist_id": 1})
+            unpublish_id = queue.submit("unpublish", {"booklist_id": 1})
+            other_id = queue.submit("unpublish", {"booklist_id": 2})
+            await self.wait_for(other_id, "done")
+            # 发布在退避等待中：同书单的撤除排在其后，其他书单不受影响
+            self.assertEqual(self.db.get_booklist_api_job(unpublish_id)["status"], "pending")
+            self.assertEqual(queue.stats()["waiting_order"], 1)
+            await self.wait_for(unpublish_id, "done")
+        finally:
+            await queue.close()
+
+        self.assertEqual(self.db.get_booklist_api_job(publish_id)["status"], "done")
+        self.assertEqual(
+            [c for c in calls if c[1] == 1],
+            [("publish", 1), ("publish", 1), ("unpublish", 1)],
+        )
+        self.assertEqual(queue.stats()["waiting_order"], 0)
+
+    async def test_unfinished_jobs_resume_after_restart(self):
+        # 上次进程中断时：一个未开始、一个执行到一半
+        self.db.create_booklist_api_job("pending-job", "publish", {"booklist_id": 1})
+        self.db.create_booklist_api_job("running-job", "publish", {"booklist_id": 2})
+        self.db.update_booklist_api_job("running-job", "running", 1)
+        self.db.create_booklist_api_job("done-job", "publish", {"booklist_id": 3})
+        self.db.update_booklist_api_job("done-job", "done", 1, result_status=200, result={"ok": True})
+
+        seen = []
+
+        async def publish(payload):
+            seen.append(payload["booklist_id"])
+            return 200, {"ok": True}
+
+        queue = BooklistJobQueue(self.db, {"publish": publish})
+        self.assertEqual(queue.start(retention_days=7), 2)
+        try:
+            await self.wait_for("running-job", "done")
+            await self.wait_for("pending-job", "done")
+        finally:
+            await queue.close()
+        self.assertEqual(sorted(seen), [1, 2])
+        self.assertEqual(self.db.get_booklist_api_job("running-job")["attempts"], 2)
+        self.assertEqual(self.db.get_unfinished_booklist_api_jobs(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
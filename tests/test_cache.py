@@ -0,0 +1,265 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import discord
+
+from app.bot.cache_profile import cache_options, resolve_cache_profile
+from app.bot.prefetch import PagePrefetcher
+from app.bot.reaction_cache import ReactionCountCache
+from app.bot.role_cache import RoleNameCache
+from app.bot.render_cache import VIEW_ALL_FEATURED, VIEW_FEATURED_RECORDS, VIEW_REFERRAL_RANKING, RenderCache
+from app.bot.thread_metadata import ThreadMetadataStore
+from app.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTest(unittest.TestCase):
+    def test_lru_eviction_and_stats(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)  # a 变为最近使用
+        cache.set("c", 3)  # 淘汰最久未使用的 b
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        stats = cache.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_ttl_expiry_and_invalidation(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.set(("t", 1), 0)
+        cache.set(("t", 2), 4)
+        cache.set(("u", 1), 7)
+
+        self.assertEqual(cache.get(("t", 1)), 0)
+        clock.now = 6
+        self.assertIsNone(cache.get(("t", 1)))
+
+        cache.set(("t", 3), 9)
+        self.assertEqual(cache.invalidate_where(lambda key: key[0] == "t"), 2)
+        self.assertFalse(cache.invalidate(("t", 3)))
+        self.assertNotIn(("t", 3), cache)
+
+
+class ReactionCountCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_lookups_share_one_fetch_and_invalidate(self):
+        calls = []
+
+        async def fetch_message(message_id):
+            calls.append(message_id)
+            await asyncio.sleep(0)
+            reactions = [SimpleNamespace(count=2), SimpleNamespace(count=5)]
+            return SimpleNamespace(reactions=reactions)
+
+        channel = SimpleNamespace(fetch_message=fetch_message)
+        bot = SimpleNamespace(get_channel=lambda channel_id: channel)
+        cache = ReactionCountCache(bot, maxsize=10, ttl=60)
+
+        counts = await asyncio.gather(*(cache.get_count(1, 2) for _ in range(3)))
+        self.assertEqual(counts, [5, 5, 5])
+        self.assertEqual(calls, [2])
+
+        self.assertEqual(await cache.get_count(1, 2), 5)
+        self.assertEqual(len(calls), 1)
+
+        self.assertTrue(cache.invalidate(1, 2))
+        await cache.get_count(1, 2)
+        self.assertEqual(len(calls), 2)
+
+
+class RenderCacheTest(unittest.TestCase):
+    def test_cached_embeds_are_copies_and_write_events_invalidate(self):
+        cache = RenderCache(maxsize=10, ttl=60)
+        records_key = RenderCache.make_key(VIEW_FEATURED_RECORDS, (1, 400), 1, "featured")
+        other_user_key = RenderCache.make_key(VIEW_FEATURED_RECORDS, (1, 401), 1, "featured")
+        ranking_key = RenderCache.make_key(VIEW_REFERRAL_RANKING, (1,), 2, None, "2024-01-01", None)
+        for key in (records_key, other_user_key, ranking_key):
+            cache.set(key, discord.Embed(title="page"), 3)
+
+        embed, total_pages, _ = cache.get(records_key)
+        embed.add_field(name="extra", value="x")
+        self.assertEqual(total_pages, 3)
+        self.assertEqual(len(cache.get(records_key)[0].fields), 0)
+
+        cache.on_db_write("featured_added", {
+            "guild_id": 1, "thread_id": 9, "message_id": 10, "author_id": 400, "featured_by_id": 500,
+        })
+        self.assertIsNone(cache.get(records_key))
+        self.assertIsNone(cache.get(ranking_key))
+        self.assertIsNotNone(cache.get(other_user_key))
+
+        cache.on_db_write("booklist_link", {"guild_id": 1, "user_id": None})
+        self.assertIsNone(cache.get(other_user_key))
+
+
+class PagePrefetcherTest(unittest.IsolatedAsyncioTestCase):
+    async def test_prefetches_neighbours_within_budget_and_drops_invalidated(self):
+        cache = RenderCache(maxsize=10, ttl=60)
+        prefetcher = PagePrefetcher(cache, max_concurrency=2)
+        release = asyncio.Event()
+        rendered = []
+
+        def make_key(page):
+            return RenderCache.make_key(VIEW_ALL_FEATURED, (1,), page, "time")
+
+        async def render(page):
+            rendered.append(page)
+            await release.wait()
+            return discord.Embed(title=f"page {page}"), 5
+
+        view = object()
+        prefetcher.schedule(view, make_key, render, page=3, total_pages=5)
+        # 预算已用尽，第二个 View 的预取直接跳过
+        other_key = lambda page: RenderCache.make_key(VIEW_ALL_FEATURED, (2,), page, "time")
+        prefetcher.schedule(object(), other_key, render, page=1, total_pages=5)
+        self.assertIn(make_key(4), cache)
+        self.assertEqual(prefetcher.stats()["skipped"], 1)
+
+        await asyncio.sleep(0)
+        cache.on_db_write("reaction_snapshot", {"guild_id": 1})
+        release.set()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(sorted(rendered), [2, 4])
+        self.assertIsNone(cache.get(make_key(4)))
+        self.assertNotIn(make_key(2), cache)
+        self.assertEqual(prefetcher.stats()["running"], 0)
+
+        release.clear()
+        prefetcher.schedule(view, make_key, render, page=1, total_pages=5)
+        self.assertEqual(prefetcher.cancel(view), 1)
+        await asyncio.sleep(0.01)
+        self.assertNotIn(make_key(2), cache)
+        self.assertEqual(prefetcher.stats()["running"], 0)
+
+        release.set()
+        prefetcher.schedule(view, make_key, render, page=1, total_pages=5)
+        await asyncio.sleep(0.01)
+        self.assertEqual(cache.get(make_key(2))[0].title, "page 2")
+        self.assertEqual(prefetcher.stats()["completed"], 1)
+
+
+class FakeThreadMetadataDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def get_thread_metadata_bulk(self, thread_ids):
+        self.queries += 1
+        return {thread_id: self.rows[thread_id] for thread_id in thread_ids if thread_id in self.rows}
+
+    def get_thread_metadata(self, thread_id):
+        return self.get_thread_metadata_bulk([thread_id]).get(thread_id)
+
+    def upsert_thread_metadata(self, thread_id, **fields):
+        self.rows[thread_id] = {"thread_id": thread_id, **fields}
+
+    def delete_thread_metadata(self, thread_id):
+        self.rows.pop(thread_id, None)
+
+
+class ThreadMetadataStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def test_archived_titles_come_from_db_without_rest(self):
+        db = FakeThreadMetadataDB({1: {"thread_id": 1, "title": "Archived", "owner_id": 7}})
+
+        async def fetch_channel(channel_id):
+            raise AssertionError("should not hit REST")
+
+        bot = SimpleNamespace(db=db, get_channel=lambda channel_id: None, fetch_channel=fetch_channel)
+        store = ThreadMetadataStore(bot, maxsize=10)
+
+        store.prefetch([1, 2, 1])
+        self.assertEqual(db.queries, 1)
+        self.assertEqual(store.get_title(1), "Archived")
+        self.assertIsNone(store.get_title(2))  # 未知帖子短暂记忆，不再查库
+        self.assertEqual(db.queries, 1)
+
+    async def test_resolve_confirms_stale_record_with_fetch(self):
+        db = FakeThreadMetadataDB({1: {"thread_id": 1, "title": "Old", "owner_id": 7, "parent_is_forum": True}})
+        thread = MagicMock(spec=discord.Thread)
+        thread.configure_mock(id=1, name="New", parent_id=50, owner_id=8, archived=True)
+        thread.guild.id = 100
+        thread.parent.type = discord.ChannelType.forum
+        fetched = []
+
+        async def fetch_channel(channel_id):
+            fetched.append(channel_id)
+            if channel_id == 1:
+                return thread
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "unknown channel")
+
+        bot = SimpleNamespace(db=db, get_channel=lambda channel_id: None, fetch_channel=fetch_channel)
+        store = ThreadMetadataStore(bot, maxsize=10)
+        self.assertEqual(store.get(1)["owner_id"], 7)  # 显示仍走记录
+
+        # 校验时 gateway 缓存未命中：以 fetch 结果为准并刷新记录
+        self.assertEqual((await store.resolve(1))["owner_id"], 8)
+        self.assertEqual(db.rows[1]["owner_id"], 8)
+        self.assertEqual(store.get_title(1), "New")
+
+        db.rows[2] = {"thread_id": 2, "title": "Deleted", "owner_id": 7, "parent_is_forum": True}
+        with self.assertRaises(discord.NotFound):
+            await store.resolve(2)
+        self.assertNotIn(2, db.rows)
+        self.assertEqual(fetched, [1, 2])
+
+
+class CacheProfileTest(unittest.TestCase):
+    def setUp(self):
+        self.intents = discord.Intents.default()
+        self.intents.members = True
+
+    def test_full_profile_keeps_discord_defaults(self):
+        options = cache_options("full", self.intents)
+        self.assertTrue(options["member_cache_flags"].joined)
+        self.assertTrue(options["chunk_guilds_at_startup"])
+        self.assertEqual(options["max_messages"], 1000)
+
+    def test_constrained_profiles_shrink_member_and_message_caches(self):
+        balanced = cache_options("balanced", self.intents)
+        self.assertTrue(balanced["member_cache_flags"].joined)
+        self.assertFalse(balanced["member_cache_flags"].voice)
+        self.assertFalse(balanced["chunk_guilds_at_startup"])
+
+        minimal = cache_options("minimal", self.intents)
+        self.assertEqual(minimal["member_cache_flags"].value, 0)
+        self.assertIsNone(minimal["max_messages"])
+
+    def test_unknown_profile_falls_back_to_full(self):
+        self.assertEqual(resolve_cache_profile("tiny"), "full")
+
+
+class RoleNameCacheTest(unittest.TestCase):
+    def test_lookup_uses_index_until_invalidated(self):
+        roles = [SimpleNamespace(id=1, name="@everyone"), SimpleNamespace(id=2, name="鉴赏家"),
+                 SimpleNamespace(id=3, name="鉴赏家")]
+        guild = SimpleNamespace(id=10, roles=roles)
+        guild.get_role = lambda role_id: next((role for role in guild.roles if role.id == role_id), None)
+        cache = RoleNameCache()
+
+        self.assertEqual(cache.get(guild, "鉴赏家").id, 2)
+        self.assertIsNone(cache.get(guild, "版主"))
+        guild.roles = roles + [SimpleNamespace(id=4, name="版主")]
+        self.assertIsNone(cache.get(guild, "版主"))
+
+        cache.invalidate(10)
+        self.assertEqual(cache.get(guild, "版主").id, 4)
+        self.assertEqual(cache.stats(), {"guilds": 1, "hits": 2, "rebuilds": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
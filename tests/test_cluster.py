@@ -0,0 +1,79 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.cluster import ClusterClient, ClusterError, ClusterHub, cluster_for_shard, shard_ids_for_cluster
+
+
+class TopologyTest(unittest.TestCase):
+    def test_shards_split_into_contiguous_groups(self):
+        groups = [shard_ids_for_cluster(c, 3, 8) for c in range(3)]
+        self.assertEqual(groups, [[0, 1, 2], [3, 4, 5], [6, 7]])
+        self.assertEqual([cluster_for_shard(s, 3, 8) for s in range(8)], [0, 0, 0, 1, 1, 1, 2, 2])
+
+
+class ClusterIPCTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hub = ClusterHub("127.0.0.1", 0)
+        await self.hub.start()
+        self.clients = [ClusterClient(i, "127.0.0.1", self.hub.port, shard_ids=[i]) for i in range(3)]
+        for client in self.clients:
+            client.start()
+            await client.wait_connected(5)
+        while len(self.hub.connected) < 3:
+            await asyncio.sleep(0.01)
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        await self.hub.close()
+
+    async def test_broadcast_reaches_other_clusters_only(self):
+        received = {i: [] for i in range(3)}
+        for i, client in enumerate(self.clients):
+            client.on_broadcast = lambda event, payload, i=i: received[i].append((event, payload))
+
+        self.clients[0].broadcast("db_write", {"event": "featured_added", "payload": {"thread_id": 1}})
+        while not (received[1] and received[2]):
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(received[0], [])
+        self.assertEqual(received[1], [("db_write", {"event": "featured_added", "payload": {"thread_id": 1}})])
+
+    async def test_request_routed_to_target_cluster(self):
+        async def whoami(payload):
+            return {"cluster": 2, "echo": payload["value"]}
+
+        self.clients[2].register("whoami", whoami)
+        result = await self.clients[0].request(2, "whoami", {"value": "x"})
+        self.assertEqual(result, {"cluster": 2, "echo": "x"})
+
+        with self.assertRaises(ClusterError):
+            await self.clients[0].request(9, "whoami", {})
+        with self.assertRaises(ClusterError):
+            await self.clients[0].request(1, "missing", {})
+
+    async def test_reconnect_triggers_resync_callback(self):
+        reconnected = asyncio.Event()
+        self.clients[1].on_reconnect = reconnected.set
+        self.assertEqual(self.clients[1].stats()["reconnects"], 0)
+
+        # Hub 侧断开：客户端自动重连，并在重新登记后回调（首次连接不回调）
+        self.hub._clients[1].close()
+        await asyncio.wait_for(reconnected.wait(), 5)
+        self.assertEqual(self.clients[1].stats()["reconnects"], 1)
+        while 1 not in self.hub.connected:
+            await asyncio.sleep(0.01)
+
+        received = []
+        self.clients[1].on_broadcast = lambda event, payload: received.append(event)
+        self.clients[0].broadcast("resync", {})
+        while not received:
+            await asyncio.sleep(0.01)
+        self.assertEqual(received, ["resync"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+import discord
+from discord import app_commands
+
+from app.bot.command_sync import command_tree_hash, sync_command_tree
+from database import DatabaseManager
+
+
+async def ping(interaction: discord.Interaction):
+    pass
+
+
+async def feature(interaction: discord.Interaction, message: discord.Message):
+    pass
+
+
+class CommandSyncTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.temp_dir.name, "test.db"))
+        self.tree = app_commands.CommandTree(discord.Client(intents=discord.Intents.none()))
+        self.tree.add_command(app_commands.Command(name="ping", description="ping", callback=ping))
+        self.tree.add_command(app_commands.ContextMenu(name="精选此留言", callback=feature))
+        self.sync_calls = []
+
+        async def fake_sync(*, guild=None):
+            self.sync_calls.append(guild.id if guild else None)
+            return self.tree.get_commands(guild=guild)
+
+        self.tree.sync = fake_sync
+        self.bot = SimpleNamespace(tree=self.tree, db=self.db)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_sync_skipped_until_tree_changes(self):
+        self.assertEqual(await sync_command_tree(self.bot), 1)
+        self.assertEqual(await sync_command_tree(self.bot), 0)
+        self.assertEqual(self.sync_calls, [None])
+
+        before = command_tree_hash(self.tree)
+        self.tree.add_command(app_commands.Command(name="pong", description="pong", callback=ping))
+        self.assertNotEqual(command_tree_hash(self.tree), before)
+        self.assertEqual(await sync_command_tree(self.bot), 1)
+        self.assertEqual(self.sync_calls, [None, None])
+
+    async def test_force_and_dev_guilds(self):
+        await sync_command_tree(self.bot)
+        self.assertEqual(await sync_command_tree(self.bot, force=True), 1)
+
+        with mock.patch("config.COMMAND_SYNC_GUILD_IDS", [42]):
+            self.assertEqual(await sync_command_tree(self.bot), 1)
+            self.assertEqual(await sync_command_tree(self.bot), 0)
+        self.assertEqual(self.sync_calls, [None, None, 42])
+        self.assertIsNotNone(self.db.get_bot_state("command_tree_hash:guild:42"))
+
+
+if __name__ == "__main__":
+    unittest.main()
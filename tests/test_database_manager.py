@@ -1,7 +1,11 @@
 import os
+import sqlite3
 import tempfile
 import unittest
 
+from app.bot.appreciator_stats import AppreciatorStats
+from app.bot.featured_index import FeaturedKeyIndex
+from app.bot.guild_settings import GuildSettingsCache
 from database import DatabaseManager
 
 
@@ -140,6 +144,204 @@ class DatabaseManagerTest(unittest.TestCase):
         self.assertEqual(affected, 1)
         self.assertIsNone(self.db.get_booklist_thread_owner(100, 200))
 
+    def test_thread_metadata_upsert_bulk_and_delete(self):
+        self.db.upsert_thread_metadata(200, 100, "Old title", 900, True, 400, False)
+        self.db.upsert_thread_metadata(200, 100, "New title", 900, True, 400, True)
+        self.db.upsert_thread_metadata(201, 100, "Other", 901, False, 401, False)
+
+        metadata = self.db.get_thread_metadata(200)
+        self.assertEqual(metadata["title"], "New title")
+        self.assertTrue(metadata["archived"])
+        self.assertTrue(metadata["parent_is_forum"])
+        self.assertEqual(metadata["owner_id"], 400)
+
+        bulk = self.db.get_thread_metadata_bulk([200, 201, 202])
+        self.assertEqual(set(bulk), {200, 201})
+        self.assertFalse(bulk[201]["parent_is_forum"])
+
+        self.db.delete_thread_metadata(200)
+        self.assertIsNone(self.db.get_thread_metadata(200))
+
+    def test_reaction_ranking_snapshots(self):
+        for message_id in (300, 301, 302):
+            self.db.add_featured_message(
+                guild_id=100,
+                thread_id=200,
+                message_id=message_id,
+                author_id=400,
+                author_name="Author",
+                featured_by_id=500,
+                featured_by_name="Curator",
+            )
+
+        self.assertIsNone(self.db.get_reaction_ranking_refreshed_at(100))
+        work = self.db.get_reaction_snapshot_work(100, "1970-01-01 00:00:00", 10)
+        self.assertEqual(len(work), 3)
+
+        self.db.save_reaction_snapshots(100, [(200, 300, 2), (200, 301, 9)])
+        self.assertIsNotNone(self.db.get_reaction_ranking_refreshed_at(100))
+        messages, total_pages, pending = self.db.get_reaction_ranked_featured_messages(100, 1, 10)
+        self.assertEqual([m["message_id"] for m in messages], [301, 300, 302])
+        self.assertEqual(total_pages, 1)
+        self.assertEqual(pending, 1)
+
+        # 只有已有快照的精选会被标记
+        self.assertEqual(self.db.mark_reaction_snapshots_dirty([(200, 300), (200, 999)]), 1)
+        work = self.db.get_reaction_snapshot_work(100, "1970-01-01 00:00:00", 10)
+        self.assertEqual({item["message_id"] for item in work}, {300, 302})
+
+        self.db.remove_featured_message(301, 200)
+        messages, _, _ = self.db.get_reaction_ranked_featured_messages(100, 1, 10)
+        self.assertNotIn(301, [m["message_id"] for m in messages])
+
+    def test_write_listener_receives_events(self):
+        events = []
+        self.db.add_write_listener(lambda event, payload: events.append((event, payload)))
+
+        self.db.add_featured_message(
+            guild_id=100,
+            thread_id=200,
+            message_id=300,
+            author_id=400,
+            author_name="Author",
+            featured_by_id=500,
+            featured_by_name="Curator",
+        )
+        self.db.remove_featured_message(300, 200)
+        self.db.set_booklist_thread_whitelist(100, 900)
+
+        self.assertEqual([event for event, _ in events], ["featured_added", "featured_removed", "guild_settings"])
+        self.assertEqual(events[1][1]["author_id"], 400)
+        self.assertEqual(events[1][1]["featured_by_id"], 500)
+
+        def listener(event, payload):
+            events.append((event, payload))
+
+        self.db.add_write_listener(listener)
+        self.db.remove_write_listener(listener)
+        self.db.remove_write_listener(listener)  # 重复移除无害
+        self.db.set_booklist_thread_whitelist(100, 901)
+        self.assertEqual(len(events), 4)
+
+    def test_bulk_feature_single_transaction_skips_existing(self):
+        self.db.add_featured_message(100, 200, 301, 401, "B", 500, "Curator")
+        events = []
+        self.db.add_write_listener(lambda event, payload: events.append((event, payload["message_id"])))
+
+        records = [
+            {"message_id": 300, "author_id": 400, "author_name": "A"},
+            {"message_id": 301, "author_id": 401, "author_name": "B"},
+            {"message_id": 302, "author_id": 402, "author_name": "C"},
+        ]
+        inserted = self.db.add_featured_messages_bulk(100, 200, 500, "Curator", records, reason="活动精选")
+        self.assertEqual(inserted, [300, 302])
+        self.assertEqual(events, [("featured_added", 300), ("featured_added", 302)])
+
+        self.db.set_featured_bot_message_ids(200, inserted, 900)
+        self.assertEqual(self.db.get_featured_message_by_id(302, 200)["bot_message_id"], 900)
+        self.assertEqual(self.db.count_featured_by_bot_message(900), 2)
+        self.db.remove_featured_message(300, 200)
+        self.assertEqual(self.db.count_featured_by_bot_message(900), 1)
+
+    def test_featured_key_index_loads_and_follows_writes(self):
+        self.db.add_featured_message(100, 200, 300, 400, "A", 500, "Curator")
+        index = FeaturedKeyIndex(self.db)
+        self.assertEqual(index.load(), 1)
+        self.db.add_write_listener(index.on_db_write)
+
+        self.assertTrue(index.contains(200, 300))
+        self.assertFalse(index.contains(201, 300))
+
+        self.db.add_featured_messages_bulk(100, 200, 500, "Curator", [
+            {"message_id": 301, "author_id": 401, "author_name": "B"},
+        ])
+        self.assertEqual(index.featured_in(200, [300, 301, 302]), {300, 301})
+
+        self.db.remove_featured_message(300, 200)
+        self.assertFalse(index.contains(200, 300))
+        self.assertEqual(index.stats(), {"keys": 1, "threads": 1})
+
+    def test_guild_settings_cache_loads_and_writes_through(self):
+        self.db.set_welcome_channel(100, 111)
+        self.db.set_welcome_channel(101, 112)
+        self.db.disable_welcome(101)
+        self.db.set_booklist_webpage_takeover(100, True)
+        settings = GuildSettingsCache(self.db)
+        self.assertEqual(settings.load(), 1)
+        self.db.add_write_listener(settings.on_db_write)
+
+        self.assertEqual(settings.welcome_channel(100), 111)
+        self.assertIsNone(settings.welcome_channel(101))
+        self.assertTrue(settings.webpage_takeover(100))
+        self.assertFalse(settings.webpage_takeover(101))
+
+        self.db.set_welcome_channel(101, 113)
+        self.db.disable_welcome(100)
+        self.db.set_booklist_webpage_takeover(100, False)
+        self.db.set_booklist_thread_whitelist(100, 700)
+        self.assertEqual(settings.welcome_channel(101), 113)
+        self.assertIsNone(settings.welcome_channel(100))
+        self.assertFalse(settings.webpage_takeover(100))
+        self.assertEqual(settings.booklist_whitelist(100), 700)
+
+        self.db.clear_booklist_thread_whitelist(100)
+        self.assertIsNone(settings.booklist_whitelist(100))
+        self.assertEqual(settings.stats(), {"welcome_channel": 1, "webpage_takeover": 0, "booklist_whitelist": 0})
+
+    def test_appreciator_stats_match_user_stats_and_follow_writes(self):
+        self.db.add_featured_message(100, 200, 300, 400, "A", 500, "Curator")
+        self.db.add_featured_message(100, 200, 301, 400, "A", 500, "Curator")
+        self.db.add_featured_message(101, 201, 302, 401, "B", 500, "Curator")
+        appreciator = AppreciatorStats(self.db)
+        self.db.add_write_listener(appreciator.on_db_write)
+
+        for user_id in (400, 401, 500, 999):
+            for include_all in (False, True):
+                expected = self.db.get_user_stats(user_id, 100, include_all_guilds=include_all)
+                got = appreciator.get(user_id, 100, include_all_guilds=include_all)
+                self.assertEqual((got["featured_count"], got["featuring_count"]),
+                                 (expected["featured_count"], expected["featuring_count"]))
+        self.assertEqual(appreciator.stats()["loads"], 2)
+
+        self.db.add_featured_message(100, 200, 303, 402, "C", 500, "Curator")
+        self.assertEqual(appreciator.get(500, 100)["featuring_count"], 2)
+        self.assertEqual(appreciator.get(500, 100, include_all_guilds=True)["featuring_count"], 3)
+        self.assertEqual(appreciator.stats()["loads"], 2)
+
+        self.assertFalse(appreciator.get(400, 100)["booklist_linked"])
+        self.db.set_user_booklist_thread_url(400, 101, "https://discord.com/channels/101/700")
+        self.assertTrue(appreciator.get(400, 100)["booklist_linked"])
+
+    def test_webpage_published_content_hash_migrates_and_round_trips(self):
+        legacy_path = os.path.join(self.temp_dir.name, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("""
+            CREATE TABLE webpage_published_booklists (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                webpage_booklist_id INTEGER NOT NULL,
+                guild_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                publisher_user_id INTEGER NOT NULL,
+                published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                is_active INTEGER DEFAULT 1,
+                UNIQUE(webpage_booklist_id, channel_id)
+            )
+        """)
+        conn.execute(
+            "INSERT INTO webpage_published_booklists (webpage_booklist_id, guild_id, channel_id, message_id, publisher_user_id)"
+            " VALUES (1, 100, 200, 300, 400)"
+        )
+        conn.commit()
+        conn.close()
+
+        legacy = DatabaseManager(legacy_path)
+        self.assertIsNone(legacy.get_webpage_published_booklist(1, 200)["content_hash"])
+        legacy.upsert_webpage_published_booklist(1, 100, 200, 301, 400, content_hash="abc")
+        self.assertEqual(legacy.get_webpage_published_booklist(1, 200)["content_hash"], "abc")
+        self.assertEqual(legacy.get_webpage_published_booklist(1, 200)["message_id"], 301)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+import discord
+
+from app.features.feature_actions import publish_feature
+from database import DatabaseManager
+
+
+class FakeSentMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+
+class FakeInteraction:
+    def __init__(self, sent_id):
+        self.guild_id = 100
+        self.channel = object()
+        self.user = SimpleNamespace(id=500, display_name="Curator")
+        self.sent = FakeSentMessage(sent_id)
+        self.response = SimpleNamespace(send_message=self._send_message)
+        self.followup = SimpleNamespace(send=self._followup)
+        self.sent_count = 0
+        self.followups = []
+
+    async def _send_message(self, content=None, embed=None, **kwargs):
+        self.sent_count += 1
+
+    async def _followup(self, content=None, **kwargs):
+        self.followups.append(content)
+
+    async def original_response(self):
+        return self.sent
+
+
+class PublishFeatureTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.temp_dir.name, "test.db"))
+        self.bot = SimpleNamespace(thread_metadata=SimpleNamespace(remember=lambda thread: None))
+        self.message = SimpleNamespace(
+            id=300, author=SimpleNamespace(id=400, display_name="Author", mention="<@400>")
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_bot_message_id_comes_from_original_response(self):
+        interaction = FakeInteraction(sent_id=900)
+        ok = await publish_feature(interaction, self.bot, self.db, self.message, 200, "Useful", discord.Embed())
+
+        self.assertTrue(ok)
+        self.assertEqual(interaction.sent_count, 1)
+        self.assertEqual(self.db.get_featured_message_by_id(300, 200)['bot_message_id'], 900)
+
+    async def test_duplicate_feature_retracts_notice(self):
+        await publish_feature(FakeInteraction(sent_id=900), self.bot, self.db, self.message, 200, None, discord.Embed())
+        duplicate = FakeInteraction(sent_id=901)
+        ok = await publish_feature(duplicate, self.bot, self.db, self.message, 200, None, discord.Embed())
+
+        self.assertFalse(ok)
+        self.assertTrue(duplicate.sent.deleted)
+        self.assertEqual(self.db.get_featured_message_by_id(300, 200)['bot_message_id'], 900)
+
+    async def test_insert_error_retracts_notice_and_reports_via_followup(self):
+        def broken_insert(**kwargs):
+            raise RuntimeError("database is locked")
+
+        self.db.add_featured_message = broken_insert
+        interaction = FakeInteraction(sent_id=900)
+        result = await publish_feature(interaction, self.bot, self.db, self.message, 200, None, discord.Embed())
+
+        self.assertIsNone(result)
+        self.assertTrue(interaction.sent.deleted)
+        self.assertEqual(interaction.sent_count, 1)
+        self.assertEqual(len(interaction.followups), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
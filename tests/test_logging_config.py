@@ -0,0 +1,40 @@
+import json
+import logging
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.logging_config import JsonFormatter, SamplingFilter
+
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.LogRecord("app.bot.client", level, __file__, 1, "交互: %s", ("/留言 精选",), None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class LoggingConfigTest(unittest.TestCase):
+    def test_json_formatter_includes_structured_fields(self):
+        record = make_record(log_category="interaction", fields={"guild_id": 1, "target": "/留言 精选"})
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["msg"], "交互: /留言 精选")
+        self.assertEqual(entry["category"], "interaction")
+        self.assertEqual(entry["guild_id"], 1)
+        self.assertEqual(entry["level"], "INFO")
+
+    def test_sampling_only_applies_to_configured_categories_below_warning(self):
+        sampler = SamplingFilter({"interaction": 0.25})
+        with mock.patch("app.logging_config.random.random", return_value=0.5):
+            self.assertFalse(sampler.filter(make_record(log_category="interaction")))
+            self.assertTrue(sampler.filter(make_record(level=logging.WARNING, log_category="interaction")))
+            self.assertTrue(sampler.filter(make_record(log_category="page_timing")))
+            self.assertTrue(sampler.filter(make_record()))
+        with mock.patch("app.logging_config.random.random", return_value=0.1):
+            self.assertTrue(sampler.filter(make_record(log_category="interaction")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.features.message_quality import MessageQualityRules
+from database import DatabaseManager
+
+
+def make_message(content, bot=False):
+    return SimpleNamespace(content=content, embeds=[], stickers=[], author=SimpleNamespace(bot=bot))
+
+
+class MessageQualityRulesTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.temp_dir.name, "test.db"))
+        self.rules = MessageQualityRules(self.db)
+        self.db.add_write_listener(self.rules.on_db_write)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_default_rules(self):
+        self.assertTrue(self.rules.check(make_message("这篇写得太好了，伏笔回收得很漂亮"), 1)['valid'])
+        cases = {
+            "短评": "至少需要10个字符",
+            "😂😂😂😂😂😂😂😂😂😂": "只包含表情符号",
+            "<:pepe:123456789012345678><a:dance:876543210987654321>": "只包含表情符号",
+            "好好好好好好好好好好": "过于简单",
+            "？！。，？！。，？！。，": "不符合精选标准",
+        }
+        for content, reason in cases.items():
+            result = self.rules.check(make_message(content), 1)
+            self.assertFalse(result['valid'], content)
+            self.assertIn(reason, result['reason'])
+        self.assertFalse(self.rules.check(make_message("这篇写得太好了，伏笔回收得很漂亮", bot=True), 1)['valid'])
+
+    def test_guild_overrides_apply_without_restart_and_reset(self):
+        short = make_message("写得好")
+        emoji_only = make_message("🔥🔥🔥🔥🔥🔥🔥🔥🔥🔥")
+        self.assertFalse(self.rules.check(short, 1)['valid'])
+
+        self.db.set_message_quality_settings(1, min_length=2, reject_emoji_only=False)
+        self.assertTrue(self.rules.check(short, 1)['valid'])
+        self.assertTrue(self.rules.check(emoji_only, 1)['valid'])
+        # 其他服务器不受影响
+        self.assertFalse(self.rules.check(short, 2)['valid'])
+        self.assertEqual(self.rules.effective_settings(1)['max_length'], 0)
+
+        self.db.reset_message_quality_settings(1)
+        self.assertFalse(self.rules.check(short, 1)['valid'])
+
+
+if __name__ == "__main__":
+    unittest.main()
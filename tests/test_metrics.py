@@ -0,0 +1,97 @@
+import logging
+import os
+import unittest
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.bot.client import metric_target
+from app.bot.metrics import MetricsRegistry, RateLimitCounter, instrument_methods
+
+
+class FakeDatabase:
+    def get_value(self, value):
+        return value * 2
+
+    def _private(self):
+        return "untouched"
+
+
+class MetricsTest(unittest.TestCase):
+    def test_render_counter_and_cumulative_histogram(self):
+        registry = MetricsRegistry()
+        registry.counter("bot_interactions_total", "交互数")
+        registry.histogram("bot_app_command_seconds", "耗时", buckets=(0.1, 1.0))
+        registry.inc("bot_interactions_total", kind="component", target='say "hi"')
+        registry.observe("bot_app_command_seconds", 0.05, command="留言 精选")
+        registry.observe("bot_app_command_seconds", 0.5, command="留言 精选")
+        registry.observe("bot_app_command_seconds", 3.0, command="留言 精选")
+
+        text = registry.render()
+        self.assertIn("# TYPE bot_interactions_total counter", text)
+        self.assertIn('bot_interactions_total{kind="component",target="say \\"hi\\""} 1', text)
+        self.assertIn('bot_app_command_seconds_bucket{command="留言 精选",le="0.1"} 1', text)
+        self.assertIn('bot_app_command_seconds_bucket{command="留言 精选",le="1"} 2', text)
+        self.assertIn('bot_app_command_seconds_bucket{command="留言 精选",le="+Inf"} 3', text)
+        self.assertIn('bot_app_command_seconds_count{command="留言 精选"} 3', text)
+
+    def test_gauge_collect_errors_are_skipped(self):
+        registry = MetricsRegistry()
+        registry.gauge("bot_cache_hit_ratio", "命中率", lambda: [({"cache": "render"}, 0.5)])
+        registry.gauge("broken", "出错", lambda: 1 / 0)
+        text = registry.render()
+        self.assertIn('bot_cache_hit_ratio{cache="render"} 0.5', text)
+        self.assertNotIn("broken{", text)
+
+    def test_sample_values_use_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        registry.gauge("bot_shard_ready", "就绪", lambda: [({"shard": "0"}, True), ({"shard": "1"}, False)])
+        registry.gauge("bot_odd_values", "非有限值", lambda: [
+            ({"kind": "inf"}, float("inf")), ({"kind": "-inf"}, float("-inf")), ({"kind": "nan"}, float("nan")),
+        ])
+        registry.counter("bot_big_total", "大计数")
+        registry.inc("bot_big_total", 1234567)
+        text = registry.render()
+        self.assertIn('bot_shard_ready{shard="0"} 1', text)
+        self.assertIn('bot_shard_ready{shard="1"} 0', text)
+        self.assertIn('bot_odd_values{kind="inf"} +Inf', text)
+        self.assertIn('bot_odd_values{kind="-inf"} -Inf', text)
+        self.assertIn('bot_odd_values{kind="nan"} NaN', text)
+        self.assertIn('bot_big_total 1234567', text)
+
+    def test_instrument_methods_times_public_methods_only(self):
+        registry = MetricsRegistry()
+        registry.histogram("bot_db_method_seconds", "耗时")
+        db = FakeDatabase()
+        instrument_methods(db, registry, "bot_db_method_seconds")
+
+        self.assertEqual(db.get_value(3), 6)
+        self.assertEqual(db._private(), "untouched")
+        text = registry.render()
+        self.assertIn('bot_db_method_seconds_count{method="get_value"} 1', text)
+        self.assertNotIn('method="_private"', text)
+
+    def test_rate_limit_counter_matches_discord_log_templates(self):
+        registry = MetricsRegistry()
+        registry.counter("discord_rate_limit_hits_total", "429")
+        handler = RateLimitCounter(registry, "discord_rate_limit_hits_total")
+
+        def emit(template):
+            record = logging.LogRecord("discord.http", logging.WARNING, __file__, 1, template, None, None)
+            handler.handle(record)
+
+        emit("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.")
+        emit("Global rate limit has been hit. Retrying in %.2f seconds.")
+        emit("Shard ID %s has connected to Gateway")
+
+        self.assertEqual(registry.counter_value("discord_rate_limit_hits_total", scope="route", source="discord.http"), 1)
+        self.assertEqual(registry.counter_value("discord_rate_limit_hits_total", scope="global", source="discord.http"), 1)
+
+    def test_interaction_target_keeps_only_persistent_custom_ids(self):
+        self.assertEqual(metric_target("booklist_public:next:v1"), "booklist_public:next:v1")
+        self.assertEqual(metric_target("appreciator:apply:v1"), "appreciator:apply:v1")
+        self.assertEqual(metric_target("3f1c9a6d2b8e4f0a9c7d1e5b"), "other")
+        self.assertEqual(metric_target(None), "other")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.features.reaction_ranking import ReactionRankingJob
+from database import DatabaseManager
+
+
+class FakeReactionCache:
+    def __init__(self, counts):
+        self.counts = counts
+        self.calls = []
+
+    async def get_count(self, thread_id, message_id, default=0):
+        self.calls.append(message_id)
+        return self.counts.get(message_id, default)
+
+
+class ReactionRankingJobTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.temp_dir.name, "test.db"))
+        for message_id in (300, 301):
+            self.db.add_featured_message(
+                guild_id=100,
+                thread_id=200,
+                message_id=message_id,
+                author_id=400,
+                author_name="Author",
+                featured_by_id=500,
+                featured_by_name="Curator",
+            )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_incremental_refresh_only_touches_dirty_messages(self):
+        cache = FakeReactionCache({300: 4, 301: 7})
+        job = ReactionRankingJob(SimpleNamespace(db=self.db, reaction_cache=cache))
+
+        self.assertEqual(await job.refresh_guild(100), 2)
+        self.assertEqual(await job.refresh_guild(100), 0)
+
+        cache.counts[300] = 10
+        job._mark_dirty(200, 300)
+        job._mark_dirty(200, 999)  # 非精选留言不会产生工作
+        job.flush_dirty()
+        self.assertEqual(await job.refresh_guild(100), 1)
+        self.assertEqual(cache.calls, [300, 301, 300])
+
+        messages, _, pending = self.db.get_reaction_ranked_featured_messages(100, 1, 10)
+        self.assertEqual([(m["message_id"], m["reaction_count"]) for m in messages], [(300, 10), (301, 7)])
+        self.assertEqual(pending, 0)
+
+    async def test_failed_fetch_backs_off_instead_of_blocking_new_work(self):
+        cache = FakeReactionCache({300: 4})
+        job = ReactionRankingJob(SimpleNamespace(db=self.db, reaction_cache=cache))
+
+        self.assertEqual(await job.refresh_guild(100, limit=1), 1)
+        self.assertEqual(await job.refresh_guild(100, limit=1), 0)  # 301 获取失败，进入退避
+        self.assertEqual(await job.refresh_guild(100, limit=1), 0)
+        self.assertEqual(cache.calls, [300, 301])
+
+        # 新精选的留言不会被失败的留言挤占名额
+        self.db.add_featured_message(100, 200, 302, 400, "Author", 500, "Curator")
+        cache.counts[302] = 2
+        self.assertEqual(await job.refresh_guild(100, limit=1), 1)
+        self.assertEqual(cache.calls, [300, 301, 302])
+
+        # 退避期过后重试，成功即清除失败记录
+        self.expire_retry()
+        cache.counts[301] = 9
+        self.assertEqual(await job.refresh_guild(100), 1)
+        messages, _, pending = self.db.get_reaction_ranked_featured_messages(100, 1, 10)
+        self.assertEqual([(m["message_id"], m["reaction_count"]) for m in messages], [(301, 9), (300, 4), (302, 2)])
+        self.assertEqual(pending, 0)
+
+    async def test_repeated_failures_double_the_backoff(self):
+        self.db.save_reaction_snapshot_failures(100, [(200, 300)], retry_minutes=30, max_retry_minutes=120)
+        self.assertEqual(self.retry_minutes(300), 30)
+        self.db.save_reaction_snapshot_failures(100, [(200, 300)], retry_minutes=30, max_retry_minutes=120)
+        self.assertEqual(self.retry_minutes(300), 60)
+        for _ in range(3):
+            self.db.save_reaction_snapshot_failures(100, [(200, 300)], retry_minutes=30, max_retry_minutes=120)
+        self.assertEqual(self.retry_minutes(300), 120)
+
+    async def test_request_refresh_is_throttled_per_guild(self):
+        job = ReactionRankingJob(SimpleNamespace(db=self.db, reaction_cache=FakeReactionCache({})))
+        started = []
+        job._refresh_guild_logged = lambda guild_id: started.append(guild_id) or asyncio.sleep(0)
+
+        job.request_refresh(100)
+        await asyncio.sleep(0)
+        job.request_refresh(100)  # 上一次已完成但仍在冷却期内：翻页不会再次触发
+        job.request_refresh(101)
+        await asyncio.sleep(0)
+        self.assertEqual(started, [100, 101])
+
+    def expire_retry(self):
+        conn = sqlite3.connect(self.db.db_file)
+        conn.execute("UPDATE reaction_ranking_snapshots SET retry_after = datetime('now', '-1 minutes')")
+        conn.commit()
+        conn.close()
+
+    def retry_minutes(self, message_id):
+        conn = sqlite3.connect(self.db.db_file)
+        row = conn.execute(
+            "SELECT CAST(ROUND((julianday(retry_after) - julianday('now')) * 1440) AS INTEGER) "
+            "FROM reaction_ranking_snapshots WHERE message_id = ?", (message_id,)
+        ).fetchone()
+        conn.close()
+        return row[0]
+
+if __name__ == "__main__":
+    unittest.main()
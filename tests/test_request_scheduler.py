@@ -0,0 +1,84 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.bot.metrics import MetricsRegistry
+from app.bot.request_scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    RequestScheduler,
+    current_priority,
+    request_priority,
+)
+
+
+class RequestSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_interactive_never_waits_and_background_yields(self):
+        metrics = MetricsRegistry()
+        metrics.histogram('discord_rest_queue_wait_seconds', '')
+        scheduler = RequestScheduler(background_per_bucket=1, max_background=4, metrics=metrics)
+        order = []
+
+        await scheduler.acquire('POST /channels/{channel_id}/messages:1', PRIORITY_BULK)
+        # 同桶已有后台请求在途，交互请求照样直接放行
+        self.assertEqual(await scheduler.acquire('POST /channels/{channel_id}/messages:1', PRIORITY_INTERACTIVE), 0.0)
+
+        async def background(priority, name):
+            async with scheduler.slot('POST /channels/{channel_id}/messages:1', priority):
+                order.append(name)
+
+        tasks = [asyncio.create_task(background(PRIORITY_BULK, 'bulk')),
+                 asyncio.create_task(background(PRIORITY_NORMAL, 'normal'))]
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.stats()['queued'], {PRIORITY_NORMAL: 1, PRIORITY_BULK: 1})
+
+        scheduler.release('POST /channels/{channel_id}/messages:1', PRIORITY_BULK)
+        await asyncio.sleep(0)
+        # 交互请求仍在途，后台请求继续等待
+        self.assertEqual(order, [])
+
+        scheduler.release('POST /channels/{channel_id}/messages:1', PRIORITY_INTERACTIVE)
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ['normal', 'bulk'])
+        self.assertEqual(scheduler.stats(), {
+            'queued': {PRIORITY_NORMAL: 0, PRIORITY_BULK: 0},
+            'background_inflight': 0, 'max_background': 4, 'buckets': 0,
+        })
+        self.assertIn('discord_rest_queue_wait_seconds_count{priority="normal"} 1', metrics.render())
+
+    async def test_global_limit_and_cancelled_waiters(self):
+        scheduler = RequestScheduler(background_per_bucket=2, max_background=2)
+        await scheduler.acquire('a', PRIORITY_BULK)
+        await scheduler.acquire('b', PRIORITY_BULK)
+
+        waiter = asyncio.create_task(scheduler.acquire('c', PRIORITY_BULK))
+        cancelled = asyncio.create_task(scheduler.acquire('c', PRIORITY_BULK))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await cancelled
+        self.assertEqual(scheduler.stats()['queued'][PRIORITY_BULK], 1)
+
+        scheduler.release('a', PRIORITY_BULK)
+        await waiter
+        self.assertEqual(scheduler.stats()['background_inflight'], 2)
+        scheduler.release('b', PRIORITY_BULK)
+        scheduler.release('c', PRIORITY_BULK)
+        self.assertEqual(scheduler.stats()['buckets'], 0)
+
+    async def test_priority_follows_context_into_tasks(self):
+        self.assertEqual(current_priority(), PRIORITY_INTERACTIVE)
+        with request_priority(PRIORITY_BULK):
+            inner = asyncio.create_task(asyncio.sleep(0, current_priority()))
+        self.assertEqual(await inner, PRIORITY_BULK)
+        self.assertEqual(current_priority(), PRIORITY_INTERACTIVE)
+        with self.assertRaises(ValueError):
+            with request_priority('urgent'):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
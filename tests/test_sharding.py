@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.bot.client import FeaturedMessageBot, ShardedFeaturedMessageBot, create_bot
+
+
+class ShardingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch("config.DATABASE_FILE", os.path.join(self.temp_dir.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_factory_follows_config(self):
+        self.assertIs(type(create_bot()), FeaturedMessageBot)
+        with mock.patch("config.SHARDING_ENABLED", True), mock.patch("config.SHARD_COUNT", 4):
+            bot = create_bot()
+        self.assertIsInstance(bot, ShardedFeaturedMessageBot)
+        self.assertEqual(bot.shard_count, 4)
+
+    async def test_startup_work_dispatched_once_per_shard(self):
+        with mock.patch("config.SHARD_COUNT", 2):
+            bot = ShardedFeaturedMessageBot()
+        dispatched = []
+        bot.dispatch = lambda event, *args: dispatched.append((event, args))
+        guild_on_shard_1 = (1 << 22) * 3
+
+        self.assertEqual(bot.shard_id_for(guild_on_shard_1), 1)
+        self.assertFalse(bot.is_guild_ready(guild_on_shard_1))
+
+        await bot.on_shard_ready(1)
+        await bot.on_shard_disconnect(1)
+        self.assertFalse(bot.is_guild_ready(guild_on_shard_1))
+        await bot.on_shard_ready(1)
+
+        self.assertTrue(bot.is_guild_ready(guild_on_shard_1))
+        self.assertFalse(bot.is_guild_ready(0))
+        self.assertEqual(dispatched, [("guilds_ready", (1,))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+
+from app.bot.metrics import MetricsRegistry
+from app.features.welcome import WelcomeDispatcher
+
+
+def member(guild_id, member_id):
+    return SimpleNamespace(id=member_id, guild=SimpleNamespace(id=guild_id))
+
+
+class WelcomeDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def test_idle_join_is_sent_alone_and_burst_is_coalesced(self):
+        sent = []
+        release = asyncio.Event()
+
+        async def send(guild_id, members):
+            sent.append((guild_id, [m.id for m in members]))
+            if len(sent) == 1:
+                await release.wait()
+            return True
+
+        metrics = MetricsRegistry()
+        metrics.counter('bot_welcome_messages_total', '')
+        metrics.counter('bot_welcome_dropped_total', '')
+        dispatcher = WelcomeDispatcher(send, window=0.01, batch_max=3, queue_max=4, metrics=metrics)
+
+        self.assertTrue(dispatcher.submit(member(1, 10)))
+        await asyncio.sleep(0)
+        self.assertEqual(sent, [(1, [10])])
+
+        # 第一条发送中（限流等待）加入的成员排队合并，超出队列上限的丢弃
+        for member_id in range(11, 16):
+            dispatcher.submit(member(1, member_id))
+        self.assertEqual(dispatcher.queue_depth, 4)
+        self.assertEqual(dispatcher.dropped, 1)
+
+        release.set()
+        for _ in range(100):
+            if dispatcher.stats()['active_guilds'] == 0:
+                break
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(sent, [(1, [10]), (1, [11, 12, 13]), (1, [14])])
+        self.assertEqual(dispatcher.stats(), {
+            'queued': 0, 'active_guilds': 0, 'messages': 3, 'welcomed': 5, 'dropped': 1,
+        })
+        self.assertEqual(metrics.counter_value('bot_welcome_messages_total', mode='batch'), 1)
+        self.assertEqual(metrics.counter_value('bot_welcome_messages_total', mode='single'), 2)
+        self.assertEqual(metrics.counter_value('bot_welcome_dropped_total', reason='queue_full'), 1)
+
+    async def test_guilds_are_independent_and_failed_sends_count_as_dropped(self):
+        async def send(guild_id, members):
+            return guild_id != 2
+
+        dispatcher = WelcomeDispatcher(send, window=0.01)
+        dispatcher.submit(member(1, 10))
+        dispatcher.submit(member(2, 20))
+        await asyncio.sleep(0.05)
+        self.assertEqual(dispatcher.stats()['welcomed'], 1)
+        self.assertEqual(dispatcher.stats()['dropped'], 1)
+        dispatcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
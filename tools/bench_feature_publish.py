@@ -0,0 +1,137 @@
+"""精选发布流程延迟基准（使用桩 Discord 客户端，不连接 Discord）。
+
+对比旧流程（发送 → 等待 0.5 秒 → 扫描频道历史取消息 ID → 写库）与
+publish_feature（写库与发送并行，消息 ID 取自 original response）。
+
+用法：
+    python tools/bench_feature_publish.py [--runs 20] [--rtt 0.08]
+
+--rtt 为模拟的单次 Discord REST 往返时间（秒）。
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "bench-token")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+
+from app.features.feature_actions import publish_feature  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+
+BOT_USER_ID = 1
+GUILD_ID = 10
+THREAD_ID = 20
+
+
+class StubMessage:
+    def __init__(self, message_id, author_id, embeds=()):
+        self.id = message_id
+        self.author = SimpleNamespace(id=author_id, display_name=f"user{author_id}", mention=f"<@{author_id}>")
+        self.embeds = list(embeds)
+
+    async def delete(self):
+        pass
+
+
+class StubChannel:
+    """帖子频道桩：history 返回最近消息，每次调用消耗一次 REST 往返。"""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.id = THREAD_ID
+        self.messages = []
+
+    async def history(self, limit=10):
+        await asyncio.sleep(self.rtt)
+        for msg in reversed(self.messages[-limit:]):
+            yield msg
+
+
+class StubInteraction:
+    def __init__(self, channel, rtt, next_id):
+        self.channel = channel
+        self.guild_id = GUILD_ID
+        self.user = SimpleNamespace(id=2, display_name="featurer")
+        self._rtt = rtt
+        self._next_id = next_id
+        self._sent = None
+        self.response = SimpleNamespace(send_message=self._send_message)
+        self.followup = SimpleNamespace(send=self._followup_send)
+
+    async def _send_message(self, content=None, embed=None, **kwargs):
+        await asyncio.sleep(self._rtt)
+        self._sent = StubMessage(self._next_id(), BOT_USER_ID, [embed] if embed else [])
+        self.channel.messages.append(self._sent)
+
+    async def _followup_send(self, *args, **kwargs):
+        await asyncio.sleep(self._rtt)
+
+    async def original_response(self):
+        await asyncio.sleep(self._rtt)
+        return self._sent
+
+
+async def legacy_publish(interaction, bot, db, message, thread_id, reason, embed):
+    await interaction.response.send_message(content=message.author.mention, embed=embed)
+    await asyncio.sleep(0.5)
+    bot_message_id = None
+    async for bot_msg in interaction.channel.history(limit=10):
+        if bot_msg.author.id == BOT_USER_ID and bot_msg.embeds and bot_msg.embeds[0].title == "🌟 留言精选":
+            bot_message_id = bot_msg.id
+            break
+    return db.add_featured_message(
+        guild_id=interaction.guild_id, thread_id=thread_id, message_id=message.id,
+        author_id=message.author.id, author_name=message.author.display_name,
+        featured_by_id=interaction.user.id, featured_by_name=interaction.user.display_name,
+        reason=reason, bot_message_id=bot_message_id,
+    )
+
+
+async def run(publish, runs, rtt, db, id_offset):
+    counter = iter(range(id_offset, id_offset + runs * 10))
+    channel = StubChannel(rtt)
+    bot = SimpleNamespace(thread_metadata=SimpleNamespace(remember=lambda thread: None))
+    samples = []
+    for _ in range(runs):
+        message = StubMessage(next(counter), 3)
+        interaction = StubInteraction(channel, rtt, lambda: next(counter))
+        embed = discord.Embed(title="🌟 留言精选")
+        started = time.perf_counter()
+        ok = await publish(interaction, bot, db, message, THREAD_ID, "bench", embed)
+        samples.append(time.perf_counter() - started)
+        assert ok, "publish failed"
+    return samples
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"{name:<16} mean {statistics.mean(samples) * 1000:7.1f} ms   "
+          f"p50 {statistics.median(samples) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--rtt", type=float, default=0.08)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+        legacy = await run(legacy_publish, args.runs, args.rtt, db, 1_000_000)
+        current = await run(publish_feature, args.runs, args.rtt, db, 2_000_000)
+
+    print(f"runs={args.runs} rtt={args.rtt * 1000:.0f} ms")
+    summarize("legacy (history)", legacy)
+    summarize("publish_feature", current)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
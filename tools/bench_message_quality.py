@@ -0,0 +1,125 @@
+"""留言质量检查微基准。
+
+对比旧实现（每次调用 import re 并重新构造正则）与 MessageQualityRules（按服务器缓存已编译规则），
+语料为模拟的真实留言（中文长评、表情、链接、刷屏、短回复等），并核对两者判定一致。
+
+用法：
+    python tools/bench_message_quality.py [--rounds 200]
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "bench-token")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from app.features.message_quality import MessageQualityRules  # noqa: E402
+
+CORPUS = [
+    "这篇写得太好了，尤其是第三章的伏笔回收，完全没想到前面那句台词是这个意思！",
+    "同意楼上，作者的人物塑造真的很细腻，配角也都有自己的动机和成长线。",
+    "看完之后去翻了原著，发现改编删掉了不少支线，但主线节奏反而更紧凑了。",
+    "推荐大家配合作者的访谈一起看：https://example.com/interview/2024 里面讲了很多创作背景",
+    "哈哈哈哈哈哈哈哈哈哈哈哈",
+    "😂😂😂😂😂😂😂😂😂😂",
+    "<:pepe_cry:123456789012345678><:pepe_cry:123456789012345678><a:dance:876543210987654321>",
+    "好好好好好好好好好好",
+    "！！！！！！！！！！！！",
+    "mark一下，明天下班回来继续看，顺便整理一份人物关系图发上来 📌",
+    "First time reading this series and honestly the worldbuilding in volume two blew me away.",
+    "I think the pacing drops a bit around chapter 12, but the ending more than makes up for it.",
+    "ok",
+    "+1",
+    "1234567890",
+    "有没有人知道第二部什么时候出？官方说年底，但感觉又要跳票了 🤔🤔",
+    "楼主整理得很用心，已收藏。补充一点：作者早期短篇集里也有同一个世界观的设定。",
+    "这个观点我不太认同，主角在第五章的选择其实和他前面的性格是一致的，只是表现方式变了。",
+    "？？？？？？？？？？",
+    "🔥🔥🔥 太燃了 🔥🔥🔥 这一段我反复看了五遍 🔥🔥🔥",
+    "..........",
+    "aaaaaaaaaaaaaaaa",
+    "谢谢分享！！",
+    "这是一段很长很长的留言，" * 20,
+]
+
+
+def legacy_check(message) -> dict:
+    if message.author.bot or message.embeds:
+        return {'valid': False, 'reason': '不能精选bot消息或系统消息！'}
+    content = message.content.strip()
+    if not content:
+        return {'valid': False, 'reason': '留言内容不能为空！'}
+    if len(content) < config.MIN_MESSAGE_LENGTH:
+        return {'valid': False, 'reason': f'留言内容至少需要{config.MIN_MESSAGE_LENGTH}个字符！'}
+    if config.MAX_MESSAGE_LENGTH > 0 and len(content) > config.MAX_MESSAGE_LENGTH:
+        return {'valid': False, 'reason': f'留言内容不能超过{config.MAX_MESSAGE_LENGTH}个字符！'}
+    if message.stickers:
+        return {'valid': False, 'reason': '不能精选只包含贴纸的留言！'}
+    text_only = content
+    import re
+    text_only = re.sub(r'<a?:[^:]+:\d+>', '', text_only)
+    text_only = re.sub(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\U00002600-\U000027BF\U0001F900-\U0001F9FF]', '', text_only)
+    text_only = text_only.strip()
+    if not text_only:
+        return {'valid': False, 'reason': '留言不能只包含表情符号！'}
+    if len(set(text_only)) <= 2 and len(text_only) > 5:
+        return {'valid': False, 'reason': '留言内容过于简单，请提供更有价值的回复！'}
+    spam_patterns = [
+        r'^[^\w\s]*$',
+        r'^[a-zA-Z]{1,3}$',
+        r'^[0-9]{1,3}$',
+        r'^[^\w\s]{3,}$',
+    ]
+    for pattern in spam_patterns:
+        if re.match(pattern, content):
+            return {'valid': False, 'reason': '留言内容不符合精选标准！'}
+    return {'valid': True, 'reason': '内容检查通过'}
+
+
+class NoOverridesDB:
+    def get_message_quality_settings(self, guild_id):
+        return {}
+
+
+def make_message(content):
+    return SimpleNamespace(
+        content=content, embeds=[], stickers=[], guild=SimpleNamespace(id=1),
+        author=SimpleNamespace(bot=False),
+    )
+
+
+def bench(name, check, messages, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            check(message)
+    elapsed = time.perf_counter() - started
+    per_call = elapsed / (rounds * len(messages)) * 1_000_000
+    print(f"{name:<22} {elapsed * 1000:8.1f} ms total   {per_call:6.2f} µs/message")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    messages = [make_message(content) for content in CORPUS]
+    rules = MessageQualityRules(NoOverridesDB())
+
+    mismatches = [
+        m.content[:20] for m in messages if legacy_check(m) != rules.check(m, 1)
+    ]
+    if mismatches:
+        print(f"verdict mismatch: {mismatches}")
+        sys.exit(1)
+
+    print(f"corpus={len(messages)} rounds={args.rounds}")
+    bench("legacy (per-call re)", legacy_check, messages, args.rounds)
+    bench("MessageQualityRules", lambda m: rules.check(m, 1), messages, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
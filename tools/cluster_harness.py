@@ -0,0 +1,286 @@
+"""集群本地演练：多个进程 + 假 gateway，验证 IPC 路由与跨进程缓存失效（不连接 Discord）。
+
+父进程运行 ClusterHub 并充当「假 gateway」：按 guild 所在分片把精选事件投递给负责的进程。
+每个工作进程是一个 HarnessBot：写入事件、集群广播与分片路由直接借用 FeaturedMessageBot 的方法，
+缓存、DatabaseManager、ClusterClient 与 BooklistPublishAPI 都是真实对象，只有 Discord 侧（帖子元数据、
+频道）换成假对象；各进程共用同一个临时数据库文件。演练检查：
+- 精选写入后，其他进程的精选索引经广播同步；
+- 某进程修改留言质量规则后，其他进程的已编译规则失效；
+- 0 号进程（HTTP 接口所在）收到的书单发布经 cluster_for_guild 转发到负责该服务器的进程执行。
+
+用法：
+    python tools/cluster_harness.py [--clusters 3] [--shards 6] [--events 300]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DISCORD_TOKEN", "harness-token")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.booklist.api import BooklistPublishAPI, register_cluster_handlers  # noqa: E402
+from app.bot.appreciator_stats import AppreciatorStats  # noqa: E402
+from app.bot.client import FeaturedMessageBot  # noqa: E402
+from app.bot.featured_index import FeaturedKeyIndex  # noqa: E402
+from app.bot.guild_settings import GuildSettingsCache  # noqa: E402
+from app.bot.render_cache import RenderCache  # noqa: E402
+from app.cluster import ClusterClient, ClusterHub, cluster_for_shard, shard_ids_for_cluster  # noqa: E402
+from app.features.message_quality import MessageQualityRules  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+
+GATEWAY_ID = -1
+PUBLISHER_ID = 7
+
+
+def guild_on_shard(shard_id: int, shard_count: int, n: int = 0) -> int:
+    """构造落在指定分片上的 guild_id（分片 = (guild_id >> 22) % shard_count）。"""
+    return (shard_id + n * shard_count) << 22
+
+
+class FakeThreadMetadata:
+    """每个帖子都视为 PUBLISHER_ID 的论坛帖，thread_id = guild_id + 1。"""
+
+    async def resolve(self, thread_id):
+        return {"guild_id": thread_id - 1, "owner_id": PUBLISHER_ID, "parent_is_forum": True}
+
+
+class FakeChannel:
+    """发送的消息 ID 编码了执行发布的进程：cluster_id * 10**6 + 序号。"""
+
+    def __init__(self, cluster_id, channel_id):
+        self.cluster_id = cluster_id
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, embed=None, view=None):
+        self.sent += 1
+        return SimpleNamespace(id=self.cluster_id * 10 ** 6 + self.sent)
+
+
+class HarnessBot:
+    """不连接 Discord 的 bot 替身：与集群、写入事件、路由相关的方法就是 FeaturedMessageBot 的实现。"""
+
+    shard_id_for = FeaturedMessageBot.shard_id_for
+    cluster_for_guild = FeaturedMessageBot.cluster_for_guild
+    _on_db_write = FeaturedMessageBot._on_db_write
+    _handle_db_write = FeaturedMessageBot._handle_db_write
+    _on_cluster_broadcast = FeaturedMessageBot._on_cluster_broadcast
+    _on_cluster_reconnected = FeaturedMessageBot._on_cluster_reconnected
+    _resync_caches = FeaturedMessageBot._resync_caches
+
+    def __init__(self, args):
+        self.shard_count = args.shards
+        self.db = DatabaseManager(args.db)
+        self.featured_index = FeaturedKeyIndex(self.db)
+        self.featured_index.load()
+        self.guild_settings = GuildSettingsCache(self.db)
+        self.guild_settings.load()
+        self.appreciator_stats = AppreciatorStats(self.db)
+        self.render_cache = RenderCache(maxsize=1000, ttl=60)
+        # 真实 bot 中由 FeaturedCommands 持有并注册
+        self.quality_rules = MessageQualityRules(self.db)
+        self.thread_metadata = FakeThreadMetadata()
+        self._event_loop = None
+        self._applying_remote_write = False
+        self.db.add_write_listener(self._on_db_write)
+        self.db.add_write_listener(self.quality_rules.on_db_write)
+        self.cluster = ClusterClient(
+            args.worker, "127.0.0.1", args.port,
+            shard_ids=shard_ids_for_cluster(args.worker, args.clusters, args.shards),
+        )
+        self.cluster.on_broadcast = self._on_cluster_broadcast
+        self.cluster.on_reconnect = self._on_cluster_reconnected
+        self._channels = {}
+
+    def is_guild_ready(self, guild_id):
+        return self.shard_id_for(guild_id) in self.cluster.shard_ids
+
+    def is_ready(self):
+        return True
+
+    def get_channel(self, channel_id):
+        if channel_id not in self._channels:
+            self._channels[channel_id] = FakeChannel(self.cluster.cluster_id, channel_id)
+        return self._channels[channel_id]
+
+
+async def run_worker(args):
+    bot = HarnessBot(args)
+    bot._event_loop = asyncio.get_running_loop()
+    db = bot.db
+    client = bot.cluster
+    shard_ids = client.shard_ids
+    api = BooklistPublishAPI(bot)
+    register_cluster_handlers(bot)
+    done = asyncio.Event()
+
+    async def gateway_event(payload):
+        shard_id = bot.shard_id_for(payload["guild_id"])
+        assert shard_id in shard_ids, f"event for shard {shard_id} routed to cluster {args.worker}"
+        added = db.add_featured_message(
+            guild_id=payload["guild_id"], thread_id=payload["thread_id"], message_id=payload["message_id"],
+            author_id=1, author_name="author", featured_by_id=2, featured_by_name="curator",
+        )
+        return {"cluster": args.worker, "added": added}
+
+    async def contains(payload):
+        return {"cluster": args.worker, "contains": bot.featured_index.contains(payload["thread_id"], payload["message_id"])}
+
+    async def set_quality(payload):
+        db.set_message_quality_settings(payload["guild_id"], min_length=payload["min_length"])
+        return {"cluster": args.worker}
+
+    async def quality_min_length(payload):
+        return {"cluster": args.worker, "min_length": bot.quality_rules.rules_for(payload["guild_id"]).min_length}
+
+    async def http_publish(payload):
+        # 相当于 0 号进程的 POST /booklist/publish：由真实的 publish 决定本地执行还是转发
+        status, body = await api.publish(payload)
+        return {"status": status, "body": body}
+
+    async def shutdown(payload):
+        asyncio.get_running_loop().call_later(0.05, done.set)
+        return {"cluster": args.worker}
+
+    for action, handler in {
+        "gateway_event": gateway_event,
+        "contains": contains,
+        "set_quality": set_quality,
+        "quality_min_length": quality_min_length,
+        "http_publish": http_publish,
+        "shutdown": shutdown,
+    }.items():
+        client.register(action, handler)
+    client.start()
+    await done.wait()
+    await client.close()
+
+
+async def wait_until(predicate, timeout=10.0, interval=0.02):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if await predicate():
+            return True
+        await asyncio.sleep(interval)
+    return False
+
+
+async def run_harness(args):
+    hub = ClusterHub("127.0.0.1", 0)
+    await hub.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cluster.db")
+        DatabaseManager(db_path)
+        # cluster_for_guild 按 config.CLUSTER_COUNT 计算负责进程
+        env = {**os.environ, "CLUSTER_COUNT": str(args.clusters)}
+        processes = [
+            subprocess.Popen([
+                sys.executable, os.path.abspath(__file__), "--worker", str(cluster_id),
+                "--port", str(hub.port), "--db", db_path,
+                "--clusters", str(args.clusters), "--shards", str(args.shards),
+            ], env=env)
+            for cluster_id in range(args.clusters)
+        ]
+        gateway = ClusterClient(GATEWAY_ID, "127.0.0.1", hub.port)
+        gateway.start()
+        try:
+            await gateway.wait_connected(10)
+            ok = await wait_until(lambda: asyncio.sleep(0, len(hub.connected) == args.clusters + 1))
+            assert ok, f"workers did not connect: {hub.connected}"
+
+            # 1. 假 gateway 按分片投递精选事件
+            started = time.perf_counter()
+            owners = []
+            for n in range(args.events):
+                shard_id = n % args.shards
+                guild_id = guild_on_shard(shard_id, args.shards, n // args.shards)
+                owner = cluster_for_shard(shard_id, args.clusters, args.shards)
+                owners.append(owner)
+                await gateway.request(owner, "gateway_event", {
+                    "guild_id": guild_id, "thread_id": guild_id + 1, "message_id": 10_000 + n,
+                })
+            dispatched = time.perf_counter() - started
+
+            last = {"thread_id": guild_on_shard((args.events - 1) % args.shards, args.shards,
+                                                (args.events - 1) // args.shards) + 1,
+                    "message_id": 10_000 + args.events - 1}
+
+            async def all_indexed():
+                results = await asyncio.gather(*(gateway.request(c, "contains", last) for c in range(args.clusters)))
+                return all(result["contains"] for result in results)
+
+            synced = await wait_until(all_indexed)
+            propagated = time.perf_counter() - started
+            print(f"events={args.events} clusters={args.clusters} shards={args.shards}")
+            print(f"  dispatch        {dispatched * 1000:8.1f} ms")
+            print(f"  index synced    {propagated * 1000:8.1f} ms   {'OK' if synced else 'FAILED'}")
+            print(f"  per-cluster     {[owners.count(c) for c in range(args.clusters)]}")
+
+            # 2. 留言质量规则：0 号进程修改，其他进程的已编译规则失效
+            guild_id = guild_on_shard(0, args.shards)
+            for cluster_id in range(args.clusters):
+                await gateway.request(cluster_id, "quality_min_length", {"guild_id": guild_id})
+            await gateway.request(0, "set_quality", {"guild_id": guild_id, "min_length": 42})
+
+            async def rules_invalidated():
+                results = await asyncio.gather(*(
+                    gateway.request(c, "quality_min_length", {"guild_id": guild_id}) for c in range(args.clusters)
+                ))
+                return all(result["min_length"] == 42 for result in results)
+
+            print(f"  quality rules   {'OK' if await wait_until(rules_invalidated) else 'FAILED'}")
+
+            # 3. 书单发布都打到 0 号进程，由其转发到负责该服务器的进程执行
+            routed = True
+            for shard_id in range(args.shards):
+                owner = cluster_for_shard(shard_id, args.clusters, args.shards)
+                guild_id = guild_on_shard(shard_id, args.shards)
+                result = await gateway.request(0, "http_publish", {
+                    "booklist_id": shard_id + 1,
+                    "thread_url": f"https://discord.com/channels/{guild_id}/{guild_id + 1}",
+                    "discord_user_id": str(PUBLISHER_ID),
+                    "title": f"书单 {shard_id + 1}",
+                    "items": [],
+                })
+                executed_by = int(result["body"]["message_id"]) // 10 ** 6 if result["status"] == 200 else None
+                if executed_by != owner:
+                    routed = False
+                    print(f"    shard {shard_id}: expected cluster {owner}, got {result}")
+            print(f"  publish routing {'OK' if routed else 'FAILED'}")
+        finally:
+            for cluster_id in range(args.clusters):
+                try:
+                    await gateway.request(cluster_id, "shutdown", {}, timeout=2)
+                except Exception:
+                    pass
+            await gateway.close()
+            for process in processes:
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            await hub.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clusters", type=int, default=3)
+    parser.add_argument("--shards", type=int, default=6)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--db", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker is not None:
+        asyncio.run(run_worker(args))
+    else:
+        asyncio.run(run_harness(args))
+
+
+if __name__ == "__main__":
+    main()